@@ -0,0 +1,190 @@
+"""
+API endpoints for optimizer jobs run in worker processes.
+
+Heavy optimizations (wallet search, simulation, breakpoint sweeps, large
+batch rankings) can be submitted as jobs instead of called inline; they
+run in services.job_queue's process pool, so they never hold up
+interactive requests in the web worker. Jobs are submitted, then polled
+or streamed, and can be cancelled.
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from api.optimizer import (
+    MAX_BATCH_TOP_K,
+    NDJSON_MEDIA_TYPE,
+    SPEND_KEYS,
+    SensitivityRequest,
+    SimulationRequest,
+    WalletRequest,
+    spend_profiles_matrix,
+)
+from services.job_queue import FINISHED, JOB_MEMORY_LIMIT_MB, JOB_TIME_LIMIT, Job, get_job_queue
+
+router = APIRouter(prefix="/api/optimizer/jobs", tags=["jobs"])
+
+
+class BatchJobParams(BaseModel):
+    profiles: List[Dict[str, Any]] = Field(..., min_length=1, description="Spend profiles, as for /recommend/batch")
+    top_k: int = Field(3, ge=1, le=MAX_BATCH_TOP_K)
+    chunk_size: Optional[int] = Field(None, ge=1)
+
+
+class JobRequest(BaseModel):
+    kind: Literal["wallet", "simulate", "breakpoints", "batch"]
+    params: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Request body of the matching endpoint: /wallet, /simulate, /breakpoints, "
+                    "or a BatchJobParams for batch"
+    )
+    priority: int = Field(0, ge=0, le=9, description="Higher priorities run first")
+    # Clients may tighten the server's limits but not raise or remove them
+    time_limit: Optional[float] = Field(
+        None, gt=0, le=JOB_TIME_LIMIT or None, description="Seconds the job may run"
+    )
+    memory_limit_mb: Optional[int] = Field(
+        None, ge=1, le=JOB_MEMORY_LIMIT_MB or None, description="Memory the job may allocate in its worker"
+    )
+
+
+PARAM_MODELS = {
+    "wallet": WalletRequest,
+    "simulate": SimulationRequest,
+    "breakpoints": SensitivityRequest,
+    "batch": BatchJobParams,
+}
+
+
+def job_params(kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate a job's parameters and convert them to its job function's arguments.
+
+    Raises:
+        RequestValidationError: If the parameters do not fit the job kind
+        HTTPException: If they are valid but describe no spend
+    """
+    try:
+        request = PARAM_MODELS[kind].model_validate(params)
+    except ValidationError as e:
+        raise RequestValidationError([
+            {**error, "loc": ("body", "params") + tuple(error["loc"])}
+            for error in e.errors(include_url=False, include_context=False)
+        ])
+
+    if kind == "batch":
+        ids, spend_matrix = spend_profiles_matrix(request.profiles)
+        return {
+            "ids": ids, "spend_matrix": spend_matrix, "spend_keys": SPEND_KEYS,
+            "top_k": request.top_k, "chunk_size": request.chunk_size,
+        }
+    if kind == "simulate":
+        if not any(amount > 0 for month in request.history for amount in month.values()):
+            raise HTTPException(status_code=400, detail="Total spend must be greater than 0")
+        return request.model_dump()
+
+    spend_dict = {key: getattr(request, key) for key in SPEND_KEYS}
+    if sum(spend_dict.values()) <= 0:
+        raise HTTPException(status_code=400, detail="Total spend must be greater than 0")
+    if kind == "wallet":
+        return {"spend": spend_dict, "max_cards": request.max_cards, "objective": request.objective}
+    categories = request.categories if request.categories is not None else SPEND_KEYS
+    unknown = [key for key in categories if key not in SPEND_KEYS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown spend categories {unknown}; expected some of {SPEND_KEYS}")
+    return {
+        "spend": spend_dict, "categories": categories,
+        "objective": request.objective, "max_spend": request.max_spend,
+    }
+
+
+def find_job(job_id: str) -> Job:
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.post("", status_code=202)
+async def submit_job(request: JobRequest, response: Response):
+    """
+    Queue a job; poll ``Location`` or stream ``Location/stream`` for its result.
+
+    The job's parameters are validated here, so a job that is accepted
+    only fails on errors inside the computation or on its limits.
+    """
+    params = job_params(request.kind, request.params)
+    queue = get_job_queue()
+    # The first submission starts the worker processes
+    job = await asyncio.to_thread(
+        queue.submit, request.kind, params, request.priority, request.time_limit, request.memory_limit_mb
+    )
+    response.headers["Location"] = f"{router.prefix}/{job.id}"
+    return {**job.summary(), "position": queue.position(job)}
+
+
+@router.get("")
+async def list_jobs(limit: int = Query(100, ge=1, le=1000)):
+    """The most recently submitted jobs, without their results."""
+    queue = get_job_queue()
+    return {
+        "jobs": [job.summary(include_result=False) for job in queue.jobs()[:limit]],
+        "counts": queue.counts(),
+    }
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """A job's status, with its result once it has succeeded."""
+    job = find_job(job_id)
+    return {**job.summary(), "position": get_job_queue().position(job)}
+
+
+@router.get("/{job_id}/stream")
+async def stream_job(job_id: str):
+    """
+    Stream a job's events as NDJSON until it finishes.
+
+    Each line is a status change, or a ``partial`` list of results for
+    jobs that produce them in chunks (batch). Events from before the
+    request are replayed first, so nothing is missed.
+    """
+    job = find_job(job_id)
+
+    async def iter_events():
+        past, queue = job.subscribe()
+        try:
+            for event in past:
+                yield json.dumps(event) + "\n"
+            finished = any(event["status"] in FINISHED for event in past)
+            while not finished:
+                event = await queue.get()
+                finished = event["status"] in FINISHED
+                yield json.dumps(event) + "\n"
+        finally:
+            job.unsubscribe(queue)
+
+    return StreamingResponse(iter_events(), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued or running job.
+
+    A queued job is dropped; a running one is interrupted in its worker.
+    Cancelling a finished job is a no-op.
+    """
+    job = find_job(job_id)
+    cancelled = get_job_queue().cancel(job)
+    return {**job.summary(include_result=False), "cancel_requested": cancelled}
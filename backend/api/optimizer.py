@@ -1,17 +1,53 @@
 """
 API endpoints for credit card optimizer.
 """
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Dict, List, Any
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, List, Any, Literal, Optional, Tuple
+import json
 import sys
 from pathlib import Path
 
+import numpy as np
+
 BACKEND_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BACKEND_DIR))
 
-from services.card_loader import load_cards_from_csv
-from services.card_ranker import rank_cards, generate_explanation
+from services import metrics
+from services.api_clients import TTLCache
+from services.card_catalog import get_card_catalog
+from services.card_frontier import DEFAULT_WEIGHTS, CardObjectives
+from services.columnar import (
+    ARROW_AVAILABLE,
+    ARROW_STREAM_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    InvalidColumnarData,
+    add_ledger,
+    columnar_media_type,
+    iter_arrow_stream,
+    iter_batch_record_batches,
+    read_spend_profiles,
+    to_parquet_bytes,
+)
+from services.compute import run_compute
+from services.card_ranker import generate_explanation
+from services.ledger_ingest import READ_CHUNK_BYTES, LedgerAggregator, LedgerStreamParser, rank_profiles
+from services.ranking_sessions import RankingSession, get_session_store
+from services.response_cache import (
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL,
+    ResponseCache,
+    cached_response,
+    canonical_key,
+    encode_json,
+    json_response,
+    round_amount,
+)
+from services.reward_engine import compile_snapshot, iter_batch_results, rank_cards_compiled
+from services.savings_simulator import simulate_savings
+from services.spend_sensitivity import DEFAULT_MAX_SPEND, spend_breakpoints
+from services.wallet_optimizer import optimize_wallet
 
 router = APIRouter(prefix="/api/optimizer", tags=["optimizer"])
 
@@ -24,6 +60,44 @@ class SpendRequest(BaseModel):
     online_shopping: float = 0
 
 
+class WalletRequest(SpendRequest):
+    max_cards: int = Field(3, ge=1, le=4, description="Maximum number of cards in the wallet")
+    objective: Literal["first_year", "ongoing"] = Field(
+        "first_year", description="first_year counts eligible signup bonuses; ongoing is rewards minus fees"
+    )
+
+
+class SimulationRequest(BaseModel):
+    history: List[Dict[str, float]] = Field(
+        ..., min_length=1, max_length=120,
+        description="Observed monthly spend by category, one dictionary per month"
+    )
+    months: int = Field(12, ge=12, le=36, description="Months per simulated trajectory")
+    paths: int = Field(2000, ge=100, le=20000, description="Number of simulated trajectories")
+    volatility: float = Field(0.0, ge=0, le=1, description="Sigma of the random monthly spend level")
+    top_k: int = Field(5, ge=1, le=50)
+    seed: Optional[int] = None
+
+
+class FrontierRequest(SpendRequest):
+    weights: Dict[str, float] = Field(
+        default_factory=lambda: dict(DEFAULT_WEIGHTS),
+        description="Objective -> non-negative weight for ranking; objectives are "
+                    "net_annual_rewards, first_year_value, annual_fee and signup_bonus_spend_requirement"
+    )
+    objectives: Optional[List[str]] = Field(None, description="Objectives the frontier is taken over (default all)")
+    frontier_only: bool = Field(True, description="Only return Pareto-optimal cards")
+    top_k: Optional[int] = Field(None, ge=1)
+
+
+class SensitivityRequest(SpendRequest):
+    categories: Optional[List[str]] = Field(None, description="Spend categories to vary (default all)")
+    objective: Literal["first_year", "ongoing"] = "first_year"
+    max_spend: float = Field(
+        DEFAULT_MAX_SPEND, gt=0, le=1_000_000, description="Highest monthly spend per category to consider"
+    )
+
+
 class CardRecommendation(BaseModel):
     card_name: str
     issuer: str
@@ -41,61 +115,563 @@ class RecommendationResponse(BaseModel):
     explanation: str = ""
 
 
+class SessionRequest(SpendRequest):
+    top_k: Optional[int] = Field(None, ge=1, description="Cards to return (default all)")
+
+
+class SessionUpdate(BaseModel):
+    category: str = Field(..., description="Spend category that changed")
+    amount: float = Field(..., ge=0, description="New monthly spend in the category")
+    top_k: Optional[int] = Field(None, ge=1, description="Cards to return (default all)")
+    spend: Optional[SpendRequest] = Field(
+        None, description="Spend before this change; rebuilds the session if this server no longer holds it"
+    )
+
+
+class SessionResponse(RecommendationResponse):
+    session_id: str
+
+
 @router.get("/cards")
 async def get_cards():
-    """Get all available credit cards from CSV."""
-    cards = load_cards_from_csv()
+    """Get all available credit cards from the in-memory catalog."""
+    cards = get_card_catalog().snapshot().cards
     return {"cards": cards, "count": len(cards)}
 
 
+RECOMMENDATION_FIELDS = list(CardRecommendation.model_fields)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated ``fields`` parameter into CardRecommendation fields.
+
+    Returns:
+        The selected fields in CardRecommendation order, or None for all
+    """
+    if fields is None:
+        return None
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(names - set(RECOMMENDATION_FIELDS))
+    if unknown or not names:
+        raise HTTPException(
+            status_code=422, detail=f"Unknown fields {unknown}; expected some of {RECOMMENDATION_FIELDS}"
+        )
+    return [name for name in RECOMMENDATION_FIELDS if name in names]
+
+
+def card_recommendation(ranked_card: Dict[str, Any], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    One ranked card as a CardRecommendation dictionary, optionally trimmed to ``fields``.
+
+    Built directly rather than through the pydantic model, since ranked
+    cards already have the right types.
+    """
+    recommendation = {
+        'card_name': ranked_card['card_name'],
+        'issuer': ranked_card['issuer'],
+        'reward_rate': float(ranked_card['overall_rate']),
+        'annual_fee': float(ranked_card['effective_annual_fee']),
+        'estimated_monthly_rewards': float(ranked_card['reward_value_monthly']),
+        'estimated_annual_rewards': float(ranked_card['reward_value_yearly']),
+        'cashback_breakdown': ranked_card['category_breakdown'],
+    }
+    if fields is not None:
+        recommendation = {name: recommendation[name] for name in fields}
+    return recommendation
+
+
+def recommendation_body(
+    ranked_cards: List[Dict[str, Any]],
+    spend_dict: Dict[str, float],
+    fields: Optional[List[str]] = None,
+    session_id: Optional[str] = None
+) -> bytes:
+    """
+    Render the /recommend response body (a RecommendationResponse) for ranked cards.
+
+    Args:
+        ranked_cards: Output of rank_cards_compiled or RankingSession.rank
+        spend_dict: Spend profile the cards were ranked for
+        fields: CardRecommendation fields to keep (default all)
+        session_id: Session the ranking belongs to, for the session endpoints
+
+    Returns:
+        The JSON body; building and encoding it is timed as one serialize span
+    """
+    # Generate explanation
+    best_card_data = ranked_cards[0] if ranked_cards else None
+    with metrics.span("explanation"):
+        explanation = generate_explanation(best_card_data, spend_dict) if best_card_data else "No recommendations available"
+
+    with metrics.span("serialize"):
+        recommendations = [card_recommendation(ranked_card, fields) for ranked_card in ranked_cards]
+        body = {} if session_id is None else {'session_id': session_id}
+        body.update(
+            recommendations=recommendations,
+            total_monthly_spend=float(sum(spend_dict.values())),
+            best_card=recommendations[0] if recommendations else None,
+            explanation=explanation,
+        )
+        return encode_json(body)
+
+
+# Rendered /recommend responses by canonical spend profile
+recommend_cache = ResponseCache("optimizer_recommend")
+
+
 @router.post("/recommend", response_model=RecommendationResponse)
-async def recommend_cards(request: SpendRequest):
+async def recommend_cards(
+    request: SpendRequest,
+    http_request: Request,
+    top_k: Optional[int] = Query(None, ge=1, description="Only return the best top_k cards (default all)"),
+    fields: Optional[str] = Query(None, description="Comma-separated card fields to return (default all)")
+):
     """
     Recommend credit cards based on spending categories.
-    Uses CSV data and ranking algorithm.
+    Uses the in-memory card catalog and ranking algorithm.
+
+    With ``top_k`` only the best cards are selected (a partial sort) and
+    only their breakdowns are built; ``fields`` trims each card to the
+    named CardRecommendation fields.
+
+    Responses are cached per spend profile (amounts rounded to cents),
+    top_k, fields and catalog version, and carry an ETag for
+    If-None-Match revalidation.
     """
     try:
-        spend_dict = request.dict()
+        spend_dict = {key: round_amount(value) for key, value in request.dict().items()}
         total_spend = sum(spend_dict.values())
         
         if total_spend == 0:
             raise HTTPException(status_code=400, detail="Total spend must be greater than 0")
+        selected_fields = parse_fields(fields)
         
-        # Load cards from CSV
-        cards = load_cards_from_csv()
-        
-        if not cards:
-            raise HTTPException(status_code=500, detail="No cards available")
+        snapshot = get_card_catalog().snapshot()
+        if top_k is None and selected_fields is None:
+            cache_key = canonical_key(spend_dict)
+        else:
+            cache_key = canonical_key({"spend": spend_dict, "top_k": top_k, "fields": selected_fields})
+        entry = recommend_cache.get(cache_key, snapshot.version)
+        if entry is not None:
+            return cached_response(http_request, entry, hit=True)
         
-        # Rank cards
-        ranked_cards = rank_cards(cards, spend_dict)
+        # Compiled catalog for the current snapshot (rebuilt on file change)
+        compiled = compile_snapshot(snapshot)
         
-        # Convert to response format
-        recommendations = []
-        for ranked_card in ranked_cards:
-            recommendations.append(CardRecommendation(
-                card_name=ranked_card['card_name'],
-                issuer=ranked_card['issuer'],
-                reward_rate=ranked_card['overall_rate'],
-                annual_fee=ranked_card['effective_annual_fee'],
-                estimated_monthly_rewards=ranked_card['reward_value_monthly'],
-                estimated_annual_rewards=ranked_card['reward_value_yearly'],
-                cashback_breakdown=ranked_card['category_breakdown']
-            ))
+        if not len(compiled):
+            raise HTTPException(status_code=500, detail="No cards available")
         
-        # Generate explanation
-        best_card_data = ranked_cards[0] if ranked_cards else None
-        explanation = generate_explanation(best_card_data, spend_dict) if best_card_data else "No recommendations available"
+        # Rank cards (vectorized, same results as card_ranker.rank_cards)
+        with metrics.span("rank_cards"):
+            ranked_cards = rank_cards_compiled(compiled, spend_dict, top_k)
         
-        return RecommendationResponse(
-            recommendations=recommendations,
-            total_monthly_spend=total_spend,
-            best_card=recommendations[0] if recommendations else None,
-            explanation=explanation
-        )
+        body = recommendation_body(ranked_cards, spend_dict, selected_fields)
+        return cached_response(http_request, recommend_cache.put(cache_key, snapshot.version, body), hit=False)
     
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+def session_response(
+    session_id: str,
+    session: RankingSession,
+    top_k: Optional[int],
+    selected_fields: Optional[List[str]] = None
+) -> Response:
+    with metrics.span("rank_cards"):
+        ranked_cards = session.rank(top_k)
+    return Response(
+        recommendation_body(ranked_cards, session.spend, selected_fields, session_id), media_type="application/json"
+    )
+
+
+def current_session(session_id: str) -> RankingSession:
+    """Look up a session, rebuilding it if the catalog changed since it was last used."""
+    store = get_session_store()
+    session = store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found or expired")
+    snapshot = get_card_catalog().snapshot()
+    if session.version != snapshot.version:
+        session.rebuild(compile_snapshot(snapshot), snapshot.version)
+        store.resized(session_id)
+    return session
+
+
+@router.post("/sessions", response_model=SessionResponse)
+async def create_session(request: SessionRequest, fields: Optional[str] = None):
+    """
+    Start a ranking session for interactive spend editing.
+
+    Returns the same ranking as /recommend plus a ``session_id``. Send
+    each later single-category change to PATCH /sessions/{session_id},
+    which only recomputes that category's rewards.
+    """
+    spend_dict = {key: round_amount(getattr(request, key)) for key in SPEND_KEYS}
+    if sum(spend_dict.values()) == 0:
+        raise HTTPException(status_code=400, detail="Total spend must be greater than 0")
+    selected_fields = parse_fields(fields)
+
+    snapshot = get_card_catalog().snapshot()
+    compiled = compile_snapshot(snapshot)
+    if not len(compiled):
+        raise HTTPException(status_code=500, detail="No cards available")
+
+    with metrics.span("session_columns"):
+        session_id, session = get_session_store().create(compiled, snapshot.version, spend_dict)
+    return session_response(session_id, session, request.top_k, selected_fields)
+
+
+@router.patch("/sessions/{session_id}", response_model=SessionResponse)
+async def update_session(session_id: str, request: SessionUpdate, fields: Optional[str] = None):
+    """
+    Change the spend in one category and re-rank.
+
+    Only the changed category's per-card rewards are recomputed and only
+    the top_k cards are sorted, so the update is linear in catalog size
+    with small constants; it runs inline on the event loop. Sessions are
+    held per server process: when this one has evicted the session (or
+    never had it, behind a load balancer) and ``spend`` is sent, the
+    session is rebuilt from it under the same id.
+    """
+    if request.category not in SPEND_KEYS:
+        raise HTTPException(status_code=422, detail=f"Unknown spend category {request.category!r}; expected one of {SPEND_KEYS}")
+    # Validated before the session is created or changed
+    selected_fields = parse_fields(fields)
+
+    store = get_session_store()
+    if store.get(session_id) is None and request.spend is not None:
+        snapshot = get_card_catalog().snapshot()
+        spend_dict = {key: round_amount(getattr(request.spend, key)) for key in SPEND_KEYS}
+        with metrics.span("session_columns"):
+            store.create(compile_snapshot(snapshot), snapshot.version, spend_dict, session_id)
+    session = current_session(session_id)
+
+    with metrics.span("session_update"):
+        session.update(request.category, round_amount(request.amount))
+    store.resized(session_id)
+    return session_response(session_id, session, request.top_k, selected_fields)
+
+
+@router.get("/sessions/{session_id}", response_model=SessionResponse)
+async def get_session(session_id: str, top_k: Optional[int] = Query(None, ge=1), fields: Optional[str] = None):
+    """The current ranking of a session."""
+    selected_fields = parse_fields(fields)
+    return session_response(session_id, current_session(session_id), top_k, selected_fields)
+
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """End a session, freeing its memory."""
+    return {"session_id": session_id, "deleted": get_session_store().delete(session_id)}
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SPEND_KEYS = list(SpendRequest.model_fields)
+# Most cards returned per profile by the batch and ledger endpoints
+MAX_BATCH_TOP_K = 100
+
+
+def parse_spend_batch(body: bytes, content_type: str) -> Tuple[List[Any], np.ndarray, Optional[int]]:
+    """
+    Parse a batch of spend profiles from a JSON or NDJSON request body.
+
+    JSON bodies are either a list of profiles or an object with a
+    ``profiles`` list and optional ``top_k``. NDJSON bodies hold one
+    profile per line. Profiles use SpendRequest's fields plus an optional
+    ``id`` that is echoed back.
+
+    Returns:
+        Tuple of (ids, spend_matrix, top_k override)
+    """
+    top_k = None
+    try:
+        if content_type.startswith(NDJSON_MEDIA_TYPE):
+            profiles = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            payload = json.loads(body or b"null")
+            if isinstance(payload, dict):
+                top_k = payload.get("top_k")
+                payload = payload.get("profiles")
+            profiles = payload
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid request body: {e}")
+
+    ids, spend_matrix = spend_profiles_matrix(profiles)
+    return ids, spend_matrix, top_k
+
+
+def spend_profiles_matrix(profiles: Any) -> Tuple[List[Any], np.ndarray]:
+    """
+    Validate a list of spend profiles and stack them into a matrix.
+
+    Returns:
+        Tuple of (ids, spend_matrix) with columns in SPEND_KEYS order
+    """
+    if not isinstance(profiles, list):
+        raise HTTPException(status_code=422, detail="Expected a list of spend profiles")
+
+    ids = []
+    spend_matrix = np.zeros((len(profiles), len(SPEND_KEYS)))
+    for row, profile in enumerate(profiles):
+        if not isinstance(profile, dict):
+            raise HTTPException(status_code=422, detail=f"Profile {row} must be an object")
+        ids.append(profile.get("id", row))
+        for column, key in enumerate(SPEND_KEYS):
+            value = profile.get(key, 0)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise HTTPException(status_code=422, detail=f"Profile {row}: '{key}' must be a number")
+            spend_matrix[row, column] = value
+    return ids, spend_matrix
+
+
+def require_columnar(media_type: Optional[str], status_code: int) -> None:
+    """Reject Arrow or Parquet bodies (415) or responses (406) when pyarrow is missing."""
+    if media_type is not None and not ARROW_AVAILABLE:
+        raise HTTPException(status_code=status_code, detail=f"{media_type} requires pyarrow on the server")
+
+
+async def read_columnar(read, *args):
+    """Run a columnar reader in the compute pool, mapping bad input to 400/422."""
+    try:
+        return await run_compute(read, *args)
+    except InvalidColumnarData as e:
+        raise HTTPException(status_code=400, detail=f"Invalid request body: {e}")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.post("/recommend/batch")
+async def recommend_batch(
+    request: Request,
+    top_k: int = Query(3, ge=1, le=MAX_BATCH_TOP_K),
+    chunk_size: Optional[int] = Query(None, ge=1)
+):
+    """
+    Recommend the top-k cards for many spend profiles in one call.
+
+    Accepts a JSON list (or ``{"profiles": [...], "top_k": k}``), an
+    NDJSON body, or Arrow IPC / Parquet with one profile per row. Profiles
+    are scored in chunks as profiles x cards matrix computations with the
+    same ranking as /recommend, in the compute pool. NDJSON requests get
+    an NDJSON response streamed chunk by chunk; ``Accept:
+    application/vnd.apache.arrow.stream`` streams Arrow record batches
+    and ``Accept: application/vnd.apache.parquet`` returns a Parquet file,
+    whatever the request format.
+    """
+    content_type = request.headers.get("content-type", "")
+    input_format = columnar_media_type(content_type)
+    output_format = columnar_media_type(request.headers.get("accept", ""))
+    require_columnar(input_format, 415)
+    require_columnar(output_format, 406)
+    body = await request.body()
+    with metrics.span("parse_batch"):
+        if input_format is not None:
+            body_top_k = None
+            ids, spend_matrix = await read_columnar(read_spend_profiles, body, input_format, SPEND_KEYS)
+        else:
+            ids, spend_matrix, body_top_k = parse_spend_batch(body, content_type)
+    if body_top_k is not None:
+        if isinstance(body_top_k, bool) or not isinstance(body_top_k, int) or not 1 <= body_top_k <= MAX_BATCH_TOP_K:
+            raise HTTPException(status_code=422, detail=f"top_k must be an integer from 1 to {MAX_BATCH_TOP_K}")
+        top_k = body_top_k
+
+    compiled = compile_snapshot(get_card_catalog().snapshot())
+    if not len(compiled):
+        raise HTTPException(status_code=500, detail="No cards available")
+
+    if output_format is not None:
+        schema, batches = iter_batch_record_batches(compiled, ids, spend_matrix, SPEND_KEYS, top_k, chunk_size)
+        if output_format == PARQUET_MEDIA_TYPE:
+            with metrics.span("score_batch"):
+                content = await run_compute(to_parquet_bytes, schema, batches)
+            return Response(content, media_type=PARQUET_MEDIA_TYPE)
+        pieces = iter_arrow_stream(schema, batches)
+
+        async def iter_pieces():
+            while (piece := await run_compute(next, pieces, None)) is not None:
+                yield piece
+        return StreamingResponse(iter_pieces(), media_type=ARROW_STREAM_MEDIA_TYPE)
+
+    chunks = iter_batch_results(compiled, ids, spend_matrix, SPEND_KEYS, top_k, chunk_size)
+
+    if content_type.startswith(NDJSON_MEDIA_TYPE):
+        async def iter_lines():
+            # Each chunk is scored in the compute pool as it is streamed
+            while (results := await run_compute(next, chunks, None)) is not None:
+                yield b"".join(encode_json(result) + b"\n" for result in results)
+        return StreamingResponse(iter_lines(), media_type=NDJSON_MEDIA_TYPE)
+
+    with metrics.span("score_batch"):
+        results = await run_compute(lambda: [result for chunk in chunks for result in chunk])
+    return json_response({"results": results, "count": len(results), "top_k": top_k})
+
+
+@router.post("/ledger")
+async def ingest_ledger(
+    request: Request,
+    top_k: int = Query(3, ge=0, le=MAX_BATCH_TOP_K),
+    resolve_merchants: bool = True,
+    include_months: bool = False
+):
+    """
+    Build spend profiles from a raw transaction ledger and rank cards.
+
+    The request body is a CSV ledger (date, merchant, category, amount and
+    an optional user_id column), typically sent with chunked transfer
+    encoding. It is parsed in the compute pool as it streams in, about
+    1 MiB at a time, and aggregated into average monthly per-category
+    spend per user, which feeds the batch ranker.
+    Arrow IPC and Parquet ledgers with the same columns are aggregated
+    column-wise in the compute pool once received.
+    """
+    aggregator = LedgerAggregator(resolve_merchants=resolve_merchants)
+    input_format = columnar_media_type(request.headers.get("content-type", ""))
+    require_columnar(input_format, 415)
+    if input_format is not None:
+        with metrics.span("ledger_ingest"):
+            await read_columnar(add_ledger, aggregator, await request.body(), input_format)
+    else:
+        parser = LedgerStreamParser(aggregator)
+        try:
+            with metrics.span("ledger_ingest"):
+                # Parsing and merchant resolution are CPU-bound; received
+                # chunks are batched so each compute call has enough to do
+                pending: List[bytes] = []
+                pending_bytes = 0
+                async for chunk in request.stream():
+                    pending.append(chunk)
+                    pending_bytes += len(chunk)
+                    if pending_bytes >= READ_CHUNK_BYTES:
+                        await run_compute(parser.feed, b"".join(pending))
+                        pending, pending_bytes = [], 0
+                await run_compute(parser.feed, b"".join(pending))
+                await run_compute(parser.close)
+        except UnicodeDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Ledger must be UTF-8 CSV: {e}")
+
+    profiles = aggregator.profiles()
+    if top_k > 0 and profiles:
+        with metrics.span("rank_profiles"):
+            await run_compute(rank_profiles, profiles, top_k)
+    if not include_months:
+        for profile in profiles:
+            profile.pop("by_month")
+
+    return {"users": profiles, "rows": aggregator.rows, "skipped": aggregator.skipped}
+
+
+@router.post("/wallet")
+async def recommend_wallet(request: WalletRequest):
+    """
+    Recommend the best combination of up to ``max_cards`` cards.
+
+    Each spend category is routed to the best card in the wallet, with
+    spend above a card's category cap overflowing to the next best card.
+    The branch-and-bound search runs in the compute pool.
+    """
+    spend_dict = {key: getattr(request, key) for key in SPEND_KEYS}
+    if sum(spend_dict.values()) <= 0:
+        raise HTTPException(status_code=400, detail="Total spend must be greater than 0")
+
+    compiled = compile_snapshot(get_card_catalog().snapshot())
+    if not len(compiled):
+        raise HTTPException(status_code=500, detail="No cards available")
+
+    with metrics.span("wallet_search"):
+        return await run_compute(optimize_wallet, compiled, spend_dict, request.max_cards, request.objective)
+
+
+@router.post("/simulate")
+async def simulate(request: SimulationRequest):
+    """
+    Simulate each card's net value over bootstrapped spend trajectories.
+
+    Returns percentiles of net value over the horizon and per-month bands
+    for the ``top_k`` cards by median. The simulation runs in the compute
+    pool.
+    """
+    if not any(amount > 0 for month in request.history for amount in month.values()):
+        raise HTTPException(status_code=400, detail="Total spend must be greater than 0")
+
+    compiled = compile_snapshot(get_card_catalog().snapshot())
+    if not len(compiled):
+        raise HTTPException(status_code=500, detail="No cards available")
+
+    with metrics.span("simulate"):
+        return await run_compute(
+            simulate_savings, compiled, request.history, request.months, request.paths,
+            request.volatility, request.top_k, request.seed
+        )
+
+
+# Card objective matrices by catalog version and spend profile, so
+# re-weighting a profile skips reward computation
+objectives_cache = TTLCache(RESPONSE_CACHE_SIZE)
+metrics.register_cache("frontier_objectives", lambda: (objectives_cache.hits, objectives_cache.misses))
+
+
+@router.post("/frontier")
+async def card_frontier(request: FrontierRequest):
+    """
+    Pareto-optimal cards over net annual value, first-year value, annual
+    fee and signup bonus spend requirement, ranked by weighted score.
+
+    Objective values are cached per spend profile, so requests that only
+    change weights, objectives or top_k reuse them. Scoring and the
+    skyline run in the compute pool.
+    """
+    spend_dict = {key: round_amount(getattr(request, key)) for key in SPEND_KEYS}
+    if sum(spend_dict.values()) <= 0:
+        raise HTTPException(status_code=400, detail="Total spend must be greater than 0")
+
+    snapshot = get_card_catalog().snapshot()
+    compiled = compile_snapshot(snapshot)
+    if not len(compiled):
+        raise HTTPException(status_code=500, detail="No cards available")
+
+    cache_key = f"{snapshot.version}:{canonical_key(spend_dict)}"
+    found, objectives = objectives_cache.get(cache_key)
+    if not found:
+        with metrics.span("score_objectives"):
+            objectives = await run_compute(CardObjectives.from_spend, compiled, spend_dict)
+        objectives_cache.set(cache_key, objectives, RESPONSE_CACHE_TTL)
+
+    try:
+        with metrics.span("skyline"):
+            return await run_compute(
+                objectives.rank, request.weights, request.objectives, request.frontier_only, request.top_k
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.post("/breakpoints")
+async def spend_sensitivity(request: SensitivityRequest):
+    """
+    For each spend category, the monthly spend levels where the best
+    card changes, with every other category held at the request's spend.
+
+    Breakpoints are solved from the piecewise linear reward functions in
+    one pass per change of best card, not by probing spend levels, in the
+    compute pool.
+    """
+    spend_dict = {key: getattr(request, key) for key in SPEND_KEYS}
+    if sum(spend_dict.values()) <= 0:
+        raise HTTPException(status_code=400, detail="Total spend must be greater than 0")
+    categories = request.categories if request.categories is not None else SPEND_KEYS
+    unknown = [key for key in categories if key not in SPEND_KEYS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown spend categories {unknown}; expected some of {SPEND_KEYS}")
+
+    compiled = compile_snapshot(get_card_catalog().snapshot())
+    if not len(compiled):
+        raise HTTPException(status_code=500, detail="No cards available")
+
+    with metrics.span("breakpoints"):
+        return await run_compute(
+            spend_breakpoints, compiled, spend_dict, categories, request.objective, request.max_spend
+        )
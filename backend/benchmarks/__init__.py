@@ -0,0 +1,14 @@
+"""
+Benchmark suite for the optimizer's hot paths.
+
+Synthetic catalogs, merchant tables and transaction ledgers are generated
+at configurable scale (benchmarks.synthetic), then timed by per-function
+microbenchmarks (benchmarks.micro) and end-to-end requests through an
+in-process ASGI client (benchmarks.endpoints). Results are written as
+JSON so runs can be compared and regressions flagged.
+
+Usage (from backend/):
+    python -m benchmarks --output results.json
+    python -m benchmarks --preset full --data-dir /tmp/bench-data
+    python -m benchmarks --compare baseline.json --threshold 0.2
+"""
@@ -0,0 +1,112 @@
+"""
+Command-line entry point: python -m benchmarks --help
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.harness import (
+    DEFAULT_THRESHOLD,
+    BenchmarkRun,
+    compare_results,
+    load_results,
+    print_comparison,
+    save_results,
+)
+
+PRESETS = {
+    "quick": {
+        "cards": [10, 1000, 10_000],
+        "endpoint_cards": [10, 1000],
+        "merchants": 100_000,
+        "ledger_rows": 200_000,
+        "requests": 100,
+        "load_requests": 1000,
+    },
+    "full": {
+        "cards": [10, 1000, 10_000, 100_000],
+        "endpoint_cards": [10, 1000, 10_000],
+        "merchants": 1_000_000,
+        "ledger_rows": 10_000_000,
+        "requests": 500,
+        "load_requests": 5000,
+    },
+}
+SUITES = ("cards", "merchants", "ledger", "endpoints", "load")
+
+
+def int_list(value: str):
+    return [int(part) for part in value.split(",") if part]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the optimizer's hot paths")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick", help="Data sizes (default: quick)")
+    parser.add_argument("--suite", action="append", choices=SUITES, help="Suites to run (repeatable, default: all)")
+    parser.add_argument("--cards", type=int_list, help="Catalog sizes, e.g. 10,1000,100000")
+    parser.add_argument("--endpoint-cards", type=int_list, help="Catalog sizes served in endpoint benchmarks")
+    parser.add_argument("--merchants", type=int, help="Merchant table rows")
+    parser.add_argument("--ledger-rows", type=int, help="Transaction ledger rows")
+    parser.add_argument("--requests", type=int, help="Requests per endpoint case")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 16], help="In-flight request levels")
+    parser.add_argument("--load-concurrency", type=int_list, default=[1, 64, 256],
+                        help="In-flight request levels in the load scenario")
+    parser.add_argument("--only", help="Only run cases whose key contains this text")
+    parser.add_argument("--data-dir", type=Path, help="Reuse generated data here (default: a temporary directory)")
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    parser.add_argument("--compare", type=Path, help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown flagged as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    config = dict(PRESETS[args.preset])
+    for key in ("cards", "endpoint_cards", "merchants", "ledger_rows", "requests"):
+        if getattr(args, key) is not None:
+            config[key] = getattr(args, key)
+    config["concurrency"] = args.concurrency
+    config["load_concurrency"] = args.load_concurrency
+    config["suites"] = args.suite or list(SUITES)
+    config["preset"] = args.preset
+
+    # Imported here so --help works without loading the services
+    from benchmarks.endpoints import run_endpoint_benchmarks, run_load_benchmarks
+    from benchmarks.micro import run_card_benchmarks, run_ledger_benchmarks, run_merchant_benchmarks
+
+    run = BenchmarkRun(only=args.only)
+    with tempfile.TemporaryDirectory(prefix="ccopt-bench-") as temporary:
+        data_dir = args.data_dir or Path(temporary)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        if "cards" in config["suites"]:
+            run_card_benchmarks(run, data_dir, config["cards"])
+        if "merchants" in config["suites"]:
+            run_merchant_benchmarks(run, data_dir, config["merchants"])
+        if "ledger" in config["suites"]:
+            run_ledger_benchmarks(run, data_dir, config["ledger_rows"], config["merchants"])
+        if "endpoints" in config["suites"]:
+            run_endpoint_benchmarks(
+                run, data_dir, config["endpoint_cards"], config["merchants"],
+                config["requests"], config["concurrency"]
+            )
+        if "load" in config["suites"]:
+            run_load_benchmarks(
+                run, data_dir, config["endpoint_cards"], config["merchants"],
+                config["load_requests"], config["load_concurrency"]
+            )
+
+    data = run.to_dict(config)
+    if args.output:
+        save_results(data, args.output)
+        print(f"Wrote {len(run.results)} results to {args.output}")
+
+    if args.compare:
+        comparisons = compare_results(load_results(args.compare), data, args.threshold)
+        print_comparison(comparisons)
+        regressions = [c for c in comparisons if c["status"] == "regression"]
+        print(f"{len(regressions)} regressions across {len(comparisons)} compared cases")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+End-to-end request latency through an in-process ASGI client.
+
+Requests go through the full FastAPI stack (routing, validation,
+serialization) via httpx.ASGITransport, without sockets, so results
+measure the application rather than the network.
+"""
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import httpx
+
+from benchmarks.harness import BenchmarkRun, summarize
+from benchmarks.micro import cards_file, merchants_file
+from benchmarks.synthetic import merchant_name, spend_profiles
+from services.card_catalog import CardCatalog, set_card_catalog
+from services.merchant_resolver import MerchantIndex, set_merchant_index
+
+GROUP = "endpoint"
+LOAD_GROUP = "load"
+LOAD_CONCURRENCY = (1, 64, 256)
+# Heavy requests kept in flight behind the light ones in the load scenario
+BACKGROUND_REQUESTS = 2
+
+# (name, method, request builder taking the request number)
+RequestCase = Tuple[str, str, Callable[[int], Dict[str, Any]]]
+
+
+def request_cases(merchant_rows: int) -> List[RequestCase]:
+    profiles = spend_profiles(100)
+    merchants = [merchant_name(i * 7919 % merchant_rows)[0] for i in range(100)]
+    return [
+        ("POST /api/optimizer/recommend", "POST",
+         lambda n: {"url": "/api/optimizer/recommend", "json": profiles[n % len(profiles)]}),
+        ("POST /api/optimizer/recommend/batch", "POST",
+         lambda n: {"url": "/api/optimizer/recommend/batch", "json": profiles}),
+        ("POST /api/optimizer/wallet", "POST",
+         lambda n: {"url": "/api/optimizer/wallet", "json": profiles[n % len(profiles)]}),
+        ("POST /recommend", "POST",
+         lambda n: {"url": "/recommend", "json": {"merchant": merchants[n % len(merchants)], "amount": 25.0 + n % 500}}),
+        ("GET /merchant-info", "GET",
+         lambda n: {"url": f"/merchant-info/{merchants[n % len(merchants)]}"}),
+    ]
+
+
+async def measure_requests(
+    client: httpx.AsyncClient,
+    method: str,
+    build: Callable[[int], Dict[str, Any]],
+    requests: int,
+    concurrency: int
+) -> Dict[str, float]:
+    """
+    Send ``requests`` requests with ``concurrency`` in flight at a time.
+
+    Returns:
+        Latency summary (seconds per request, with p99) plus throughput
+        in requests per second
+    """
+    latencies: List[float] = []
+    counter = iter(range(requests))
+
+    async def worker():
+        for n in counter:
+            start = time.perf_counter()
+            response = await client.request(method, **build(n))
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"{method} {build(n)['url']} returned {response.status_code}: {response.text[:200]}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    stats = summarize(latencies)
+    ordered = sorted(latencies)
+    stats['p99'] = ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+    stats['throughput'] = len(latencies) / elapsed
+    return stats
+
+
+async def run_endpoint_benchmarks_async(
+    run: BenchmarkRun,
+    data_dir: Path,
+    card_counts: Sequence[int],
+    merchant_rows: int,
+    requests: int = 200,
+    concurrency: Sequence[int] = (1, 16)
+) -> None:
+    # Serve MCC details from the bundled samples instead of the network
+    os.environ.setdefault("MCC_OFFLINE", "1")
+    set_merchant_index(MerchantIndex(merchants_file(data_dir, merchant_rows)))
+    set_card_catalog(CardCatalog(cards_file(data_dir, card_counts[0])))
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for count in card_counts:
+            set_card_catalog(CardCatalog(cards_file(data_dir, count)))
+            for name, method, build in request_cases(merchant_rows):
+                for level in concurrency:
+                    if not run.wants(GROUP, name, cards=count, concurrency=level, merchants=merchant_rows):
+                        continue
+                    # Warm caches and lazily built tables first
+                    await measure_requests(client, method, build, min(requests, 10), 1)
+                    stats = await measure_requests(client, method, build, requests, level)
+                    run.record(GROUP, name, stats, cards=count, concurrency=level, merchants=merchant_rows)
+
+
+def load_cases(merchant_rows: int) -> Tuple[RequestCase, List[RequestCase]]:
+    """A mix of light requests and the heavy requests running behind them."""
+    profiles = spend_profiles(100)
+    merchants = [merchant_name(i * 7919 % merchant_rows)[0] for i in range(100)]
+
+    def light(n: int) -> Dict[str, Any]:
+        if n % 2:
+            return {"url": "/api/optimizer/recommend", "json": profiles[n % len(profiles)]}
+        return {"url": "/recommend", "json": {"merchant": merchants[n % len(merchants)], "amount": 25.0 + n % 500}}
+
+    history = spend_profiles(12, seed=1)
+    heavy = [
+        ("POST /api/optimizer/simulate", "POST",
+         lambda n: {"url": "/api/optimizer/simulate",
+                    "json": {"history": history, "months": 36, "paths": 10_000, "volatility": 0.2}}),
+        ("POST /api/optimizer/wallet", "POST",
+         lambda n: {"url": "/api/optimizer/wallet", "json": {**profiles[n % len(profiles)], "max_cards": 4}}),
+    ]
+    return ("POST recommend mix", "POST", light), heavy
+
+
+async def keep_busy(client: httpx.AsyncClient, cases: List[RequestCase], stop: asyncio.Event) -> int:
+    """Send heavy requests back to back until ``stop`` is set; returns how many completed."""
+    completed = 0
+    n = 0
+    while not stop.is_set():
+        _, method, build = cases[n % len(cases)]
+        response = await client.request(method, **build(n))
+        if response.status_code != 200:
+            raise RuntimeError(f"{method} {build(n)['url']} returned {response.status_code}: {response.text[:200]}")
+        completed += 1
+        n += 1
+    return completed
+
+
+async def run_load_benchmarks_async(
+    run: BenchmarkRun,
+    data_dir: Path,
+    card_counts: Sequence[int],
+    merchant_rows: int,
+    requests: int = 1000,
+    concurrency: Sequence[int] = LOAD_CONCURRENCY
+) -> None:
+    os.environ.setdefault("MCC_OFFLINE", "1")
+    set_merchant_index(MerchantIndex(merchants_file(data_dir, merchant_rows)))
+    set_card_catalog(CardCatalog(cards_file(data_dir, card_counts[0])))
+    import main
+
+    (name, method, build), heavy = load_cases(merchant_rows)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        for count in card_counts:
+            set_card_catalog(CardCatalog(cards_file(data_dir, count)))
+            # Warm response caches (one pass over the request mix), lazily
+            # built tables and the compute pool
+            await measure_requests(client, method, build, 200, 16)
+            for _, heavy_method, heavy_build in heavy:
+                await measure_requests(client, heavy_method, heavy_build, 1, 1)
+            for background in ("none", "heavy"):
+                for level in concurrency:
+                    params = {"cards": count, "concurrency": level, "background": background}
+                    if not run.wants(LOAD_GROUP, name, **params):
+                        continue
+                    stop = asyncio.Event()
+                    busy = [
+                        asyncio.create_task(keep_busy(client, heavy, stop))
+                        for _ in range(BACKGROUND_REQUESTS if background == "heavy" else 0)
+                    ]
+                    try:
+                        stats = await measure_requests(client, method, build, max(requests, level), level)
+                    finally:
+                        stop.set()
+                        completed = await asyncio.gather(*busy)
+                    stats["background_completed"] = sum(completed)
+                    run.record(LOAD_GROUP, name, stats, **params)
+
+
+def run_load_benchmarks(
+    run: BenchmarkRun,
+    data_dir: Path,
+    card_counts: Sequence[int],
+    merchant_rows: int,
+    requests: int = 1000,
+    concurrency: Sequence[int] = LOAD_CONCURRENCY
+) -> None:
+    """
+    Measure light-request latency at rising concurrency, alone and while
+    heavy requests (36-month simulations, 4-card wallet searches) run
+    back to back in the background.
+
+    Every request goes through one in-process event loop, so any handler
+    that blocked the loop would show up directly in the light requests'
+    p99; with heavy compute behind the compute pool boundary, p99 should
+    grow with concurrency only through queueing.
+
+    Args:
+        run: Result collector
+        data_dir: Directory for generated data files
+        card_counts: Catalog sizes to serve
+        merchant_rows: Merchant table size
+        requests: Light requests per case (at least one per in-flight slot)
+        concurrency: Light requests in flight at once, one case per level
+    """
+    asyncio.run(run_load_benchmarks_async(run, data_dir, card_counts, merchant_rows, requests, concurrency))
+
+
+def run_endpoint_benchmarks(
+    run: BenchmarkRun,
+    data_dir: Path,
+    card_counts: Sequence[int],
+    merchant_rows: int,
+    requests: int = 200,
+    concurrency: Sequence[int] = (1, 16)
+) -> None:
+    """
+    Time /api/optimizer/recommend, /recommend and /merchant-info (plus the
+    batch and wallet endpoints) against synthetic data.
+
+    Args:
+        run: Result collector
+        data_dir: Directory for generated data files
+        card_counts: Catalog sizes to serve
+        merchant_rows: Merchant table size
+        requests: Requests per case
+        concurrency: Requests in flight at once, one case per level
+    """
+    asyncio.run(run_endpoint_benchmarks_async(run, data_dir, card_counts, merchant_rows, requests, concurrency))
@@ -0,0 +1,214 @@
+"""
+Timing, result records and run-to-run comparison.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+RESULTS_FORMAT_VERSION = 1
+DEFAULT_MIN_TIME = 0.5
+DEFAULT_THRESHOLD = 0.2
+
+
+def summarize(times: List[float], ops: int = 1) -> Dict[str, float]:
+    """
+    Summarize per-call timings in seconds per operation.
+
+    Args:
+        times: Seconds per call
+        ops: Operations performed by each call
+    """
+    per_op = sorted(t / ops for t in times)
+    return {
+        'repeat': len(per_op),
+        'min': per_op[0],
+        'median': statistics.median(per_op),
+        'mean': statistics.fmean(per_op),
+        'p95': per_op[min(len(per_op) - 1, int(0.95 * len(per_op)))],
+        'max': per_op[-1],
+    }
+
+
+def measure(
+    fn: Callable[[], Any],
+    ops: int = 1,
+    min_time: float = DEFAULT_MIN_TIME,
+    min_repeat: int = 3,
+    max_repeat: int = 1000,
+    warmup: int = 1
+) -> Dict[str, float]:
+    """
+    Time repeated calls of ``fn``.
+
+    Calls are repeated until ``min_time`` seconds have passed (at least
+    ``min_repeat`` and at most ``max_repeat`` calls), so slow cases at
+    large scale still finish quickly.
+
+    Args:
+        fn: Function to time
+        ops: Operations each call performs (stats are per operation)
+        min_time: Target total measuring time in seconds
+        min_repeat: Minimum number of timed calls
+        max_repeat: Maximum number of timed calls
+        warmup: Untimed calls made first
+
+    Returns:
+        Summary statistics in seconds per operation
+    """
+    for _ in range(warmup):
+        fn()
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < max_repeat and (len(times) < min_repeat or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return summarize(times, ops)
+
+
+def result_key(result: Dict[str, Any]) -> str:
+    """Stable identifier of a benchmark case, e.g. ``micro.rank_cards[cards=1000]``."""
+    params = ",".join(f"{key}={value}" for key, value in sorted(result['params'].items()))
+    return f"{result['group']}.{result['name']}[{params}]"
+
+
+class BenchmarkRun:
+    """Collects benchmark results and prints them as they arrive."""
+
+    def __init__(self, only: Optional[str] = None, verbose: bool = True):
+        """
+        Args:
+            only: Substring a case's key must contain to run
+            verbose: Print each result as it is recorded
+        """
+        self.only = only
+        self.verbose = verbose
+        self.results: List[Dict[str, Any]] = []
+
+    def wants(self, group: str, name: str, **params: Any) -> bool:
+        """Check whether a case passes the ``only`` filter."""
+        if not self.only:
+            return True
+        return self.only in result_key({'group': group, 'name': name, 'params': params})
+
+    def record(self, group: str, name: str, stats: Dict[str, float], **params: Any) -> None:
+        """Record one benchmark case."""
+        result = {'group': group, 'name': name, 'params': params, 'unit': 's', 'stats': stats}
+        self.results.append(result)
+        if self.verbose:
+            extra = f" p99 {stats['p99'] * 1e3:9.3f}ms" if 'p99' in stats else ""
+            print(
+                f"{result_key(result):<60} median {stats['median'] * 1e3:9.3f}ms "
+                f"p95 {stats['p95'] * 1e3:9.3f}ms{extra} (n={stats['repeat']})",
+                flush=True
+            )
+
+    def bench(
+        self,
+        group: str,
+        name: str,
+        fn: Callable[[], Any],
+        ops: int = 1,
+        min_repeat: int = 3,
+        warmup: int = 1,
+        **params: Any
+    ) -> None:
+        """Measure and record ``fn`` unless filtered out (see ``measure``)."""
+        if self.wants(group, name, **params):
+            stats = measure(fn, ops=ops, min_repeat=min_repeat, warmup=warmup)
+            self.record(group, name, stats, **params)
+
+    def to_dict(self, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return {
+            'format_version': RESULTS_FORMAT_VERSION,
+            'meta': environment_info(),
+            'config': config or {},
+            'results': self.results,
+        }
+
+
+def environment_info() -> Dict[str, Any]:
+    """Describe the machine and code a run was made on."""
+    import numpy
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, timeout=5, cwd=Path(__file__).resolve().parent
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': sys.version.split()[0],
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def save_results(data: Dict[str, Any], path: Path) -> None:
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.write('\n')
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    metric: str = 'median'
+) -> List[Dict[str, Any]]:
+    """
+    Compare two runs case by case.
+
+    Args:
+        baseline: Earlier run (as saved by save_results)
+        current: New run
+        threshold: Relative slowdown that counts as a regression
+            (0.2 = 20% slower); the same speedup counts as an improvement
+        metric: Statistic to compare
+
+    Returns:
+        One entry per case present in both runs, with the baseline and
+        current values, their ratio and a status of "regression",
+        "improvement" or "ok"
+    """
+    baseline_stats = {result_key(result): result['stats'] for result in baseline['results']}
+    comparisons = []
+    for result in current['results']:
+        key = result_key(result)
+        if key not in baseline_stats:
+            continue
+        before = baseline_stats[key][metric]
+        after = result['stats'][metric]
+        ratio = after / before if before > 0 else float('inf')
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold):
+            status = 'improvement'
+        else:
+            status = 'ok'
+        comparisons.append({'case': key, 'baseline': before, 'current': after, 'ratio': ratio, 'status': status})
+    return comparisons
+
+
+def print_comparison(comparisons: List[Dict[str, Any]]) -> None:
+    for comparison in comparisons:
+        print(
+            f"{comparison['case']:<60} {comparison['baseline'] * 1e3:9.3f}ms -> "
+            f"{comparison['current'] * 1e3:9.3f}ms  x{comparison['ratio']:.2f}  {comparison['status']}"
+        )
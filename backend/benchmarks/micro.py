@@ -0,0 +1,251 @@
+"""
+Per-function microbenchmarks over synthetic data.
+
+Each function swaps the process-wide catalog or merchant index for a
+synthetic one while it runs and restores the previous one afterwards.
+"""
+import itertools
+import json
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+from api.optimizer import recommendation_body
+from benchmarks.harness import BenchmarkRun
+from benchmarks.synthetic import (
+    SPEND_KEYS,
+    ensure_file,
+    merchant_name,
+    spend_profiles,
+    write_cards_csv,
+    write_ledger,
+    write_merchant_table,
+)
+from services.card_catalog import CardCatalog, get_card_catalog, set_card_catalog
+from services.card_frontier import CardObjectives
+from services.card_loader import parse_cards_csv
+from services.card_ranker import rank_cards
+from services.card_schema import CompiledCatalog, read_snapshot, write_snapshot
+from services.columnar import ARROW_AVAILABLE, iter_arrow_stream, iter_batch_record_batches
+from services.file_cache import content_version
+from services.fuzzy_matcher import TrigramIndex
+from services.ledger_ingest import LedgerAggregator, LedgerStreamParser, aggregate_ledger_file, resolve_category
+from services.merchant_resolver import (
+    MerchantIndex,
+    get_merchant_index,
+    resolve_merchant_to_category,
+    set_merchant_index,
+)
+from services.ranking_sessions import RankingSession
+from services.reward_engine import iter_batch_results, iter_top_cards, rank_cards_compiled
+from services.rule_engine import RuleTables, evaluate_all_cards
+from services.savings_simulator import simulate_savings
+from services.spend_sensitivity import spend_breakpoints
+from services.wallet_optimizer import optimize_wallet
+
+GROUP = "micro"
+LOOKUPS_PER_CALL = 1000
+TRANSACTIONS_PER_CALL = 100
+STREAM_CHUNK_BYTES = 64 * 1024
+SIMULATION_PATHS = 10_000
+
+
+def cards_file(data_dir: Path, count: int) -> Path:
+    return ensure_file(data_dir, f"cards_{count}.csv", lambda path: write_cards_csv(path, count))
+
+
+def merchants_file(data_dir: Path, rows: int) -> Path:
+    return ensure_file(data_dir, f"merchants_{rows}.csv", lambda path: write_merchant_table(path, rows))
+
+
+def ledger_file(data_dir: Path, rows: int, merchant_rows: int) -> Path:
+    merchants = min(merchant_rows, 100_000)
+    return ensure_file(
+        data_dir,
+        f"ledger_{rows}_{merchants}.csv",
+        lambda path: write_ledger(path, rows, merchants=merchants)
+    )
+
+
+def run_card_benchmarks(run: BenchmarkRun, data_dir: Path, card_counts: Sequence[int], profiles: int = 1000) -> None:
+    """Catalog loading, ranking, rule evaluation and wallet search per catalog size."""
+    previous = get_card_catalog()
+    transactions = [
+        (category, amount)
+        for category, amount in zip(
+            itertools.cycle(['Groceries', 'Dining', 'Gas', 'Travel', 'Online Shopping', 'Other']),
+            np.random.default_rng(0).uniform(1, 3000, TRANSACTIONS_PER_CALL).round(2).tolist()
+        )
+    ]
+    try:
+        for count in card_counts:
+            path = cards_file(data_dir, count)
+            raw = path.read_bytes()
+            text = raw.decode('utf-8')
+            run.bench(GROUP, "parse_cards_csv", lambda: parse_cards_csv(text), cards=count)
+
+            cards = parse_cards_csv(text)
+            run.bench(GROUP, "compile_catalog", lambda: CompiledCatalog.from_cards(cards), cards=count)
+
+            snapshot_path = data_dir / f"bench_cards_{count}.snapshot"
+            write_snapshot(CompiledCatalog.from_cards(cards), snapshot_path, content_version(raw))
+            run.bench(GROUP, "read_snapshot", lambda: read_snapshot(snapshot_path), cards=count)
+
+            catalog = CardCatalog(path)
+            set_card_catalog(catalog)
+            snapshot = catalog.snapshot()
+            compiled = snapshot.compiled
+
+            spends = itertools.cycle(spend_profiles(50))
+            run.bench(GROUP, "rank_cards", lambda: rank_cards(cards, next(spends)), cards=count)
+            run.bench(GROUP, "rank_cards_compiled", lambda: rank_cards_compiled(compiled, next(spends)), cards=count)
+            run.bench(GROUP, "rank_cards_top5", lambda: rank_cards(cards, next(spends), 5), cards=count)
+
+            # /recommend with and without top_k, ranking plus response encoding
+            def recommend_full():
+                spend = next(spends)
+                return recommendation_body(rank_cards_compiled(compiled, spend), spend)
+            run.bench(GROUP, "recommend_response", recommend_full, cards=count)
+
+            def recommend_lean():
+                spend = next(spends)
+                return recommendation_body(rank_cards_compiled(compiled, spend, 5), spend, ["card_name"])
+            run.bench(GROUP, "recommend_response_top5", recommend_lean, cards=count)
+
+            # A slider move: one category changes, the top 5 are re-ranked
+            session = RankingSession(compiled, snapshot.version, next(spends))
+            amounts = itertools.cycle(itertools.product(SPEND_KEYS, (0.0, 150.0, 900.0)))
+
+            def session_update():
+                session.update(*next(amounts))
+                return session.rank(5)
+            run.bench(GROUP, "ranking_session_update", session_update, cards=count)
+
+            spend_matrix = np.array([[profile[key] for key in SPEND_KEYS] for profile in spend_profiles(profiles)])
+
+            def batch_top_k():
+                for _ in iter_top_cards(compiled, spend_matrix, SPEND_KEYS, 3):
+                    pass
+            run.bench(GROUP, "iter_top_cards", batch_top_k, ops=profiles, cards=count, profiles=profiles)
+
+            # Ranking plus response encoding, as /recommend/batch serves it
+            ids = list(range(profiles))
+
+            def batch_json():
+                for chunk in iter_batch_results(compiled, ids, spend_matrix, SPEND_KEYS, 3):
+                    "".join(json.dumps(result) + "\n" for result in chunk)
+            run.bench(GROUP, "batch_results_json", batch_json, ops=profiles, cards=count, profiles=profiles)
+            if ARROW_AVAILABLE:
+                def batch_arrow():
+                    schema, batches = iter_batch_record_batches(compiled, ids, spend_matrix, SPEND_KEYS, 3)
+                    for _ in iter_arrow_stream(schema, batches):
+                        pass
+                run.bench(GROUP, "batch_results_arrow", batch_arrow, ops=profiles, cards=count, profiles=profiles)
+
+            run.bench(GROUP, "build_rule_tables", lambda: RuleTables(snapshot), cards=count)
+            for top_k in (None, 3):
+                def evaluate():
+                    for category, amount in transactions:
+                        evaluate_all_cards(category, amount, top_k)
+                run.bench(
+                    GROUP, "evaluate_all_cards", evaluate,
+                    ops=len(transactions), cards=count, top_k=top_k or "all"
+                )
+
+            history = spend_profiles(12)
+            for months in (12, 36):
+                run.bench(
+                    GROUP, "simulate_savings",
+                    lambda: simulate_savings(compiled, history, months, SIMULATION_PATHS, 0.2, seed=0),
+                    cards=count, months=months, paths=SIMULATION_PATHS
+                )
+
+            def frontier():
+                CardObjectives.from_spend(compiled, next(spends)).rank()
+            run.bench(GROUP, "card_frontier", frontier, cards=count)
+            run.bench(GROUP, "spend_breakpoints", lambda: spend_breakpoints(compiled, next(spends)), cards=count)
+
+            for max_cards in (2, 3):
+                run.bench(
+                    GROUP, "optimize_wallet",
+                    lambda: optimize_wallet(compiled, next(spends), max_cards),
+                    cards=count, max_cards=max_cards
+                )
+    finally:
+        set_card_catalog(previous)
+
+
+def run_merchant_benchmarks(run: BenchmarkRun, data_dir: Path, rows: int) -> None:
+    """
+    Merchant index build and resolution for exact hits, statement
+    descriptors, misspellings, fallbacks and misses.
+    """
+    previous = get_merchant_index()
+    path = merchants_file(data_dir, rows)
+    raw = path.read_bytes()
+    index = MerchantIndex(path)
+    run.bench(GROUP, "build_merchant_index", lambda: index.build(raw, "bench"), merchants=rows)
+    table = index.build(raw, "bench")
+    run.bench(
+        GROUP, "build_trigram_index", lambda: TrigramIndex(list(table.entries)),
+        min_repeat=1, warmup=0, merchants=rows
+    )
+
+    rng = np.random.default_rng(0)
+    picks = [merchant_name(int(i))[0] for i in rng.integers(0, rows, LOOKUPS_PER_CALL)]
+    names = {
+        "hit": [name.upper() for name in picks],
+        "descriptor": [f"{name.upper()} #{1000 + i} SEATTLE WA" for i, name in enumerate(picks)],
+        # One letter dropped from the first word
+        "typo": [name[:2] + name[3:] for name in picks],
+        "fallback": [f"AMAZON MKTPLACE PMTS {i}" for i in range(LOOKUPS_PER_CALL)],
+        "miss": [f"Unknown Vendor {i} LLC" for i in range(LOOKUPS_PER_CALL)],
+    }
+    set_merchant_index(index)
+    try:
+        index.current()
+        for kind, batch in names.items():
+            def resolve():
+                for name in batch:
+                    resolve_merchant_to_category(name)
+            run.bench(GROUP, "resolve_merchant_to_category", resolve, ops=len(batch), merchants=rows, kind=kind)
+    finally:
+        set_merchant_index(previous)
+
+
+def run_ledger_benchmarks(run: BenchmarkRun, data_dir: Path, rows: int, merchant_rows: int) -> None:
+    """Ledger parsing and aggregation, per row."""
+    previous = get_merchant_index()
+    path = ledger_file(data_dir, rows, merchant_rows)
+    set_merchant_index(MerchantIndex(merchants_file(data_dir, merchant_rows)))
+    try:
+        def aggregate():
+            # Every run starts cold, as a fresh ingest would
+            resolve_category.cache_clear()
+            return aggregate_ledger_file(path)
+        run.bench(GROUP, "aggregate_ledger_file", aggregate, ops=rows, min_repeat=1, warmup=0, rows=rows)
+
+        def stream():
+            parser = LedgerStreamParser(LedgerAggregator(resolve_merchants=False))
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(STREAM_CHUNK_BYTES), b""):
+                    parser.feed(chunk)
+            parser.close()
+        run.bench(GROUP, "ledger_stream_parser", stream, ops=rows, min_repeat=1, warmup=0, rows=rows)
+
+        if ARROW_AVAILABLE:
+            import pyarrow.csv
+            import pyarrow.parquet
+
+            parquet_path = ensure_file(
+                data_dir, path.with_suffix(".parquet").name,
+                lambda target: pyarrow.parquet.write_table(pyarrow.csv.read_csv(path), target)
+            )
+
+            def aggregate_parquet():
+                resolve_category.cache_clear()
+                return aggregate_ledger_file(parquet_path)
+            run.bench(GROUP, "aggregate_ledger_parquet", aggregate_parquet, ops=rows, min_repeat=1, warmup=0, rows=rows)
+    finally:
+        set_merchant_index(previous)
@@ -0,0 +1,173 @@
+"""
+Deterministic synthetic data at benchmark scale.
+
+Files use the same formats as the bundled data (credit_cards.csv,
+merchant_categories.csv, user_spend_raw.csv) and are written row by row,
+so ledgers of tens of millions of rows never sit in memory. Generation is
+seeded: the same size and seed always produce the same file, which lets
+``ensure_file`` reuse earlier output.
+"""
+import csv
+import json
+import random
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from services.card_schema import CAP_PERIOD_MONTHS
+
+CATEGORIES = ['Groceries', 'Travel', 'Gas', 'Dining', 'Online Shopping', 'Drugstores', 'Entertainment']
+CATEGORY_MCC = {
+    'Groceries': '5411',
+    'Travel': '4511',
+    'Gas': '5542',
+    'Dining': '5812',
+    'Online Shopping': '5999',
+    'Drugstores': '5912',
+    'Entertainment': '7832',
+    'Other': '5311',
+}
+ISSUERS = ['Chase', 'American Express', 'Citi', 'Capital One', 'Discover', 'Wells Fargo', 'US Bank', 'Bank of America']
+MERCHANT_WORDS = {
+    'Groceries': ['Market', 'Foods', 'Grocery', 'Fresh', 'Supermarket'],
+    'Travel': ['Airlines', 'Air', 'Travel', 'Hotels', 'Rail'],
+    'Gas': ['Fuel', 'Gas', 'Petroleum', 'Station', 'Energy'],
+    'Dining': ['Grill', 'Kitchen', 'Pizza', 'Cafe', 'Burger'],
+    'Online Shopping': ['Online', 'Shop', 'Digital', 'Store', 'Direct'],
+    'Drugstores': ['Pharmacy', 'Drug', 'Health', 'Rx', 'Care'],
+    'Entertainment': ['Cinema', 'Theater', 'Games', 'Music', 'Arena'],
+    'Other': ['Goods', 'Supply', 'Services', 'Company', 'Outlet'],
+}
+MERCHANT_PREFIXES = ['Blue', 'Golden', 'North', 'Union', 'Metro', 'Sunset', 'Pioneer', 'Royal', 'Green', 'Summit']
+SPEND_KEYS = ['groceries', 'travel', 'gas', 'dining', 'online_shopping']
+CARD_CSV_HEADER = [
+    'card_name', 'issuer', 'base_reward', 'category_rewards', 'annual_fee',
+    'signup_bonus', 'signup_bonus_spend_requirement', 'category_caps', 'cap_periods'
+]
+
+
+def generate_cards(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate card dictionaries shaped like parsed credit_cards.csv rows.
+
+    Cards get 0-3 bonus categories, some of them capped (with a random cap
+    period), and a fee and signup bonus drawn from common real-world values.
+    """
+    rng = random.Random(seed)
+    cards = []
+    for i in range(count):
+        bonus_categories = rng.sample(CATEGORIES, rng.randint(0, 3))
+        category_rewards = {category: rng.choice([0.02, 0.03, 0.04, 0.05, 0.06]) for category in bonus_categories}
+        category_caps = {
+            category: float(rng.choice([500, 1500, 2000, 6000]))
+            for category in bonus_categories if rng.random() < 0.4
+        }
+        cap_periods = {category: rng.choice(list(CAP_PERIOD_MONTHS)) for category in category_caps}
+        annual_fee = rng.choice([0, 0, 0, 95, 250, 550])
+        cards.append({
+            'name': f"{rng.choice(ISSUERS)} Card {i}",
+            'issuer': ISSUERS[i % len(ISSUERS)],
+            'base_reward': rng.choice([0.01, 0.01, 0.015, 0.02]),
+            'category_rewards': category_rewards,
+            'annual_fee': float(annual_fee),
+            'signup_bonus': float(rng.choice([0, 150, 200, 750]) if annual_fee or rng.random() < 0.5 else 0),
+            'signup_bonus_spend_requirement': float(rng.choice([0, 500, 1000, 4000])),
+            'category_caps': category_caps,
+            'cap_periods': cap_periods,
+        })
+    return cards
+
+
+def write_cards_csv(path: Path, count: int, seed: int = 0) -> Path:
+    """Write ``count`` synthetic cards in credit_cards.csv format."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CARD_CSV_HEADER)
+        for card in generate_cards(count, seed):
+            writer.writerow([
+                card['name'], card['issuer'], card['base_reward'],
+                json.dumps(card['category_rewards']), card['annual_fee'], card['signup_bonus'],
+                card['signup_bonus_spend_requirement'], json.dumps(card['category_caps']),
+                json.dumps(card['cap_periods']),
+            ])
+    return Path(path)
+
+
+def merchant_name(i: int) -> Tuple[str, str]:
+    """The i-th synthetic merchant as (name, category); names are unique."""
+    categories = list(MERCHANT_WORDS)
+    category = categories[i % len(categories)]
+    words = MERCHANT_WORDS[category]
+    prefix = MERCHANT_PREFIXES[(i // len(categories)) % len(MERCHANT_PREFIXES)]
+    return f"{prefix} {words[(i // 7) % len(words)]} {i}", category
+
+
+def write_merchant_table(path: Path, rows: int, seed: int = 0) -> Path:
+    """Write ``rows`` synthetic merchants in merchant_categories.csv format."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['merchant', 'category', 'mcc_code'])
+        batch = []
+        for i in range(rows):
+            name, category = merchant_name(i)
+            batch.append((name, category, CATEGORY_MCC[category]))
+            if len(batch) >= 10_000:
+                writer.writerows(batch)
+                batch.clear()
+        writer.writerows(batch)
+    return Path(path)
+
+
+def iter_ledger_rows(rows: int, users: int = 1000, merchants: int = 100_000, seed: int = 0) -> Iterator[Tuple]:
+    """Yield (date, merchant, category, amount, user_id) ledger rows."""
+    rng = random.Random(seed)
+    for _ in range(rows):
+        name, category = merchant_name(rng.randrange(merchants))
+        yield (
+            f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            name,
+            category,
+            f"{rng.uniform(1, 300):.2f}",
+            f"user{rng.randrange(users)}",
+        )
+
+
+def write_ledger(path: Path, rows: int, users: int = 1000, merchants: int = 100_000, seed: int = 0) -> Path:
+    """Write a ``rows``-row transaction ledger in user_spend_raw.csv format plus user_id."""
+    with open(path, 'w', newline='', buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'merchant', 'category', 'amount', 'user_id'])
+        batch = []
+        for row in iter_ledger_rows(rows, users, merchants, seed):
+            batch.append(row)
+            if len(batch) >= 10_000:
+                writer.writerows(batch)
+                batch.clear()
+        writer.writerows(batch)
+    return Path(path)
+
+
+def spend_profiles(count: int, seed: int = 0) -> List[Dict[str, float]]:
+    """Generate /api/optimizer/recommend spend profiles with non-zero totals."""
+    rng = random.Random(seed)
+    profiles = []
+    for _ in range(count):
+        profile = {key: (round(rng.uniform(0, 2500), 2) if rng.random() < 0.8 else 0.0) for key in SPEND_KEYS}
+        if not any(profile.values()):
+            profile['groceries'] = 100.0
+        profiles.append(profile)
+    return profiles
+
+
+def ensure_file(directory: Path, name: str, writer: Callable[[Path], Any]) -> Path:
+    """
+    Return ``directory / name``, generating it with ``writer`` if missing.
+
+    Output is written to a temporary name first, so an interrupted run
+    never leaves a truncated file behind to be reused.
+    """
+    path = Path(directory) / name
+    if not path.exists():
+        partial = path.with_name(path.name + '.partial')
+        writer(partial)
+        partial.replace(path)
+    return path
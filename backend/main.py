@@ -2,8 +2,10 @@
 FastAPI backend for credit card optimization.
 Unified deployment: serves both API and frontend static files.
 """
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response, FileResponse
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, FileResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
@@ -14,31 +16,52 @@ import os
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT / "shared"))
 
+from services import metrics, startup
 from services.reward_optimizer import RewardOptimizer
 from services.ml_service import MLService
-from services.api_clients import fetch_mcc_info
+from services.micro_batcher import MicroBatcher
+from services.api_clients import get_mcc_client
+from services.card_catalog import get_card_catalog
+from services.compute import run_compute, shutdown_compute_executor
+from services.job_queue import shutdown_job_queue
+from services.merchant_resolver import get_merchant_index, resolve_merchant_to_category, resolve_merchants
+from services.response_cache import ResponseCache, cached_response, canonical_key, round_amount
 from api.optimizer import router as optimizer_router
+from api.jobs import router as jobs_router
 
 # Import shared types if available, otherwise use local types
 try:
     from shared.types.api import (
         RecommendationRequest,
         RecommendationResponse,
+        MerchantBulkRequest,
         MerchantInfoResponse,
-        Card
+        MerchantBulkResponse,
     )
 except ImportError:
     # Fallback: define minimal types locally
-    from pydantic import BaseModel
+    from pydantic import BaseModel, Field
     from typing import List, Optional, Dict, Any
     
     class RecommendationRequest(BaseModel):
         merchant: str
         amount: float
+        top_k: Optional[int] = Field(None, ge=1, description="Number of alternative cards to return (all if omitted)")
+    
+    class MerchantBulkRequest(BaseModel):
+        merchants: List[str] = Field(..., max_length=10000)
+    
+    class CardInfo(BaseModel):
+        card_name: str
+        reward_amount: float
+        reward_rate: float
     
     class RecommendationResponse(BaseModel):
         best_card: str
-        reward_amount: float
+        reward_value: float
+        merchant_category: str
+        mcc_code: Optional[str] = None
+        alternatives_ranked: List[CardInfo]
         confidence: float
         explanation: str
     
@@ -49,17 +72,38 @@ except ImportError:
         source: str = "unknown"
         mcc_details: Optional[Dict[str, Any]] = None
     
-    class Card(BaseModel):
-        name: str
-        issuer: str
-        annual_fee: float
-        base_reward: float
-        category_rewards: Dict[str, float]
+    class MerchantBulkResponse(BaseModel):
+        results: List[MerchantInfoResponse]
+        count: int
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create pooled clients and start the data file watchers on startup;
+    stop them, the job workers and the compute pool on shutdown.
+
+    Watched files are checked for changes in a worker thread, so handlers
+    read the in-memory catalog and merchant index without blocking I/O.
+    """
+    get_mcc_client()
+    watchers = [
+        asyncio.create_task(data_file.watch())
+        for data_file in (get_card_catalog(), get_merchant_index())
+    ]
+    yield
+    for watcher in watchers:
+        watcher.cancel()
+    await asyncio.gather(*watchers, return_exceptions=True)
+    await get_mcc_client().aclose()
+    await asyncio.to_thread(shutdown_job_queue)
+    await asyncio.to_thread(shutdown_compute_executor)
+
 
 app = FastAPI(
     title="Credit Card Optimizer",
     description="Unified credit card recommendation engine with frontend",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware - minimal since everything is same-origin
@@ -71,12 +115,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route request metrics and Server-Timing (see services.metrics)
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 # Include routers
 app.include_router(optimizer_router)
+app.include_router(jobs_router)
 
-# Initialize services
+# Initialize services (parse the card catalog and merchant index once at startup)
+with startup.phase("card catalog"):
+    get_card_catalog().snapshot()
+with startup.phase("merchant index"):
+    get_merchant_index().current()
 reward_optimizer = RewardOptimizer()
-ml_service = MLService()
+with startup.phase("ML models"):
+    ml_service = MLService()
+
+# Concurrent /recommend requests share one model call per micro-batch
+ml_batcher = MicroBatcher(
+    lambda items: ml_service.predict_batch(*zip(*items)),
+    max_batch_size=int(os.getenv("ML_BATCH_MAX_SIZE", 64)),
+    max_wait=float(os.getenv("ML_BATCH_MAX_WAIT_MS", 5)) / 1000
+)
+
+# Rendered /recommend responses by resolved merchant category and amount
+recommend_cache = ResponseCache("recommend")
 
 # Mount static files for frontend (must be before catch-all route)
 FRONTEND_DIST = Path(__file__).parent.parent / "frontend_dist"
@@ -92,14 +156,14 @@ if FRONTEND_DIST.exists():
         if static_file.exists():
             if static_file.is_file():
                 @app.get(f"/{static_path}")
-                def serve_static_file():
+                async def serve_static_file():
                     return FileResponse(str(static_file))
             else:
                 app.mount(f"/{static_path}", StaticFiles(directory=str(static_file)), name=static_path)
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint for Railway."""
     return {
         "status": "healthy",
@@ -109,7 +173,7 @@ def health_check():
 
 
 @app.get("/")
-def root():
+async def root():
     """Serve frontend index.html or API info."""
     index_path = FRONTEND_DIST / "index.html"
     if index_path.exists():
@@ -125,31 +189,37 @@ def root():
     }
 
 
+if metrics.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        """Prometheus scrape endpoint."""
+        return PlainTextResponse(metrics.render(), media_type=metrics.PROMETHEUS_CONTENT_TYPE)
+
+
 @app.get("/favicon.ico")
-def favicon():
+async def favicon():
     """Handle favicon requests."""
     return Response(status_code=204)
 
 
 @app.get("/cards")
-def get_cards():
-    """Get all available credit cards from CSV."""
-    from services.card_loader import load_cards_from_csv
-    cards = load_cards_from_csv()
+async def get_cards():
+    """Get all available credit cards from the in-memory catalog."""
+    cards = get_card_catalog().snapshot().cards
     return {"cards": cards, "count": len(cards)}
 
 
 @app.get("/merchant-info/{merchant_name}", response_model=MerchantInfoResponse)
-def get_merchant_info(merchant_name: str):
+async def get_merchant_info(merchant_name: str):
     """Get merchant information including category and MCC code."""
-    from services.merchant_resolver import resolve_merchant_to_category
+    with metrics.span("merchant_resolution"):
+        merchant_info = resolve_merchant_to_category(merchant_name)
     
-    merchant_info = resolve_merchant_to_category(merchant_name)
-    
-    # Fetch MCC details if available
+    # Fetch MCC details if available (cached, pooled, non-blocking)
     mcc_details = None
     if merchant_info.get("mcc_code"):
-        mcc_details = fetch_mcc_info(merchant_info["mcc_code"])
+        with metrics.span("mcc_fetch"):
+            mcc_details = await get_mcc_client().fetch(merchant_info["mcc_code"])
     
     return MerchantInfoResponse(
         merchant=merchant_name,
@@ -160,31 +230,80 @@ def get_merchant_info(merchant_name: str):
     )
 
 
+@app.post("/merchant-info/bulk", response_model=MerchantBulkResponse)
+async def get_merchant_info_bulk(request: MerchantBulkRequest):
+    """
+    Resolve many merchant names or statement descriptors in one call.
+
+    Results come back in request order with their source (e.g.
+    "fuzzy:0.86"); MCC details are not fetched. Up to 10000 names are
+    resolved in the compute pool, off the event loop.
+    """
+    with metrics.span("merchant_resolution"):
+        resolved = await run_compute(resolve_merchants, request.merchants)
+    
+    results = [
+        MerchantInfoResponse(
+            merchant=merchant_name,
+            category=merchant_info["category"],
+            mcc_code=merchant_info.get("mcc_code"),
+            source=merchant_info.get("source", "unknown")
+        )
+        for merchant_name, merchant_info in zip(request.merchants, resolved)
+    ]
+    return MerchantBulkResponse(results=results, count=len(results))
+
+
 @app.post("/recommend", response_model=RecommendationResponse)
-def recommend(request: RecommendationRequest):
-    """Recommend the best credit card for a transaction."""
+async def recommend(request: RecommendationRequest, http_request: Request):
+    """
+    Recommend the best credit card for a transaction.
+
+    The result depends on the merchant only through its resolved category
+    and MCC code, so responses are cached by those, the amount rounded to
+    cents, top_k and the catalog version, with an ETag for If-None-Match.
+    """
     try:
         # Get ML prediction if available
         ml_prediction = None
         confidence = 0.85
+        amount = round_amount(request.amount)
         
-        if ml_service.is_loaded():
-            from services.merchant_resolver import resolve_merchant_to_category
+        # Resolve the merchant once for both the ML model and the optimizer
+        with metrics.span("merchant_resolution"):
             merchant_info = resolve_merchant_to_category(request.merchant)
-            ml_prediction = ml_service.predict(
-                merchant_info["category"],
-                request.amount
-            )
+        
+        version = get_card_catalog().snapshot().version
+        cache_key = canonical_key({
+            "category": merchant_info["category"],
+            "mcc_code": merchant_info.get("mcc_code"),
+            "amount": amount,
+            "top_k": request.top_k,
+        })
+        entry = recommend_cache.get(cache_key, version)
+        if entry is not None:
+            return cached_response(http_request, entry, hit=True)
+        
+        if ml_service.is_loaded():
+            with metrics.span("ml_predict"):
+                ml_prediction = await ml_batcher.submit(
+                    (merchant_info["category"], amount)
+                )
         
         # Optimize rewards
-        result = reward_optimizer.optimize(
-            merchant=request.merchant,
-            amount=request.amount,
-            ml_prediction=ml_prediction,
-            confidence=confidence
-        )
+        with metrics.span("optimize"):
+            result = reward_optimizer.optimize(
+                merchant=request.merchant,
+                amount=amount,
+                ml_prediction=ml_prediction,
+                confidence=confidence,
+                merchant_info=merchant_info,
+                top_k=request.top_k
+            )
         
-        return RecommendationResponse(**result)
+        with metrics.span("serialize"):
+            body = RecommendationResponse(**result).model_dump_json().encode()
+        return cached_response(http_request, recommend_cache.put(cache_key, version, body), hit=False)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -192,7 +311,7 @@ def recommend(request: RecommendationRequest):
 
 # Catch-all route for frontend SPA routing (must be last)
 @app.get("/{full_path:path}")
-def serve_frontend(full_path: str):
+async def serve_frontend(full_path: str):
     """Serve frontend routes for SPA navigation."""
     # Don't serve API routes
     if full_path.startswith("api/") or full_path.startswith("_next/") or full_path in ["health", "favicon.ico"]:
@@ -0,0 +1,156 @@
+"""
+Pre-forking multi-worker launcher.
+
+    python serve.py --workers 4 --port 8000
+
+The parent process imports the app once, building everything workers
+read but never write, then forks the workers, which all accept
+connections on one shared listening socket. Workers start in
+milliseconds, and adding workers adds little memory:
+
+- The card catalog is a memory-mapped snapshot (services.card_schema),
+  so every process maps the same page-cache pages.
+- The merchant table, its trigram index and the rule tables are built in
+  the parent and inherited copy-on-write. ``gc.freeze()`` moves them out
+  of the collector's reach first, so collections in a worker never write
+  to (and so copy) their pages.
+- ML model arrays are memory-mapped from the model files (joblib
+  ``mmap_mode``).
+
+Each worker has its own event loop, HTTP clients, response caches and
+metrics. Data files are still hot-reloaded, but a reload builds a
+private copy in each worker; restart to share the new version again.
+
+Uvicorn's own ``--workers`` spawns fresh interpreters that re-import the
+app, so nothing is shared; use this launcher instead.
+
+``python serve.py --startup-report`` loads the app, times the first
+requests in-process and prints where startup time went, then exits.
+
+Configuration:
+    WEB_CONCURRENCY  default number of workers (default 1)
+    PORT             default port (default 8000)
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List
+
+import uvicorn
+
+from services import startup
+
+# Workers that exit sooner than this after starting are restarted with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+
+def preload():
+    """
+    Import the app and build the shared read-only state.
+
+    Returns:
+        The ASGI app
+    """
+    with startup.phase("import main"):
+        import main
+    from services.merchant_resolver import get_merchant_index
+    from services.rule_engine import get_rule_tables
+
+    with startup.phase("prebuild indexes"):
+        get_merchant_index().current().trigrams()
+        get_rule_tables()
+    return main.app
+
+
+class Supervisor:
+    """Forks workers onto a shared socket and restarts any that die."""
+
+    def __init__(self, config: uvicorn.Config, sock: socket.socket, workers: int):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.children: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                # Uvicorn installs its own handlers in the worker
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                uvicorn.Server(self.config).run(sockets=[self.sock])
+                status = 0
+            finally:
+                os._exit(status)
+        self.children[pid] = time.monotonic()
+
+    def stop(self, signum, frame) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+        print(f"Serving on {self.config.host}:{self.config.port} with {self.workers} workers "
+              f"(parent {os.getpid()}, workers {sorted(self.children)})")
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            print(f"Warning: worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn()
+        return 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python serve.py", description="Serve the API from pre-forked workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 1)),
+                        help="Worker processes (default: $WEB_CONCURRENCY or 1)")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="Print a startup time breakdown and exit instead of serving")
+    args = parser.parse_args(argv)
+
+    app = preload()
+    if args.startup_report:
+        startup.print_report(app)
+        return 0
+
+    config = uvicorn.Config(app, host=args.host, port=args.port, log_level=args.log_level)
+    if args.workers <= 1:
+        uvicorn.Server(config).run()
+        return 0
+
+    sock = config.bind_socket()
+    # Import the protocol and event-loop modules once, before forking
+    config.load()
+    # Everything allocated so far is shared with the workers; keep the
+    # cyclic GC from touching it so the pages stay shared
+    gc.collect()
+    gc.freeze()
+    return Supervisor(config, sock, args.workers).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
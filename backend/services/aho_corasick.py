@@ -0,0 +1,84 @@
+"""
+Aho-Corasick automaton for single-pass multi-pattern substring matching.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+
+class AhoCorasick:
+    """
+    Matches every pattern against a text in one pass over the text.
+
+    Patterns keep their insertion order as priority, so ``first_match``
+    returns the same pattern a loop of ``pattern in text`` checks would.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Lowest pattern index ending at each state, following fail links
+        self._best: List[Optional[int]] = [None]
+
+        for pattern in patterns:
+            self._add(pattern)
+        self._build_fail_links()
+
+    def _add(self, pattern: str) -> None:
+        if not pattern:
+            raise ValueError("Patterns must be non-empty")
+        index = len(self.patterns)
+        self.patterns.append(pattern)
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+            state = next_state
+        if self._best[state] is None:
+            self._best[state] = index
+
+    def _build_fail_links(self) -> None:
+        # Breadth-first so every fail target is finalized before its users
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            inherited = self._best[self._fail[state]]
+            if inherited is not None and (self._best[state] is None or inherited < self._best[state]):
+                self._best[state] = inherited
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                queue.append(next_state)
+
+    def _step(self, state: int, char: str) -> int:
+        while state and char not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(char, 0)
+
+    def first_match(self, text: str) -> Optional[str]:
+        """
+        Find the highest-priority pattern occurring anywhere in the text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            The earliest-inserted matching pattern, or None
+        """
+        best = None
+        state = 0
+        for char in text:
+            state = self._step(state, char)
+            found = self._best[state]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return self.patterns[best] if best is not None else None
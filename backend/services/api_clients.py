@@ -1,18 +1,273 @@
 """
 API clients for external data sources.
 """
-import requests
-from typing import Optional, Dict, Any
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 
+from services import metrics
+
+if TYPE_CHECKING:
+    import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_RESPONSES_DIR = BACKEND_DIR / "data" / "external_api_sample_responses"
+MCC_API_BASE_URL = os.getenv("MCC_API_BASE_URL", "https://mcc.codes/api/mcc")
+
+
+class TTLCache:
+    """LRU cache whose entries also expire after a per-entry TTL."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look up a key.
+
+        Returns:
+            Tuple of (found, value); expired entries count as missing
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value for ``ttl`` seconds, evicting the least recently used."""
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry (hit/miss counts are kept)."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing upstream for a cool-down period.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected for ``reset_timeout`` seconds. Then a single trial
+    call is let through (half-open); success closes the circuit, failure
+    re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Check whether a call may be made now."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class MCCClient:
+    """
+    Async MCC lookup client with pooling, caching and failure isolation.
+
+    - One pooled httpx.AsyncClient (keep-alive connections are reused)
+    - TTL + LRU cache keyed by MCC code, with shorter-lived negative
+      entries for codes the API does not know
+    - Concurrent lookups of the same code share a single request, which
+      keeps running when one of the callers is cancelled
+    - A circuit breaker skips the API while it keeps failing
+    - ``offline`` mode serves only cached/preloaded responses
+    """
+
+    def __init__(
+        self,
+        base_url: str = MCC_API_BASE_URL,
+        timeout: float = 5.0,
+        cache_size: int = 1024,
+        ttl: float = 24 * 3600,
+        negative_ttl: float = 300,
+        max_connections: int = 20,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        offline: bool = False
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_connections = max_connections
+        self.offline = offline
+        self.cache = TTLCache(cache_size)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        # Upstream requests being made, owned by the client rather than by
+        # whichever caller started them
+        self._in_flight: Dict[str, "asyncio.Task[Optional[Dict[str, Any]]]"] = {}
+        self._client: Optional["httpx.AsyncClient"] = None
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            # Imported on first use: most lookups are served from the cache
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+            )
+        return self._client
+
+    def preload(self, directory: Path = SAMPLE_RESPONSES_DIR) -> int:
+        """
+        Seed the cache from saved API responses (``mcc_<code>.json`` files).
+
+        Preloaded entries never expire, so offline mode can serve them.
+
+        Returns:
+            Number of responses loaded
+        """
+        loaded = 0
+        for path in sorted(Path(directory).glob("*.json")):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Warning: could not preload {path}: {e}")
+                continue
+            code = str(data.get("mcc") or path.stem.rsplit("_", 1)[-1])
+            self.cache.set(code, data, float("inf"))
+            loaded += 1
+        return loaded
+
+    async def fetch(self, mcc_code: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch MCC code information.
+
+        Args:
+            mcc_code: Four-digit merchant category code
+
+        Returns:
+            The API's JSON payload, or None if unknown or unavailable
+        """
+        found, value = self.cache.get(mcc_code)
+        if found:
+            return value
+        if self.offline:
+            return None
+
+        task = self._in_flight.get(mcc_code)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._request(mcc_code))
+            self._in_flight[mcc_code] = task
+            task.add_done_callback(lambda done: self._request_done(mcc_code, done))
+        # A cancelled caller stops waiting; the request carries on for the others
+        return await asyncio.shield(task)
+
+    def _request_done(self, mcc_code: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(mcc_code) is task:
+            del self._in_flight[mcc_code]
+        if not task.cancelled():
+            # Mark retrieved so a request nobody awaited does not log a warning
+            task.exception()
+
+    async def _request(self, mcc_code: str) -> Optional[Dict[str, Any]]:
+        if not self.breaker.allow():
+            return None
+        import httpx
+        try:
+            response = await self._get_client().get(f"{self.base_url}/{mcc_code}")
+        except httpx.HTTPError:
+            self.breaker.record_failure()
+            return None
 
-def fetch_mcc_info(mcc_code: str) -> Optional[Dict[str, Any]]:
-    """Fetch MCC code information from mcc.codes API."""
-    try:
-        url = f"https://mcc.codes/api/mcc/{mcc_code}"
-        response = requests.get(url, timeout=5)
         if response.status_code == 200:
-            return response.json()
-        return None
-    except requests.exceptions.RequestException:
+            try:
+                data = response.json()
+            except ValueError:
+                self.breaker.record_failure()
+                return None
+            self.breaker.record_success()
+            self.cache.set(mcc_code, data, self.ttl)
+            return data
+        if response.status_code == 404:
+            # Upstream is healthy; the code just does not exist
+            self.breaker.record_success()
+            self.cache.set(mcc_code, None, self.negative_ttl)
+            return None
+        self.breaker.record_failure()
         return None
 
+    async def aclose(self) -> None:
+        """Cancel in-flight requests and close pooled connections."""
+        for task in list(self._in_flight.values()):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_mcc_client: Optional[MCCClient] = None
+
+
+def get_mcc_client() -> MCCClient:
+    """Get the process-wide MCC client, preloaded from bundled samples."""
+    global _mcc_client
+    if _mcc_client is None:
+        _mcc_client = MCCClient(offline=os.getenv("MCC_OFFLINE", "").lower() in ("1", "true", "yes"))
+        _mcc_client.preload()
+    return _mcc_client
+
+
+def _mcc_cache_stats() -> Tuple[int, int]:
+    client = _mcc_client
+    return (client.cache.hits, client.cache.misses) if client is not None else (0, 0)
+
+
+metrics.register_cache("mcc", _mcc_cache_stats)
+
+
+async def fetch_mcc_info(mcc_code: str) -> Optional[Dict[str, Any]]:
+    """Fetch MCC code information from mcc.codes API."""
+    return await get_mcc_client().fetch(mcc_code)
@@ -0,0 +1,165 @@
+"""
+Process-wide in-memory card catalog with hot reload.
+
+The catalog compiles the card file once into the canonical array schema
+(services.card_schema) and serves an immutable snapshot to every request.
+A new snapshot is swapped in only when the file's mtime/size changes and
+its content hash differs (see ReloadableFile). The compiled arrays are
+cached in a memory-mapped binary snapshot next to the source file, so
+other processes skip parsing entirely.
+"""
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services import metrics
+from services.card_loader import CARDS_CSV_PATH, parse_cards_csv
+from services.card_schema import CompiledCatalog, read_snapshot, snapshot_path_for, write_snapshot
+from services.file_cache import DEFAULT_CHECK_INTERVAL, ReloadableFile
+
+
+class CatalogSnapshot:
+    """Immutable view of the card catalog at one file version."""
+
+    def __init__(self, compiled: CompiledCatalog, version: str):
+        self.compiled = compiled
+        self.version = version
+        self._derived: Dict[str, Any] = {}
+        self._derived_lock = threading.Lock()
+        self._name_index: Dict[str, int] = {}
+        issuer_index: Dict[str, List[int]] = {}
+        for i, (name, issuer) in enumerate(zip(compiled.names, compiled.issuers)):
+            self._name_index.setdefault(name, i)
+            issuer_index.setdefault(issuer, []).append(i)
+        self._issuer_index: Dict[str, Tuple[int, ...]] = {
+            issuer: tuple(indices) for issuer, indices in issuer_index.items()
+        }
+
+    @classmethod
+    def from_cards(cls, cards: List[Dict[str, Any]], version: str) -> "CatalogSnapshot":
+        """Build a snapshot from parsed card dictionaries."""
+        return cls(CompiledCatalog.from_cards(cards), version)
+
+    @property
+    def cards(self) -> List[Dict[str, Any]]:
+        """All cards in file order. Treat the dictionaries as read-only."""
+        return self.compiled.cards
+
+    @property
+    def issuers(self) -> List[str]:
+        """Distinct issuers in file order."""
+        return list(self._issuer_index)
+
+    def derived(self, key: str, builder: Callable[["CatalogSnapshot"], Any]) -> Any:
+        """
+        Get a structure derived from this snapshot, building it once.
+
+        Derived structures (lookup tables, caches) live and die with the
+        snapshot, so a catalog reload invalidates them automatically.
+
+        Args:
+            key: Name of the derived structure
+            builder: Function building the structure from the snapshot
+
+        Returns:
+            The cached structure
+        """
+        value = self._derived.get(key)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = builder(self)
+                    self._derived[key] = value
+        return value
+
+    def __len__(self) -> int:
+        return len(self.compiled)
+
+    def index_of(self, name: str) -> Optional[int]:
+        """Row of a card in the compiled arrays, by exact name."""
+        return self._name_index.get(name)
+
+    def get_card(self, name: str) -> Optional[Dict[str, Any]]:
+        """Look up a card by exact name."""
+        i = self._name_index.get(name)
+        return self.compiled.card(i) if i is not None else None
+
+    def get_cards_by_issuer(self, issuer: str) -> List[Dict[str, Any]]:
+        """Look up all cards from an issuer."""
+        return [self.compiled.card(i) for i in self._issuer_index.get(issuer, ())]
+
+
+class CardCatalog(ReloadableFile):
+    """Loads a card file once and hot-swaps snapshots when it changes."""
+
+    def __init__(
+        self,
+        path: Path = CARDS_CSV_PATH,
+        parser: Callable[[str], List[Dict[str, Any]]] = parse_cards_csv,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+        use_snapshot: bool = True
+    ):
+        """
+        Args:
+            path: Card source file
+            parser: Parses the source file's text into card dictionaries
+            check_interval: Seconds between checks for file changes
+            use_snapshot: Map/write the binary snapshot next to the source
+        """
+        super().__init__(path, check_interval)
+        self.parser = parser
+        self.use_snapshot = use_snapshot
+        self.snapshot_path = snapshot_path_for(self.path)
+
+    def build(self, raw: bytes, version: str) -> CatalogSnapshot:
+        compiled = read_snapshot(self.snapshot_path, version) if self.use_snapshot else None
+        if compiled is None:
+            compiled = CompiledCatalog.from_cards(self.parser(raw.decode('utf-8')))
+            if self.use_snapshot:
+                try:
+                    write_snapshot(compiled, self.snapshot_path, version)
+                except OSError as e:
+                    print(f"Warning: could not write {self.snapshot_path}: {e}")
+        return CatalogSnapshot(compiled, version)
+
+    def build_empty(self, version: str) -> CatalogSnapshot:
+        return CatalogSnapshot.from_cards([], version)
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Return the current snapshot, reloading if the file changed."""
+        return self.current()
+
+
+_catalog: Optional[CardCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_card_catalog() -> CardCatalog:
+    """Get the process-wide card catalog, creating it on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = CardCatalog()
+    return _catalog
+
+
+def set_card_catalog(catalog: CardCatalog) -> None:
+    """Replace the process-wide card catalog (used by tools and benchmarks)."""
+    global _catalog
+    with _catalog_lock:
+        _catalog = catalog
+
+
+def _catalog_size():
+    catalog = _catalog
+    if catalog is not None:
+        snapshot = catalog.current()
+        yield (snapshot.version,), len(snapshot)
+
+
+metrics.register_collector(
+    "card_catalog_cards", "Cards in the loaded catalog snapshot, by content version.",
+    ("version",), _catalog_size
+)
@@ -0,0 +1,216 @@
+"""
+Pareto frontier and weighted re-scoring of cards over several objectives.
+
+card_ranker orders cards by first-year value alone. Here every card is
+scored once per spend profile on four objectives: net annual rewards and
+first-year value (higher is better), annual fee and signup bonus spend
+requirement (lower is better). A card is Pareto-optimal when no other
+card is at least as good on every objective and better on one.
+
+The frontier is found with a sort-filter skyline: cards are sorted so
+that any card that dominates another comes before it, then filtered in
+blocks, each block against the frontier found so far and against itself,
+as vectorized comparisons. Cost grows with cards x frontier size rather
+than cards squared.
+
+Weighted scores are computed from the stored objective matrix, so trying
+other weights never recomputes rewards.
+"""
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from services.card_schema import CompiledCatalog
+from services.reward_engine import score_profiles
+
+# Objective -> direction (1 maximize, -1 minimize)
+OBJECTIVES = {
+    'net_annual_rewards': 1,
+    'first_year_value': 1,
+    'annual_fee': -1,
+    'signup_bonus_spend_requirement': -1,
+}
+# Weights reproducing card_ranker's order
+DEFAULT_WEIGHTS = {'first_year_value': 1.0}
+# Candidates compared per vectorized skyline step
+SKYLINE_BLOCK = 256
+
+
+def dominated(frontier: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """Mask of the candidate rows that some frontier row dominates."""
+    at_least = np.ones((len(frontier), len(candidates)), dtype=bool)
+    better = np.zeros_like(at_least)
+    for j in range(frontier.shape[1]):
+        column = frontier[:, j:j + 1]
+        at_least &= column >= candidates[:, j]
+        better |= column > candidates[:, j]
+    return (at_least & better).any(axis=0)
+
+
+def skyline(points: np.ndarray, block: int = SKYLINE_BLOCK) -> np.ndarray:
+    """
+    Find the rows of a matrix that no other row dominates.
+
+    Every column is maximized. Row p dominates row q when p >= q in every
+    column and p > q in at least one; identical rows never dominate each
+    other, so duplicates on the frontier are all kept.
+
+    Args:
+        points: Array of shape (rows, objectives)
+        block: Rows filtered per vectorized step
+
+    Returns:
+        Sorted indices of the non-dominated rows
+    """
+    n_rows = points.shape[0]
+    if n_rows == 0:
+        return np.empty(0, dtype=np.intp)
+    # Sum of per-column ranks (ties share a rank) is strictly larger for a
+    # dominating row, so rows accepted from earlier blocks are final. It
+    # also puts balanced rows, which dominate the most, first.
+    rank_sums = np.zeros(n_rows, dtype=np.int64)
+    for column in points.T:
+        rank_sums += np.searchsorted(np.sort(column), column)
+    order = np.argsort(-rank_sums, kind='stable')
+
+    frontier = np.empty((0, points.shape[1]))
+    kept = []
+    for start in range(0, n_rows, block):
+        indices = order[start:start + block]
+        candidates = points[indices]
+        # The earliest frontier rows eliminate most candidates; only the
+        # survivors are compared with the rest of the frontier
+        for part in (frontier[:SKYLINE_BLOCK // 8], frontier[SKYLINE_BLOCK // 8:]):
+            if len(part) and len(candidates):
+                survivors = ~dominated(part, candidates)
+                indices = indices[survivors]
+                candidates = candidates[survivors]
+        survivors = ~dominated(candidates, candidates)
+        kept.append(indices[survivors])
+        frontier = np.concatenate([frontier, candidates[survivors]])
+    return np.sort(np.concatenate(kept))
+
+
+def validate_weights(weights: Mapping[str, float]) -> Dict[str, float]:
+    """
+    Check objective weights: known objectives, non-negative, not all zero.
+
+    Raises:
+        ValueError: If any weight is invalid
+    """
+    unknown = set(weights) - set(OBJECTIVES)
+    if unknown:
+        raise ValueError(f"Unknown objectives {sorted(unknown)}; expected some of {list(OBJECTIVES)}")
+    if any(weight < 0 for weight in weights.values()):
+        raise ValueError("Objective weights must be non-negative")
+    if not any(weight > 0 for weight in weights.values()):
+        raise ValueError("At least one objective weight must be positive")
+    return {name: float(weight) for name, weight in weights.items()}
+
+
+class CardObjectives:
+    """Every card's objective values for one spend profile."""
+
+    def __init__(self, compiled: CompiledCatalog, values: np.ndarray, eligible: np.ndarray):
+        """
+        Args:
+            compiled: Compiled card catalog
+            values: (cards, len(OBJECTIVES)) objective values in OBJECTIVES order
+            eligible: Per-card signup bonus eligibility
+        """
+        self.compiled = compiled
+        self.values = values
+        self.eligible = eligible
+        self.directions = np.array(list(OBJECTIVES.values()), dtype=float)
+        # Oriented so that higher is better on every objective
+        self.oriented = values * self.directions
+        low = self.oriented.min(axis=0) if len(values) else np.zeros(len(OBJECTIVES))
+        spread = (self.oriented.max(axis=0) - low) if len(values) else np.ones(len(OBJECTIVES))
+        # An objective every card ties on adds 0 to every score
+        self.normalized = np.divide(
+            self.oriented - low, spread, out=np.zeros_like(self.oriented), where=spread > 0
+        )
+
+    @classmethod
+    def from_spend(cls, compiled: CompiledCatalog, spend: Dict[str, float]) -> "CardObjectives":
+        """Score every card on every objective for a monthly spend profile."""
+        keys = list(spend)
+        scores = score_profiles(compiled, np.array([[spend[key] for key in keys]], dtype=float), keys)
+        values = np.column_stack([
+            scores['net_annual_rewards'][0],
+            scores['first_year_value'][0],
+            compiled.annual_fees,
+            compiled.signup_requirements,
+        ])
+        return cls(compiled, values, scores['signup_bonus_eligible'][0])
+
+    def _columns(self, objectives: Optional[Sequence[str]]) -> List[int]:
+        names = list(OBJECTIVES)
+        if objectives is None:
+            return list(range(len(names)))
+        unknown = set(objectives) - set(names)
+        if unknown or not objectives:
+            raise ValueError(f"Objectives must be a non-empty subset of {names}")
+        return [names.index(name) for name in objectives]
+
+    def frontier(self, objectives: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Indices of the Pareto-optimal cards over some (default all) objectives."""
+        return skyline(self.oriented[:, self._columns(objectives)])
+
+    def scores(self, weights: Mapping[str, float]) -> np.ndarray:
+        """
+        Weighted score of every card.
+
+        Each objective is min-max normalized over the catalog to [0, 1]
+        (1 the best card), and the score is the weighted mean, so weights
+        are relative importances rather than unit conversions.
+        """
+        weights = validate_weights(weights)
+        vector = np.array([weights.get(name, 0.0) for name in OBJECTIVES])
+        return self.normalized @ (vector / vector.sum())
+
+    def rank(
+        self,
+        weights: Mapping[str, float] = DEFAULT_WEIGHTS,
+        objectives: Optional[Sequence[str]] = None,
+        frontier_only: bool = True,
+        top_k: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Rank cards by weighted score, flagging the Pareto-optimal ones.
+
+        Args:
+            weights: Objective -> non-negative weight
+            objectives: Objectives the frontier is taken over (default all)
+            frontier_only: Only return Pareto-optimal cards
+            top_k: Maximum number of cards to return
+
+        Returns:
+            Dictionary with the ranked ``cards``, ``frontier_size`` and
+            ``total_cards``
+        """
+        scores = self.scores(weights)
+        pareto = np.zeros(len(scores), dtype=bool)
+        pareto[self.frontier(objectives)] = True
+        candidates = np.flatnonzero(pareto) if frontier_only else np.arange(len(scores))
+        # Stable, so ties keep catalog order like card_ranker
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        if top_k is not None:
+            order = order[:top_k]
+
+        names = list(OBJECTIVES)
+        values = self.values.tolist()
+        cards = []
+        for i in order.tolist():
+            entry = {'card_name': self.compiled.names[i], 'issuer': self.compiled.issuers[i]}
+            entry.update(zip(names, values[i]))
+            entry['signup_bonus_eligible'] = bool(self.eligible[i])
+            entry['score'] = float(scores[i])
+            entry['pareto_optimal'] = bool(pareto[i])
+            cards.append(entry)
+        return {'cards': cards, 'frontier_size': int(pareto.sum()), 'total_cards': len(scores)}
+
+
+def brute_force_skyline(points: np.ndarray) -> np.ndarray:
+    """Reference skyline by comparing every pair of rows."""
+    return np.flatnonzero(~dominated(points, points))
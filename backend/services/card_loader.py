@@ -2,62 +2,96 @@
 Load credit card data from CSV file.
 """
 import csv
+import io
 import json
 from pathlib import Path
 from typing import List, Dict, Any
 
+from services.card_schema import CAP_PERIOD_MONTHS, DEFAULT_CAP_PERIOD
+
 BACKEND_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BACKEND_DIR / "data"
+CARDS_CSV_PATH = DATA_DIR / "credit_cards.csv"
+
+
+def _parse_json_field(value: str) -> Dict[str, Any]:
+    """Parse a JSON-encoded mapping column, tolerating single quotes."""
+    if not value:
+        return {}
+    try:
+        return json.loads(value.replace("'", '"'))
+    except json.JSONDecodeError:
+        return {}
+
+
+def _parse_cap_periods(value: str) -> Dict[str, str]:
+    """Parse the cap_periods column, replacing unknown periods with the default."""
+    periods = {}
+    for category, period in _parse_json_field(value).items():
+        period = str(period).lower()
+        if period not in CAP_PERIOD_MONTHS:
+            print(f"Warning: unknown cap period {period!r} for {category}, using {DEFAULT_CAP_PERIOD}")
+            period = DEFAULT_CAP_PERIOD
+        periods[category] = period
+    return periods
+
+
+def parse_card_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Convert a raw CSV row into a card dictionary.
+
+    Args:
+        row: Row from csv.DictReader
+
+    Returns:
+        Card dictionary with parsed reward structures
+    """
+    return {
+        'name': row['card_name'],
+        'issuer': row.get('issuer', 'Unknown'),
+        'base_reward': float(row.get('base_reward', 0.01)),
+        'category_rewards': _parse_json_field(row.get('category_rewards')),
+        'annual_fee': float(row.get('annual_fee', 0)),
+        'signup_bonus': float(row.get('signup_bonus', 0)),
+        'signup_bonus_spend_requirement': float(row.get('signup_bonus_spend_requirement', 0)),
+        'category_caps': _parse_json_field(row.get('category_caps')),
+        'cap_periods': _parse_cap_periods(row.get('cap_periods')),
+    }
+
+
+def parse_cards_csv(text: str) -> List[Dict[str, Any]]:
+    """
+    Parse credit cards from CSV text.
+
+    Args:
+        text: Contents of a credit card CSV file
+
+    Returns:
+        List of card dictionaries
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    return [parse_card_row(row) for row in reader]
 
 
 def load_cards_from_csv() -> List[Dict[str, Any]]:
     """
     Load credit cards from CSV file.
-    
+
+    Reads the file on every call; request handlers should use the
+    cached catalog from services.card_catalog instead.
+
     Returns:
         List of card dictionaries with parsed reward structures
     """
-    csv_path = DATA_DIR / "credit_cards.csv"
-    
+    csv_path = CARDS_CSV_PATH
+
     if not csv_path.exists():
         print(f"Warning: {csv_path} not found")
         return []
-    
-    cards = []
-    
+
     try:
         with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Parse category_rewards JSON string
-                category_rewards = {}
-                if row.get('category_rewards'):
-                    try:
-                        category_rewards = json.loads(row['category_rewards'].replace("'", '"'))
-                    except json.JSONDecodeError:
-                        pass
-                
-                # Parse category_caps JSON string
-                category_caps = {}
-                if row.get('category_caps'):
-                    try:
-                        category_caps = json.loads(row['category_caps'].replace("'", '"'))
-                    except json.JSONDecodeError:
-                        pass
-                
-                card = {
-                    'name': row['card_name'],
-                    'issuer': row.get('issuer', 'Unknown'),
-                    'base_reward': float(row.get('base_reward', 0.01)),
-                    'category_rewards': category_rewards,
-                    'annual_fee': float(row.get('annual_fee', 0)),
-                    'signup_bonus': float(row.get('signup_bonus', 0)),
-                    'signup_bonus_spend_requirement': float(row.get('signup_bonus_spend_requirement', 0)),
-                    'category_caps': category_caps,
-                }
-                cards.append(card)
-        
-        return cards
+            return parse_cards_csv(f.read())
     except Exception as e:
         print(f"Error loading cards from CSV: {e}")
         return []
@@ -65,7 +99,5 @@ def load_cards_from_csv() -> List[Dict[str, Any]]:
 
 def get_card_by_name(card_name: str) -> Dict[str, Any] | None:
     """Get a specific card by name."""
-    cards = load_cards_from_csv()
-    return next((c for c in cards if c['name'] == card_name), None)
-
-
+    from services.card_catalog import get_card_catalog
+    return get_card_catalog().snapshot().get_card(card_name)
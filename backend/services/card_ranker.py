@@ -1,13 +1,17 @@
 """
 Card ranking algorithm based on reward optimization.
 """
-from typing import List, Dict, Any
+import heapq
+from operator import itemgetter
+from typing import List, Dict, Any, Optional
+
 from services.reward_calculator import calculate_total_rewards, calculate_signup_bonus_value
 
 
 def rank_cards(
     cards: List[Dict[str, Any]],
-    spend: Dict[str, float]
+    spend: Dict[str, float],
+    top_k: Optional[int] = None
 ) -> List[Dict[str, Any]]:
     """
     Rank cards based on total reward value.
@@ -15,14 +19,15 @@ def rank_cards(
     Args:
         cards: List of card dictionaries
         spend: Dictionary of category -> monthly spend
+        top_k: Only return the best ``top_k`` cards, picked with a heap
+            so that result dictionaries are only built for those
     
     Returns:
         List of ranked cards with reward calculations
     """
     total_monthly_spend = sum(spend.values())
     
-    ranked_cards = []
-    
+    scored = []
     for card in cards:
         # Calculate rewards
         reward_data = calculate_total_rewards(card, spend)
@@ -30,6 +35,21 @@ def rank_cards(
         # Calculate signup bonus
         signup_bonus_data = calculate_signup_bonus_value(card, total_monthly_spend)
         
+        # Calculate total first-year value (including signup bonus)
+        first_year_value = reward_data['net_annual_rewards']
+        if signup_bonus_data['eligible']:
+            first_year_value += signup_bonus_data['value']
+        scored.append((round(first_year_value, 2), card, reward_data, signup_bonus_data))
+    
+    # Sort by first-year value (best overall value); nlargest keeps the
+    # order of a stable descending sort
+    if top_k is None:
+        scored.sort(key=itemgetter(0), reverse=True)
+    else:
+        scored = heapq.nlargest(top_k, scored, key=itemgetter(0))
+    
+    ranked_cards = []
+    for first_year_value, card, reward_data, signup_bonus_data in scored:
         # Determine category strengths (top 2 categories by reward rate)
         category_rewards = card.get('category_rewards', {})
         category_strengths = sorted(
@@ -39,11 +59,6 @@ def rank_cards(
         )[:2]
         strengths = [cat.lower() for cat, _ in category_strengths]
         
-        # Calculate total first-year value (including signup bonus)
-        first_year_value = reward_data['net_annual_rewards']
-        if signup_bonus_data['eligible']:
-            first_year_value += signup_bonus_data['value']
-        
         ranked_cards.append({
             'card_name': card['name'],
             'issuer': card.get('issuer', 'Unknown'),
@@ -54,15 +69,12 @@ def rank_cards(
             'signup_bonus_value': signup_bonus_data['value'] if signup_bonus_data['eligible'] else 0,
             'effective_annual_fee': reward_data['effective_annual_fee'],
             'overall_rate': reward_data['overall_rate'],
-            'first_year_value': round(first_year_value, 2),
+            'first_year_value': first_year_value,
             'category_breakdown': reward_data['category_breakdown'],
             'signup_bonus_eligible': signup_bonus_data['eligible'],
             'card_data': card,
         })
     
-    # Sort by first-year value (best overall value)
-    ranked_cards.sort(key=lambda x: x['first_year_value'], reverse=True)
-    
     return ranked_cards
 
 
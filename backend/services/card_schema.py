@@ -0,0 +1,386 @@
+"""
+Canonical compiled card schema and its binary snapshot format.
+
+Every service works from one representation of the card catalog: a
+CompiledCatalog of dense NumPy arrays (card x category rates, caps and
+cap periods, per-card base rate, fee and bonus vectors). Card dictionaries, as
+returned by the API, are materialized from the arrays on demand.
+
+The compiled arrays are written to a versioned binary snapshot next to
+the source CSV. Loading it memory-maps the file, so worker processes
+start without parsing anything and share the same physical pages.
+
+Build the snapshot ahead of time (e.g. in a Docker build step) with:
+    python -m services.card_schema
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SNAPSHOT_MAGIC = b"CCOSNAP\0"
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_ALIGNMENT = 64
+
+# Per-card vectors, in card dictionary field order
+CARD_VECTOR_FIELDS = {
+    'base_rates': ('base_reward', 0.01),
+    'annual_fees': ('annual_fee', 0),
+    'signup_bonuses': ('signup_bonus', 0),
+    'signup_requirements': ('signup_bonus_spend_requirement', 0),
+}
+SNAPSHOT_ARRAYS = tuple(CARD_VECTOR_FIELDS) + ('rates', 'caps', 'cap_months', 'reward_order')
+
+# Months per cap period: spend toward a cap accumulates over the period and
+# resets at the start of the next one; a lifetime cap never resets
+CAP_PERIOD_MONTHS = {'monthly': 1, 'quarterly': 3, 'annual': 12, 'lifetime': np.inf}
+CAP_PERIOD_NAMES = {months: name for name, months in CAP_PERIOD_MONTHS.items()}
+DEFAULT_CAP_PERIOD = 'monthly'
+
+
+class CompiledCatalog:
+    """
+    Dense array representation of a card catalog.
+
+    Attributes:
+        names, issuers: Per-card strings
+        categories: Sorted categories that any card rewards specially
+        base_rates, annual_fees, signup_bonuses, signup_requirements:
+            Per-card float vectors
+        rates: (cards, categories) reward rate, the base rate where a card
+            has no specific rate
+        caps: (cards, categories) cap, inf where uncapped or where the
+            card has no specific rate (caps only apply to specific rates)
+        cap_months: (cards, categories) months per cap period (see
+            CAP_PERIOD_MONTHS), 1 where uncapped
+        reward_order: (cards, categories) position of the category in the
+            card's category_rewards, -1 where it has no specific rate
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        issuers: List[str],
+        categories: List[str],
+        arrays: Dict[str, np.ndarray]
+    ):
+        self.names = names
+        self.issuers = issuers
+        self.categories = categories
+        self.category_index = {category: j for j, category in enumerate(categories)}
+        self.base_rates = arrays['base_rates']
+        self.annual_fees = arrays['annual_fees']
+        self.signup_bonuses = arrays['signup_bonuses']
+        self.signup_requirements = arrays['signup_requirements']
+        self.rates = arrays['rates']
+        self.caps = arrays['caps']
+        self.cap_months = arrays['cap_months']
+        self.reward_order = arrays['reward_order']
+        self.has_cap = np.isfinite(self.caps)
+        self._cards: Dict[int, Dict[str, Any]] = {}
+        self._strengths: Dict[int, List[str]] = {}
+
+    @classmethod
+    def from_cards(cls, cards: Sequence[Dict[str, Any]]) -> "CompiledCatalog":
+        """Compile parsed card dictionaries."""
+        categories = set()
+        for card in cards:
+            categories.update(card.get('category_rewards', {}))
+        categories = sorted(categories)
+        category_index = {category: j for j, category in enumerate(categories)}
+        n_cards, n_categories = len(cards), len(categories)
+
+        arrays = {
+            name: np.array([card.get(field, default) for card in cards], dtype=np.float64)
+            for name, (field, default) in CARD_VECTOR_FIELDS.items()
+        }
+        rates = np.repeat(arrays['base_rates'][:, None], n_categories, axis=1)
+        caps = np.full((n_cards, n_categories), np.inf)
+        cap_months = np.ones((n_cards, n_categories))
+        reward_order = np.full((n_cards, n_categories), -1, dtype=np.int16)
+        for i, card in enumerate(cards):
+            category_caps = card.get('category_caps', {})
+            cap_periods = card.get('cap_periods', {})
+            for position, (category, rate) in enumerate(card.get('category_rewards', {}).items()):
+                j = category_index[category]
+                rates[i, j] = rate
+                reward_order[i, j] = position
+                if category in category_caps:
+                    caps[i, j] = category_caps[category]
+                    cap_months[i, j] = CAP_PERIOD_MONTHS[cap_periods.get(category, DEFAULT_CAP_PERIOD)]
+        arrays.update(rates=rates, caps=caps, cap_months=cap_months, reward_order=reward_order)
+
+        # Card dictionaries are always re-materialized from the arrays, so a
+        # freshly parsed catalog and a mapped snapshot serve identical data
+        return cls(
+            [card['name'] for card in cards],
+            [card.get('issuer', 'Unknown') for card in cards],
+            categories,
+            arrays
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The arrays stored in a snapshot, by name."""
+        return {name: getattr(self, name) for name in SNAPSHOT_ARRAYS}
+
+    def category_columns(self, category: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get rate, cap and has-cap columns for a backend category.
+
+        Unknown categories fall back to every card's base rate.
+        """
+        j = self.category_index.get(category)
+        if j is None:
+            n_cards = len(self)
+            return self.base_rates, np.full(n_cards, np.inf), np.zeros(n_cards, dtype=bool)
+        return self.rates[:, j], self.caps[:, j], self.has_cap[:, j]
+
+    def category_periods(self, category: str) -> np.ndarray:
+        """Get the months-per-cap-period column for a backend category."""
+        j = self.category_index.get(category)
+        if j is None:
+            return np.ones(len(self))
+        return self.cap_months[:, j]
+
+    def horizon_rewards(self, category: str, amounts: np.ndarray, months: int) -> np.ndarray:
+        """
+        Compute every card's reward for spending the same amount in a
+        category every month for ``months`` months.
+
+        Capped cards are stepped month by month, tracking the spend counted
+        toward each cap since its period started, with one (rows x capped
+        cards) state array for all rows at once. The arithmetic mirrors
+        reward_calculator.calculate_period_rewards exactly.
+
+        Args:
+            category: Backend category
+            amounts: Array of shape (rows, 1) of non-negative monthly spend
+            months: Months in the horizon
+
+        Returns:
+            Array of shape (rows, cards) of total rewards over the horizon
+        """
+        rates, caps, has_cap = self.category_columns(category)
+        totals = amounts * rates * months
+        capped = np.flatnonzero(has_cap)
+        if len(capped) == 0:
+            return totals
+
+        rates, caps, periods = rates[capped], caps[capped], self.category_periods(category)[capped]
+        base_rates = self.base_rates[capped]
+        spent = np.zeros((amounts.shape[0], len(capped)))
+        stepped = np.zeros_like(spent)
+        for month in range(months):
+            spent[:, month % periods == 0] = 0
+            room = np.maximum(caps - spent, 0)
+            stepped += np.minimum(amounts, room) * rates + np.maximum(amounts - room, 0) * base_rates
+            spent += amounts
+        totals[:, capped] = stepped
+        return totals
+
+    def category_rewards(self, category: str, amount: float, months: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute every card's reward for spending ``amount`` in a category
+        every month for ``months`` months.
+
+        Returns:
+            Tuple of (reward_amounts, effective_rates), one entry per card
+        """
+        rates, _, has_cap = self.category_columns(category)
+        rewards = self.horizon_rewards(category, np.array([[amount]], dtype=np.float64), months)[0]
+        if has_cap.any():
+            effective_rates = np.where(has_cap, rewards / (amount * months) if amount > 0 else 0.0, rates)
+        else:
+            effective_rates = rates
+        return rewards, effective_rates
+
+    def _specific_categories(self, i: int) -> List[int]:
+        """Category columns with a specific rate for card i, in card order."""
+        columns = np.flatnonzero(self.reward_order[i] >= 0)
+        return sorted(columns.tolist(), key=lambda j: self.reward_order[i, j])
+
+    def card(self, i: int) -> Dict[str, Any]:
+        """Materialize card i as a dictionary (cached)."""
+        card = self._cards.get(i)
+        if card is None:
+            columns = self._specific_categories(i)
+            card = {
+                'name': self.names[i],
+                'issuer': self.issuers[i],
+                'base_reward': float(self.base_rates[i]),
+                'category_rewards': {self.categories[j]: float(self.rates[i, j]) for j in columns},
+                'annual_fee': float(self.annual_fees[i]),
+                'signup_bonus': float(self.signup_bonuses[i]),
+                'signup_bonus_spend_requirement': float(self.signup_requirements[i]),
+                'category_caps': {
+                    self.categories[j]: float(self.caps[i, j])
+                    for j in columns if self.has_cap[i, j]
+                },
+                'cap_periods': {
+                    self.categories[j]: CAP_PERIOD_NAMES[float(self.cap_months[i, j])]
+                    for j in columns if self.has_cap[i, j]
+                },
+            }
+            self._cards[i] = card
+        return card
+
+    @property
+    def cards(self) -> List[Dict[str, Any]]:
+        """All cards as dictionaries, in catalog order."""
+        return [self.card(i) for i in range(len(self))]
+
+    def category_strengths(self, i: int) -> List[str]:
+        """Top 2 categories by reward rate for card i, lowercased."""
+        strengths = self._strengths.get(i)
+        if strengths is None:
+            columns = self._specific_categories(i)
+            top = sorted(columns, key=lambda j: self.rates[i, j], reverse=True)[:2]
+            strengths = [self.categories[j].lower() for j in top]
+            self._strengths[i] = strengths
+        return strengths
+
+
+def _align(offset: int) -> int:
+    return (offset + SNAPSHOT_ALIGNMENT - 1) // SNAPSHOT_ALIGNMENT * SNAPSHOT_ALIGNMENT
+
+
+def write_snapshot(compiled: CompiledCatalog, path: Path, source_version: str) -> None:
+    """
+    Write a compiled catalog to a binary snapshot file atomically.
+
+    Layout: magic, uint32 format version, uint32 header length, JSON
+    header (strings and array offsets), then each array's raw bytes at a
+    64-byte aligned offset.
+
+    Args:
+        compiled: Catalog to write
+        path: Destination file
+        source_version: Content hash of the source file it was built from
+    """
+    path = Path(path)
+    arrays = {name: np.ascontiguousarray(array) for name, array in compiled.arrays().items()}
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        offset = _align(offset + array.nbytes)
+
+    header = json.dumps({
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'source_version': source_version,
+        'names': compiled.names,
+        'issuers': compiled.issuers,
+        'categories': compiled.categories,
+        'arrays': layout,
+    }).encode('utf-8')
+    prefix = (
+        SNAPSHOT_MAGIC
+        + SNAPSHOT_FORMAT_VERSION.to_bytes(4, 'little')
+        + len(header).to_bytes(4, 'little')
+        + header
+    )
+    data_start = _align(len(prefix))
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(prefix)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]['offset'])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+        # mkstemp creates the file 0600; workers running as other users map it too
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path: Path, source_version: Optional[str] = None) -> Optional[CompiledCatalog]:
+    """
+    Memory-map a binary snapshot.
+
+    Args:
+        path: Snapshot file
+        source_version: If given, only accept a snapshot built from this
+            source content hash
+
+    Returns:
+        The compiled catalog backed by read-only mapped arrays, or None if
+        the file is missing, unreadable, truncated or corrupt, from another
+        format version or stale
+    """
+    try:
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    except (OSError, ValueError):
+        return None
+    try:
+        return _decode_snapshot(buffer, source_version)
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Warning: ignoring unreadable snapshot {path}: {e}")
+        return None
+
+
+def _decode_snapshot(buffer: np.ndarray, source_version: Optional[str]) -> Optional[CompiledCatalog]:
+    # Raises ValueError, KeyError or TypeError on a truncated or corrupt file
+    raw = buffer[:16].tobytes()
+    if len(raw) < 16 or raw[:8] != SNAPSHOT_MAGIC:
+        return None
+    if int.from_bytes(raw[8:12], 'little') != SNAPSHOT_FORMAT_VERSION:
+        return None
+    header_length = int.from_bytes(raw[12:16], 'little')
+    if 16 + header_length > buffer.size:
+        raise ValueError("header extends past the end of the file")
+    header = json.loads(buffer[16:16 + header_length].tobytes())
+    if source_version is not None and header['source_version'] != source_version:
+        return None
+
+    data_start = _align(16 + header_length)
+    arrays = {}
+    for name in SNAPSHOT_ARRAYS:
+        spec = header['arrays'][name]
+        dtype = np.dtype(spec['dtype'])
+        shape = tuple(int(n) for n in spec['shape'])
+        count = int(np.prod(shape))
+        start = data_start + int(spec['offset'])
+        if min(shape, default=0) < 0 or start < data_start or start + count * dtype.itemsize > buffer.size:
+            raise ValueError(f"array {name} extends past the end of the file")
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=start).reshape(shape)
+
+    names, issuers, categories = header['names'], header['issuers'], header['categories']
+    n_cards, n_categories = len(names), len(categories)
+    if len(issuers) != n_cards or any(
+        arrays[name].shape[:1] != (n_cards,) for name in SNAPSHOT_ARRAYS
+    ) or any(
+        arrays[name].shape != (n_cards, n_categories) for name in ('rates', 'caps', 'cap_months', 'reward_order')
+    ):
+        raise ValueError("array shapes do not match the card and category lists")
+    return CompiledCatalog(names, issuers, categories, arrays)
+
+
+def snapshot_path_for(source: Path) -> Path:
+    """Snapshot file used for a given source file."""
+    source = Path(source)
+    return source.with_name(source.name + '.snapshot')
+
+
+if __name__ == "__main__":
+    import sys
+
+    from services.card_loader import CARDS_CSV_PATH, parse_cards_csv
+    from services.file_cache import content_version
+
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else CARDS_CSV_PATH
+    raw = source.read_bytes()
+    version = content_version(raw)
+    compiled = CompiledCatalog.from_cards(parse_cards_csv(raw.decode('utf-8')))
+    destination = snapshot_path_for(source)
+    write_snapshot(compiled, destination, version)
+    print(f"Wrote {len(compiled)} cards x {len(compiled.categories)} categories to {destination}")
@@ -0,0 +1,471 @@
+"""
+Arrow and Parquet input and output for bulk ranking and ledgers.
+
+Spend profiles and transaction ledgers can be read from Parquet or Arrow
+IPC (stream or file) instead of JSON and CSV:
+
+- Only the columns the ranker or aggregator needs are read; Parquet
+  skips the others on disk, Arrow buffers are viewed without copying.
+- Numeric spend columns go to the vectorized ranker as NumPy views of
+  the Arrow buffers; the only copy is into the profiles x categories
+  matrix.
+- Ledger rows are aggregated with Arrow group-by kernels per record
+  batch. Dates and merchants are dictionary-encoded first, so each
+  distinct value is parsed or resolved once.
+
+Batch ranking results are written as one record batch per ranking chunk,
+straight from the ranker's arrays (services.reward_engine.
+iter_top_card_arrays) without building a dictionary per card, so no
+JSON encoding is involved. Each row is a profile with its ``top_cards``
+as a list of structs, mirroring the JSON response.
+
+pyarrow is optional. Without it ARROW_AVAILABLE is False, and the
+functions here raise RuntimeError. It is imported on first use, so
+processes that never see Arrow or Parquet data do not load it.
+"""
+import importlib.util
+import io
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from services.card_schema import CompiledCatalog
+from services.ledger_ingest import DEFAULT_USER, LedgerAggregator, parse_month, resolve_category
+from services.reward_engine import iter_top_card_arrays
+
+# pyarrow, pyarrow.compute and pyarrow.parquet once _require_arrow has run
+pa = pc = pq = None
+
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_FILE_MEDIA_TYPE = "application/vnd.apache.arrow.file"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+MEDIA_TYPES = (ARROW_STREAM_MEDIA_TYPE, ARROW_FILE_MEDIA_TYPE, PARQUET_MEDIA_TYPE)
+SUFFIX_MEDIA_TYPES = {
+    ".parquet": PARQUET_MEDIA_TYPE,
+    ".arrows": ARROW_STREAM_MEDIA_TYPE,
+    ".arrow": ARROW_FILE_MEDIA_TYPE,
+    ".feather": ARROW_FILE_MEDIA_TYPE,
+}
+
+LEDGER_COLUMNS = ("date", "merchant", "category", "amount", "user_id")
+# Rows per record batch read from Parquet
+READ_BATCH_ROWS = 65_536
+NO_SPEND_ERROR = "Total spend must be greater than 0"
+
+Source = Union[bytes, str, Path]
+
+
+class InvalidColumnarData(ValueError):
+    """Raised when Arrow or Parquet input cannot be read at all."""
+
+
+def _require_arrow() -> None:
+    """Import pyarrow on first use."""
+    global pa, pc, pq
+    if pa is not None:
+        return
+    if not ARROW_AVAILABLE:
+        raise RuntimeError("Arrow and Parquet support requires pyarrow (pip install pyarrow)")
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.parquet
+
+    # pa last: other threads only use pc and pq once pa is set
+    pc, pq = pyarrow.compute, pyarrow.parquet
+    pa = pyarrow
+
+
+def columnar_media_type(header: str) -> Optional[str]:
+    """The Arrow or Parquet media type named in a Content-Type or Accept header, if any."""
+    header = header.lower()
+    return next((media_type for media_type in MEDIA_TYPES if media_type in header), None)
+
+
+def path_media_type(path: Path) -> Optional[str]:
+    """The Arrow or Parquet media type for a file suffix, if any."""
+    return SUFFIX_MEDIA_TYPES.get(Path(path).suffix.lower())
+
+
+def iter_column_batches(
+    source: Source,
+    media_type: str,
+    columns: Sequence[str]
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Read the wanted columns of Arrow or Parquet data batch by batch.
+
+    Column names are matched case-insensitively, like ledger CSV headers;
+    missing columns are left out.
+
+    Args:
+        source: Request body bytes or a file path
+        media_type: One of MEDIA_TYPES
+        columns: Lowercase names of the columns to read
+
+    Yields:
+        Tuples of (rows, lowercase column name -> Arrow array)
+    """
+    _require_arrow()
+    wanted = set(columns)
+    if isinstance(source, bytes):
+        source = pa.BufferReader(pa.py_buffer(source))
+    elif media_type != PARQUET_MEDIA_TYPE:
+        # Memory-mapped, so Arrow files are read without copying
+        source = pa.memory_map(str(source))
+    else:
+        source = str(source)
+
+    def project(names: Sequence[str]) -> List[str]:
+        selected = {}
+        for name in names:
+            selected.setdefault(name.strip().lower(), name)
+        return [name for key, name in selected.items() if key in wanted]
+
+    try:
+        if media_type == PARQUET_MEDIA_TYPE:
+            parquet_file = pq.ParquetFile(source)
+            names = project(parquet_file.schema_arrow.names)
+            batches = parquet_file.iter_batches(batch_size=READ_BATCH_ROWS, columns=names)
+        elif media_type == ARROW_FILE_MEDIA_TYPE:
+            reader = pa.ipc.open_file(source)
+            names = project(reader.schema.names)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        else:
+            reader = pa.ipc.open_stream(source)
+            names = project(reader.schema.names)
+            batches = iter(reader)
+        for batch in batches:
+            yield batch.num_rows, {name.strip().lower(): batch.column(name) for name in names}
+    except (pa.ArrowInvalid, OSError) as e:
+        raise InvalidColumnarData(f"Invalid {media_type} data: {e}") from None
+
+
+def _spend_column(array, key: str) -> np.ndarray:
+    """A numeric Arrow column as float64 NumPy, nulls as 0 (zero-copy when already float64)."""
+    if not (pa.types.is_integer(array.type) or pa.types.is_floating(array.type)
+            or pa.types.is_decimal(array.type)):
+        raise ValueError(f"Column '{key}' must be numeric, got {array.type}")
+    if array.type != pa.float64():
+        array = pc.cast(array, pa.float64())
+    if array.null_count:
+        array = array.fill_null(0.0)
+    return array.to_numpy(zero_copy_only=False)
+
+
+def read_spend_profiles(
+    source: Source,
+    media_type: str,
+    spend_keys: Sequence[str]
+) -> Tuple[List[Any], np.ndarray]:
+    """
+    Read spend profiles, one per row, from Arrow or Parquet data.
+
+    Args:
+        source: Request body bytes or a file path
+        media_type: One of MEDIA_TYPES
+        spend_keys: Spend category columns, in matrix column order;
+            missing ones count as 0. An ``id`` column is echoed back
+            (row numbers otherwise).
+
+    Returns:
+        Tuple of (ids, spend_matrix)
+
+    Raises:
+        InvalidColumnarData: If the data cannot be read
+        ValueError: If a spend column is not numeric or holds NaN or
+            infinite values
+    """
+    ids: List[Any] = []
+    blocks = []
+    for rows, columns in iter_column_batches(source, media_type, ["id", *spend_keys]):
+        block = np.zeros((rows, len(spend_keys)))
+        for j, key in enumerate(spend_keys):
+            if key in columns:
+                block[:, j] = _spend_column(columns[key], key)
+                if not np.isfinite(block[:, j]).all():
+                    raise ValueError(f"Column '{key}' must only hold finite numbers")
+        ids.extend(columns["id"].to_pylist() if "id" in columns else range(len(ids), len(ids) + rows))
+        blocks.append(block)
+    spend_matrix = np.concatenate(blocks) if blocks else np.zeros((0, len(spend_keys)))
+    return ids, spend_matrix
+
+
+class BatchResultEncoder:
+    """Encodes batch ranking chunks as Arrow record batches with one schema."""
+
+    CARD_FIELDS = (
+        "first_year_value",
+        "net_annual_rewards",
+        "estimated_monthly_rewards",
+        "estimated_annual_rewards",
+    )
+
+    def __init__(self, compiled: CompiledCatalog, ids: Sequence[Any]):
+        """
+        Args:
+            compiled: Compiled card catalog the results index into
+            ids: Profile ids, in profile order
+        """
+        _require_arrow()
+        try:
+            self.ids = pa.array(ids)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed id types (say ints and strings from JSON) become strings
+            self.ids = pa.array([None if value is None else str(value) for value in ids], pa.string())
+        if pa.types.is_null(self.ids.type):
+            self.ids = self.ids.cast(pa.string())
+
+        # Card names and issuers are dictionary-encoded against the catalog
+        self.names = pa.array(compiled.names, pa.string())
+        issuers = list(dict.fromkeys(compiled.issuers))
+        self.issuers = pa.array(issuers, pa.string())
+        codes = {issuer: code for code, issuer in enumerate(issuers)}
+        self.issuer_codes = np.array([codes[issuer] for issuer in compiled.issuers], dtype=np.int32)
+
+        text = pa.dictionary(pa.int32(), pa.string())
+        self.card_type = pa.struct(
+            [("card_name", text), ("issuer", text)]
+            + [(name, pa.float64()) for name in self.CARD_FIELDS]
+            + [("signup_bonus_eligible", pa.bool_())]
+        )
+        self.schema = pa.schema([
+            ("id", self.ids.type),
+            ("total_monthly_spend", pa.float64()),
+            ("top_cards", pa.list_(self.card_type)),
+            ("error", pa.string()),
+        ])
+
+    def record_batch(self, start: int, arrays: Dict[str, np.ndarray]) -> "pa.RecordBatch":
+        """
+        Encode one chunk from iter_top_card_arrays.
+
+        Args:
+            start: Index of the chunk's first profile
+            arrays: The chunk's arrays
+
+        Returns:
+            Record batch with one row per profile
+        """
+        totals = arrays["total_monthly_spend"]
+        rows, k = arrays["card"].shape
+        has_spend = totals > 0
+        # Profiles without spend get no cards, like iter_batch_results
+        offsets = np.zeros(rows + 1, dtype=np.int32)
+        np.cumsum(np.where(has_spend, k, 0), out=offsets[1:])
+        keep = np.repeat(has_spend, k)
+
+        def flat(name: str) -> np.ndarray:
+            return arrays[name].reshape(-1)[keep]
+
+        cards = flat("card").astype(np.int32)
+        top_cards = pa.StructArray.from_arrays(
+            [
+                pa.DictionaryArray.from_arrays(cards, self.names),
+                pa.DictionaryArray.from_arrays(self.issuer_codes[cards], self.issuers),
+            ]
+            + [pa.array(flat(name), pa.float64()) for name in self.CARD_FIELDS]
+            + [pa.array(flat("signup_bonus_eligible"), pa.bool_())],
+            fields=list(self.card_type),
+        )
+        errors = pc.if_else(pa.array(has_spend), pa.scalar(None, pa.string()), NO_SPEND_ERROR)
+        return pa.RecordBatch.from_arrays(
+            [
+                self.ids.slice(start, rows),
+                pa.array(totals, pa.float64()),
+                pa.ListArray.from_arrays(pa.array(offsets), top_cards),
+                errors,
+            ],
+            schema=self.schema,
+        )
+
+
+def iter_batch_record_batches(
+    compiled: CompiledCatalog,
+    ids: Sequence[Any],
+    spend_matrix: np.ndarray,
+    spend_keys: Sequence[str],
+    top_k: int = 3,
+    chunk_size: Optional[int] = None
+) -> Tuple["pa.Schema", Iterator["pa.RecordBatch"]]:
+    """
+    Batch ranking results as Arrow record batches, one per ranking chunk.
+
+    Arguments are those of reward_engine.iter_batch_results.
+
+    Returns:
+        Tuple of (schema, iterator of record batches); ranking happens
+        as the iterator is consumed
+    """
+    encoder = BatchResultEncoder(compiled, ids)
+
+    def batches():
+        start = 0
+        for arrays in iter_top_card_arrays(compiled, spend_matrix, spend_keys, top_k, chunk_size):
+            yield encoder.record_batch(start, arrays)
+            start += len(arrays["total_monthly_spend"])
+
+    return encoder.schema, batches()
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def iter_arrow_stream(schema: "pa.Schema", batches: Iterable["pa.RecordBatch"]) -> Iterator[bytes]:
+    """
+    Encode record batches as an Arrow IPC stream, yielding bytes per batch.
+
+    The first piece holds the schema, the last the end-of-stream marker.
+    """
+    _require_arrow()
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def write_columnar(
+    target: Union[io.IOBase, str, Path],
+    media_type: str,
+    schema: "pa.Schema",
+    batches: Iterable["pa.RecordBatch"]
+) -> None:
+    """
+    Write record batches as Parquet or Arrow IPC (stream or file).
+
+    Args:
+        target: Binary file object or path
+        media_type: One of MEDIA_TYPES
+        schema: Schema of every batch
+        batches: Record batches to write
+    """
+    _require_arrow()
+    if isinstance(target, Path):
+        target = str(target)
+    if media_type == PARQUET_MEDIA_TYPE:
+        writer = pq.ParquetWriter(target, schema)
+    elif media_type == ARROW_FILE_MEDIA_TYPE:
+        writer = pa.ipc.new_file(target, schema)
+    else:
+        writer = pa.ipc.new_stream(target, schema)
+    with writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+
+def to_parquet_bytes(schema: "pa.Schema", batches: Iterable["pa.RecordBatch"]) -> bytes:
+    """Write record batches to an in-memory Parquet file."""
+    sink = io.BytesIO()
+    write_columnar(sink, PARQUET_MEDIA_TYPE, schema, batches)
+    return sink.getvalue()
+
+
+# Ledgers
+
+def _text_column(array, rows: int):
+    """A column as trimmed strings with empty values as nulls."""
+    if array is None:
+        return pa.nulls(rows, pa.string())
+    if not pa.types.is_string(array.type):
+        array = pc.cast(array, pa.string())
+    array = pc.utf8_trim_whitespace(array)
+    return pc.if_else(pc.greater(pc.utf8_length(array), 0), array, pa.scalar(None, pa.string()))
+
+
+def _map_distinct(array, fn) -> "pa.Array":
+    """Apply ``fn`` to each distinct non-null string once, as a string column."""
+    encoded = array.dictionary_encode()
+    mapped = pa.array([fn(value) for value in encoded.dictionary.to_pylist()], pa.string())
+    return mapped.take(encoded.indices)
+
+
+def _parse_amount(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _ledger_amounts(array, rows: int):
+    if array is None:
+        return pa.nulls(rows, pa.float64())
+    if pa.types.is_integer(array.type) or pa.types.is_floating(array.type) or pa.types.is_decimal(array.type):
+        return pc.cast(array, pa.float64())
+    array = _text_column(array, rows)
+    try:
+        return pc.cast(array, pa.float64())
+    except pa.ArrowInvalid:
+        # Some values are not numbers; those rows are skipped like CSV rows
+        return pa.array([_parse_amount(value) for value in array.to_pylist()], pa.float64())
+
+
+def _ledger_months(array, rows: int):
+    if array is not None and (pa.types.is_temporal(array.type) and not pa.types.is_duration(array.type)
+                              and not pa.types.is_time(array.type)):
+        return pc.strftime(array, format="%Y-%m")
+    return _map_distinct(_text_column(array, rows), lambda value: parse_month(value or ""))
+
+
+def add_ledger_batch(aggregator: LedgerAggregator, rows: int, columns: Dict[str, Any]) -> None:
+    """
+    Aggregate one record batch of ledger rows.
+
+    Rows are categorized and counted exactly like LedgerAggregator.add_row
+    (amounts that are not numbers and dates without a month are skipped),
+    then summed per user, month and category with one group-by.
+
+    Args:
+        aggregator: Aggregator to add the rows to
+        rows: Rows in the batch
+        columns: Lowercase name -> Arrow array, some of LEDGER_COLUMNS
+    """
+    _require_arrow()
+    amounts = _ledger_amounts(columns.get("amount"), rows)
+    months = _ledger_months(columns.get("date"), rows)
+    fallback = pc.fill_null(_text_column(columns.get("category"), rows), "Other")
+    if aggregator.resolve_merchants and "merchant" in columns:
+        resolved = _map_distinct(
+            _text_column(columns["merchant"], rows),
+            lambda merchant: resolve_category(merchant) if merchant else None
+        )
+        categories = pc.coalesce(resolved, fallback)
+    else:
+        categories = fallback
+    users = pc.fill_null(_text_column(columns.get("user_id"), rows), DEFAULT_USER)
+
+    valid = pc.and_(pc.is_valid(amounts), pc.is_valid(months))
+    table = pa.table({"user": users, "month": months, "category": categories, "amount": amounts}).filter(valid)
+    grouped = table.group_by(["user", "month", "category"]).aggregate([("amount", "sum")])
+    for user, month, category, total in zip(
+        grouped["user"].to_pylist(), grouped["month"].to_pylist(),
+        grouped["category"].to_pylist(), grouped["amount_sum"].to_pylist()
+    ):
+        by_category = aggregator.totals.setdefault(user, {}).setdefault(month, {})
+        by_category[category] = by_category.get(category, 0.0) + total
+    aggregator.rows += table.num_rows
+    aggregator.skipped += rows - table.num_rows
+
+
+def add_ledger(aggregator: LedgerAggregator, source: Source, media_type: str) -> LedgerAggregator:
+    """
+    Aggregate an Arrow or Parquet ledger, reading only LEDGER_COLUMNS.
+
+    Args:
+        aggregator: Aggregator to add the rows to
+        source: Request body bytes or a file path
+        media_type: One of MEDIA_TYPES
+
+    Returns:
+        The aggregator
+    """
+    for rows, columns in iter_column_batches(source, media_type, LEDGER_COLUMNS):
+        add_ledger_batch(aggregator, rows, columns)
+    return aggregator
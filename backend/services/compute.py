@@ -0,0 +1,77 @@
+"""
+Explicit executor boundary for long-running compute in async handlers.
+
+Request handlers are ``async def`` and run cheap in-memory compute inline
+on the event loop. Work that can take tens of milliseconds or more
+(wallet search, simulation, skylines, bulk merchant resolution) is handed
+to a dedicated thread pool with ``await run_compute(fn, ...)`` instead,
+so it never stalls the loop and never competes with Starlette's shared
+threadpool. NumPy releases the GIL in large array operations, so these
+threads overlap usefully.
+
+The pool is created on first use, never at import, so pre-forked workers
+(serve.py) each start their own rather than inheriting a dead one.
+
+Configuration:
+    COMPUTE_WORKERS  threads in the compute pool (default: CPU count, max 8)
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from services import metrics
+
+COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", min(8, os.cpu_count() or 1)))
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_in_flight = 0
+
+
+def get_compute_executor() -> ThreadPoolExecutor:
+    """Get the process-wide compute pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=COMPUTE_WORKERS, thread_name_prefix="compute")
+    return _executor
+
+
+def shutdown_compute_executor() -> None:
+    """Stop the compute pool once its queued work is done."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+async def run_compute(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run ``fn(*args, **kwargs)`` in the compute pool and await its result.
+
+    Timing spans opened inside ``fn`` still reach the request's metrics,
+    since the call runs in a copy of the caller's context.
+    """
+    global _in_flight
+    loop = asyncio.get_running_loop()
+    call = functools.partial(fn, *args, **kwargs)
+    context = contextvars.copy_context()
+    _in_flight += 1
+    try:
+        return await loop.run_in_executor(get_compute_executor(), context.run, call)
+    finally:
+        _in_flight -= 1
+
+
+metrics.register_collector(
+    "compute_tasks_in_flight", "Calls queued or running in the compute pool.",
+    (), lambda: [((), _in_flight)]
+)
@@ -0,0 +1,118 @@
+"""
+Base class for data files that are parsed once and hot-reloaded.
+"""
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+DEFAULT_CHECK_INTERVAL = 1.0
+
+
+def content_version(raw: bytes) -> str:
+    """Short content hash identifying one version of a file."""
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+class ReloadableFile:
+    """
+    Parses a data file once and swaps in a new parsed value when it changes.
+
+    The file is re-checked at most once per ``check_interval`` seconds. It is
+    only re-read when its mtime or size changes, and only re-parsed when the
+    content hash differs from the loaded version. Subclasses implement
+    ``build`` (and optionally ``build_empty``) to turn file bytes into an
+    immutable value.
+
+    By default the check happens inline in ``current``. In the server,
+    ``watch`` runs the checks (and any re-read and re-parse) in a worker
+    thread instead, and ``current`` only returns the loaded value, so
+    request handlers on the event loop never touch the file system.
+    """
+
+    def __init__(self, path: Path, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._value: Any = None
+        self._version: Optional[str] = None
+        self._stat_key: Optional[Tuple[int, int]] = None
+        self._last_check = 0.0
+        self.watched = False
+
+    def build(self, raw: bytes, version: str) -> Any:
+        """Build the parsed value from raw file contents."""
+        raise NotImplementedError
+
+    def build_empty(self, version: str) -> Any:
+        """Build the value used when the file is missing or unreadable."""
+        return None
+
+    @property
+    def version(self) -> Optional[str]:
+        """Content hash of the loaded file, or a marker if it is missing."""
+        return self._version
+
+    def current(self) -> Any:
+        """Return the current value, reloading if the file changed."""
+        if self._version is not None and (self.watched or time.monotonic() - self._last_check < self.check_interval):
+            return self._value
+        return self.reload()
+
+    async def watch(self) -> None:
+        """
+        Check the file every ``check_interval`` seconds in a worker thread
+        until cancelled. While this runs, ``current`` never checks inline.
+        """
+        self.watched = True
+        try:
+            while True:
+                await asyncio.sleep(self.check_interval)
+                await asyncio.to_thread(self.reload)
+        finally:
+            self.watched = False
+
+    def reload(self, force: bool = False) -> Any:
+        """
+        Check the backing file and swap in a new value if it changed.
+
+        Args:
+            force: Re-read the file even if its mtime and size are unchanged
+
+        Returns:
+            The current value
+        """
+        with self._lock:
+            self._last_check = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                if self._version != "missing":
+                    print(f"Warning: {self.path} not found")
+                    self._set("missing", self.build_empty("missing"))
+                    self._stat_key = None
+                return self._value
+
+            stat_key = (stat.st_mtime_ns, stat.st_size)
+            if not force and self._version is not None and stat_key == self._stat_key:
+                return self._value
+
+            try:
+                with open(self.path, 'rb') as f:
+                    raw = f.read()
+                version = content_version(raw)
+                if version != self._version:
+                    self._set(version, self.build(raw, version))
+                self._stat_key = stat_key
+            except Exception as e:
+                print(f"Error loading {self.path}: {e}")
+                if self._version is None:
+                    self._set("error", self.build_empty("error"))
+            return self._value
+
+    def _set(self, version: str, value: Any) -> None:
+        self._value = value
+        self._version = version
@@ -0,0 +1,206 @@
+"""
+Fuzzy merchant matching over a trigram inverted index.
+
+Card statements rarely carry a clean merchant name: descriptors look like
+"CHIPOTLE 1234 SEATTLE WA", "SQ *BLUE BOTTLE" or "AMZN Mktp US". Names and
+descriptors are cleaned the same way (``clean_descriptor``) and split into
+byte trigrams. A candidate's score is the best Dice coefficient between its
+trigrams and those of any leading-token prefix of the descriptor, so store
+numbers and locations after the name cost nothing:
+
+    "chipotle 1234 seattle wa" -> prefix "chipotle" scores 1.0
+
+Candidates are retrieved with prefix filtering: to reach the threshold a
+name has to share at least ``m`` of the prefix's ``g`` trigrams, so it must
+appear in the postings of the ``g - m + 1`` rarest ones. Only those short
+posting lists are read; every other trigram is checked by binary search
+against the candidates alone, and a length filter skips names too long
+or too short to reach the threshold. Names of fewer than
+``MIN_FUZZY_GRAMS`` trigrams (about six characters or less) are never
+fuzzy matches: "shell" scores 0.73 against "shells" and "target" 0.75
+against "targeted", so a score cannot tell a short name's typo from a
+different word. Callers match those names as whole tokens instead
+(merchant_resolver). The index is a handful of numpy
+arrays, so a million-name table stays compact; a lookup costs tens of
+microseconds unless thousands of names share the descriptor's rarest
+trigrams (numbered branches of one chain, say), when every one of them
+is scored.
+"""
+import math
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.7
+# Leading descriptor tokens considered as merchant-name prefixes
+MAX_PREFIX_TOKENS = 6
+# Rare trigrams a candidate must share with a descriptor prefix; higher
+# values read more postings but score fewer candidates
+SIGNATURE_HITS = 2
+# Longer names are truncated before indexing
+MAX_NAME_BYTES = 64
+# Names with fewer trigrams (one per character, for ASCII) only match exactly
+MIN_FUZZY_GRAMS = 7
+
+# Payment processor prefixes: "SQ *", "TST* ", "PAYPAL *", ...
+_PROCESSOR_PREFIX_RE = re.compile(r'^\s*(SQ|TST|PAYPAL|PP|SP|DD|IN|PY)\s*\*\s*', flags=re.IGNORECASE)
+# Dropped so "McDonald's" / "MCDONALDS" and "Wal-Mart" / "WALMART" agree
+_JOINING_RE = re.compile(r"['’-]")
+_SEPARATOR_RE = re.compile(r'[^\w]+')
+
+
+def clean_descriptor(text: str) -> str:
+    """Lowercase a merchant name or descriptor and reduce it to plain tokens."""
+    text = _PROCESSOR_PREFIX_RE.sub('', text)
+    text = _JOINING_RE.sub('', text.lower())
+    return ' '.join(_SEPARATOR_RE.sub(' ', text).split())
+
+
+def _trigram_codes(padded: bytes) -> np.ndarray:
+    data = np.frombuffer(padded, dtype=np.uint8).astype(np.int64)
+    return (data[:-2] << 16) | (data[1:-1] << 8) | data[2:]
+
+
+def _sorted_unique(values: np.ndarray) -> np.ndarray:
+    values = np.sort(values)
+    if len(values) == 0:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+class TrigramIndex:
+    """
+    Inverted index from byte trigrams to the names containing them.
+
+    Names are numbered internally in order of trigram count, so every
+    posting list is sorted by name length as well as by id and the names a
+    length filter admits form one contiguous id range.
+    """
+
+    def __init__(self, names: Sequence[str]):
+        """
+        Args:
+            names: Cleaned names (see ``clean_descriptor``); search results
+                refer to them by position
+        """
+        self.size = len(names)
+        encoded = [(' ' + name + ' ').encode('utf-8')[:MAX_NAME_BYTES] for name in names]
+        lengths = np.fromiter((len(name) for name in encoded), dtype=np.int64, count=len(encoded))
+        ends = np.cumsum(lengths)
+
+        codes = _trigram_codes(b''.join(encoded))
+        rows = np.repeat(np.arange(len(encoded), dtype=np.int64), lengths)[:len(codes)]
+        # Drop trigrams spanning two names, then repeats within a name
+        valid = np.arange(len(codes)) + 3 <= ends[rows]
+        pairs = _sorted_unique((rows[valid] << 24) | codes[valid])
+        rows = pairs >> 24
+        codes = pairs & 0xFFFFFF
+
+        grams = np.bincount(rows, minlength=self.size)
+        # Internal id -> position in `names`, shortest names first
+        self._positions = np.lexsort((np.arange(self.size), grams)).astype(np.int32)
+        ids = np.empty(self.size, dtype=np.int64)
+        ids[self._positions] = np.arange(self.size)
+        self._grams = grams[self._positions].astype(np.int32)
+        # First internal id of a name with at least n trigrams, for n up to
+        # the longest name + 1
+        self._first_with_grams: List[int] = np.searchsorted(
+            self._grams, np.arange(int(grams.max(initial=0)) + 2)
+        ).tolist()
+
+        postings = np.sort((codes << 32) | ids[rows])
+        self._postings = (postings & 0xFFFFFFFF).astype(np.int32)
+        gram_codes, starts = np.unique(postings >> 32, return_index=True)
+        stops = np.append(starts[1:], len(postings))
+        self._slices: Dict[int, Tuple[int, int]] = dict(zip(gram_codes.tolist(), zip(starts.tolist(), stops.tolist())))
+
+    def _posting(self, code: int) -> np.ndarray:
+        start, stop = self._slices.get(code, (0, 0))
+        return self._postings[start:stop]
+
+    def search(
+        self,
+        descriptor: str,
+        threshold: float = DEFAULT_THRESHOLD,
+        limit: int = 5
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the names closest to a cleaned descriptor.
+
+        Args:
+            descriptor: Cleaned descriptor (see ``clean_descriptor``)
+            threshold: Minimum score, in (0, 1]
+            limit: Maximum number of results
+
+        Returns:
+            (name position, score) pairs, best first; ties go to the
+            earlier name. Names shorter than MIN_FUZZY_GRAMS trigrams are
+            never returned
+        """
+        tokens = descriptor.split()[:MAX_PREFIX_TOKENS]
+        if not tokens or self.size == 0:
+            return []
+
+        # Every prefix " t1 .. tk " is a prefix of the full padded string,
+        # so a trigram belongs to prefix k iff it starts early enough
+        padded = (' ' + ' '.join(tokens) + ' ').encode('utf-8')[:MAX_NAME_BYTES]
+        prefix_ends = []
+        position = 1
+        for token in tokens:
+            position += len(token.encode('utf-8')) + 1
+            prefix_ends.append(min(position, len(padded)) - 2)
+        first_prefix: Dict[int, int] = {}
+        for start, code in enumerate(_trigram_codes(padded).tolist()):
+            if code not in first_prefix:
+                first_prefix[code] = next(k for k, end in enumerate(prefix_ends) if start < end)
+        prefix_sizes = np.cumsum(np.bincount(list(first_prefix.values()), minlength=len(tokens)))
+
+        postings = {code: self._posting(code) for code in first_prefix}
+        by_rarity = sorted(first_prefix, key=lambda code: len(postings[code]))
+
+        # A name with n trigrams scores at most 2 min(g, n) / (g + n) against
+        # a g-trigram prefix, which bounds n. If it scores >= threshold it
+        # shares at least `needed` of the prefix's trigrams, hence at least
+        # `shared` of its `g - needed + shared` rarest (prefix filtering)
+        retrieved = []
+        for k, size in enumerate(prefix_sizes.tolist()):
+            needed = max(1, math.ceil(threshold * size / (2 - threshold) - 1e-9))
+            longest = math.floor(size * (2 - threshold) / threshold + 1e-9)
+            low = self._first_with_grams[min(max(needed, MIN_FUZZY_GRAMS), len(self._first_with_grams) - 1)]
+            high = self._first_with_grams[min(longest + 1, len(self._first_with_grams) - 1)]
+            if low >= high:
+                continue
+            shared = min(SIGNATURE_HITS, needed)
+            prefix_codes = [code for code in by_rarity if first_prefix[code] <= k]
+            slices = []
+            for code in prefix_codes[:size - needed + shared]:
+                posting = postings[code]
+                bounds = posting.searchsorted((low, high))
+                slices.append(posting[bounds[0]:bounds[1]])
+            ids = np.sort(np.concatenate(slices))
+            if shared > 1:
+                ids = ids[shared - 1:][ids[shared - 1:] == ids[:len(ids) - shared + 1]]
+            retrieved.append(ids)
+        if not retrieved:
+            return []
+        candidates = _sorted_unique(np.concatenate(retrieved))
+        if len(candidates) == 0:
+            return []
+
+        # Overlap of every candidate with each prefix
+        overlap = np.zeros((len(candidates), len(tokens)), dtype=np.int32)
+        for code, k in first_prefix.items():
+            posting = postings[code]
+            if len(posting) == 0:
+                continue
+            found = np.searchsorted(posting, candidates)
+            found[found == len(posting)] = 0
+            overlap[:, k] += posting[found] == candidates
+        overlap = np.cumsum(overlap, axis=1)
+        scores = (2.0 * overlap / (prefix_sizes + self._grams[candidates][:, None])).max(axis=1)
+
+        keep = np.flatnonzero(scores >= threshold - 1e-9)
+        positions = self._positions[candidates[keep]]
+        order = np.lexsort((positions, -scores[keep]))[:limit]
+        return [(int(positions[i]), round(float(scores[keep][i]), 4)) for i in order]
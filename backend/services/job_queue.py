@@ -0,0 +1,665 @@
+"""
+Priority job queue running heavy optimizations in worker processes.
+
+Wallet searches, simulations, breakpoint sweeps and large batch rankings
+are CPU-bound; even in the compute thread pool (services.compute) they
+hold the GIL between NumPy calls. Submitted as jobs, they run in a
+ProcessPoolExecutor instead, so the web worker's event loop only
+forwards requests and results.
+
+- Workers load the card catalog once, in the pool initializer (mapping
+  the binary snapshot, see services.card_schema). A job only carries its
+  parameters. When the catalog version changes, new jobs go to a fresh
+  pool while the old one finishes the jobs it is running.
+- The queue lives in the parent: at most ``workers`` jobs are handed to
+  the pool at a time, highest priority first (FIFO within a priority), so
+  a burst of low-priority jobs never delays a high-priority one behind
+  the executor's own FIFO queue.
+- Queued jobs are cancelled by dropping them. Running jobs are cancelled
+  by signalling their worker, whose handler raises inside the job.
+  Shutting down cancels every job this way instead of waiting for it.
+- Each job has a time limit (an interval timer in the worker) and a
+  memory limit (a soft RLIMIT_AS raised above the worker's current
+  address space for the job only). Both are checked between Python
+  bytecodes, so a single long NumPy call finishes before the job stops.
+- Jobs that yield (batch ranking) stream partial results back through a
+  queue as they are produced.
+
+Signals and resource limits are POSIX-only; elsewhere jobs run without
+cancellation of running jobs and without memory limits.
+
+Configuration:
+    JOB_WORKERS          worker processes (default 2)
+    JOB_TIME_LIMIT       default seconds per job (default 120)
+    JOB_MEMORY_LIMIT_MB  default address space per job, 0 for none (default 1024)
+    JOB_HISTORY          finished jobs kept for polling (default 1000)
+"""
+import asyncio
+import heapq
+import inspect
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services import metrics
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_TIME_LIMIT = float(os.getenv("JOB_TIME_LIMIT", 120))
+JOB_MEMORY_LIMIT_MB = int(os.getenv("JOB_MEMORY_LIMIT_MB", 1024))
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", 1000))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+CANCEL_SIGNAL = getattr(signal, "SIGUSR1", None)
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when it is cancelled."""
+
+
+class JobLimitExceeded(Exception):
+    """Raised inside a running job when it exceeds its time or memory limit."""
+
+
+class _Streamed:
+    """
+    Return value of a job that yielded partial results.
+
+    Partials travel on the event queue and the return value on the
+    executor's result queue, so either can arrive first; the count tells
+    the parent when it has every partial.
+    """
+
+    def __init__(self, count: int, value: Any):
+        self.count = count
+        self.value = value
+
+
+# Job functions, run in the workers with the worker's compiled catalog
+
+def _wallet_job(compiled, spend, max_cards, objective):
+    from services.wallet_optimizer import optimize_wallet
+    return optimize_wallet(compiled, spend, max_cards, objective)
+
+
+def _simulate_job(compiled, history, months, paths, volatility, top_k, seed):
+    from services.savings_simulator import simulate_savings
+    return simulate_savings(compiled, history, months, paths, volatility, top_k, seed)
+
+
+def _breakpoints_job(compiled, spend, categories, objective, max_spend):
+    from services.spend_sensitivity import spend_breakpoints
+    return spend_breakpoints(compiled, spend, categories, objective, max_spend)
+
+
+def _batch_job(compiled, ids, spend_matrix, spend_keys, top_k, chunk_size=None):
+    from services.reward_engine import iter_batch_results
+    count = 0
+    spend_matrix = np.asarray(spend_matrix, dtype=float)
+    for results in iter_batch_results(compiled, ids, spend_matrix, spend_keys, top_k, chunk_size):
+        count += len(results)
+        yield results
+    return {"count": count, "top_k": top_k}
+
+
+JOB_FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "wallet": _wallet_job,
+    "simulate": _simulate_job,
+    "breakpoints": _breakpoints_job,
+    "batch": _batch_job,
+}
+
+
+# Worker process state
+
+class _WorkerState:
+    """What a worker process holds between jobs."""
+
+    def __init__(self, compiled, slot: int, running, cancel_requests, events):
+        self.compiled = compiled
+        self.slot = slot
+        self.running = running
+        self.cancel_requests = cancel_requests
+        self.events = events
+        self.time_limit = 0.0
+
+
+_worker: Optional[_WorkerState] = None
+
+
+def _on_cancel(signum, frame):
+    state = _worker
+    if state is not None and state.running[state.slot]:
+        if state.cancel_requests[state.slot] == state.running[state.slot]:
+            raise JobCancelled("Job was cancelled")
+
+
+def _on_time_limit(signum, frame):
+    if _worker is not None and _worker.running[_worker.slot]:
+        raise JobLimitExceeded(f"Time limit of {_worker.time_limit:g}s exceeded")
+
+
+def _init_worker(catalog_path, catalog_version, slots, pids, running, cancel_requests, events):
+    """Pool initializer: load the card catalog and claim a signalling slot."""
+    global _worker
+    from services.card_catalog import CardCatalog
+
+    snapshot = CardCatalog(catalog_path).snapshot()
+    if snapshot.version != catalog_version:
+        print(f"Warning: job worker loaded catalog {snapshot.version}, expected {catalog_version}")
+    with slots.get_lock():
+        slot = slots.value
+        slots.value += 1
+    pids[slot] = os.getpid()
+    _worker = _WorkerState(snapshot.compiled, slot, running, cancel_requests, events)
+    if CANCEL_SIGNAL is not None:
+        signal.signal(CANCEL_SIGNAL, _on_cancel)
+        signal.signal(signal.SIGALRM, _on_time_limit)
+
+
+def _address_space() -> Optional[int]:
+    """Current virtual memory size of this process in bytes (Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _end_job(state: _WorkerState) -> None:
+    """Stop the running job's timer and make its signal handlers no-ops."""
+    # Cleared first: the handlers ignore a slot with no running job
+    state.running[state.slot] = 0
+    if CANCEL_SIGNAL is not None:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _run_job(
+    number: int,
+    kind: str,
+    params: Dict[str, Any],
+    time_limit: float,
+    memory_limit: Optional[int]
+) -> Any:
+    """Run one job in a worker, within its limits."""
+    state = _worker
+    soft_limit = hard_limit = None
+    try:
+        # Mark the slot before announcing the start, so a cancel request
+        # sent on the "started" event always finds the job
+        state.running[state.slot] = number
+        state.events.put(("started", number, os.getpid()))
+        if memory_limit and resource is not None:
+            current = _address_space()
+            if current is not None:
+                soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+                limit = current + memory_limit
+                if hard_limit != resource.RLIM_INFINITY:
+                    limit = min(limit, hard_limit)
+                resource.setrlimit(resource.RLIMIT_AS, (limit, hard_limit))
+        if CANCEL_SIGNAL is not None and time_limit:
+            state.time_limit = time_limit
+            signal.setitimer(signal.ITIMER_REAL, time_limit)
+        output = JOB_FUNCTIONS[kind](state.compiled, **params)
+        if inspect.isgenerator(output):
+            count = 0
+            while True:
+                try:
+                    partial = next(output)
+                except StopIteration as stop:
+                    output = _Streamed(count, stop.value)
+                    break
+                state.events.put(("partial", number, partial))
+                count += 1
+        # Disarm before leaving the guarded block, so a time limit or cancel
+        # signal arriving now cannot fail a job that has its result
+        _end_job(state)
+        return output
+    except MemoryError:
+        if not memory_limit:
+            raise
+        raise JobLimitExceeded(f"Memory limit of {memory_limit // 2**20} MB exceeded") from None
+    finally:
+        _end_job(state)
+        if soft_limit is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (soft_limit, hard_limit))
+
+
+# Parent side
+
+class Job:
+    """One submitted job and everything known about it."""
+
+    def __init__(
+        self,
+        number: int,
+        kind: str,
+        params: Dict[str, Any],
+        priority: int,
+        time_limit: float,
+        memory_limit: Optional[int]
+    ):
+        self.id = uuid.uuid4().hex
+        self.number = number
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.status = QUEUED
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.catalog_version: Optional[str] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.partials: List[Any] = []
+        self.events: List[Dict[str, Any]] = [{"status": QUEUED}]
+        self.pool: Optional["_Pool"] = None
+        self.future: Optional[Future] = None
+        self.cancel_requested = False
+        self._streamed: Optional[_Streamed] = None
+        self._lock = threading.RLock()
+        self._watchers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def summary(self, include_result: bool = True) -> Dict[str, Any]:
+        """JSON-ready description of the job (with its result once finished)."""
+        summary = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "catalog_version": self.catalog_version,
+        }
+        if self.error is not None:
+            summary["error"] = self.error
+        if include_result and self.status == SUCCEEDED:
+            summary["result"] = self.result
+        return summary
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        # Called with self._lock held
+        self.events.append(event)
+        for loop, queue in self._watchers:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def _update(self, status: str, **fields: Any) -> bool:
+        """Move to a new status unless already finished; returns whether it did."""
+        with self._lock:
+            if self.finished:
+                return False
+            self.status = status
+            for name, value in fields.items():
+                setattr(self, name, value)
+            if status in FINISHED:
+                self.finished_at = time.time()
+            event = {"status": status}
+            if self.error is not None:
+                event["error"] = self.error
+            if status == SUCCEEDED:
+                # Streamed results were already sent as partials
+                event["result"] = self.result if self._streamed is None else self._streamed.value
+            self._emit(event)
+            return True
+
+    def _add_partial(self, partial: Any) -> None:
+        with self._lock:
+            if not self.finished:
+                self.partials.append(partial)
+                self._emit({"status": self.status, "partial": partial})
+                self._complete_stream()
+
+    def _finish_stream(self, streamed: _Streamed) -> None:
+        with self._lock:
+            self._streamed = streamed
+            self._complete_stream()
+
+    def _complete_stream(self) -> None:
+        # Called with self._lock held, once the return value or a partial arrives
+        streamed = self._streamed
+        if streamed is not None and len(self.partials) >= streamed.count:
+            results = [item for partial in self.partials for item in partial]
+            self._update(SUCCEEDED, result={**(streamed.value or {}), "results": results})
+
+    def subscribe(self) -> Tuple[List[Dict[str, Any]], asyncio.Queue]:
+        """
+        Get the events so far and a queue receiving every later event.
+
+        Must be called from a running event loop; pair with ``unsubscribe``.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._watchers.append((asyncio.get_running_loop(), queue))
+            return list(self.events), queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._watchers = [(loop, q) for loop, q in self._watchers if q is not queue]
+
+
+class _Pool:
+    """A process pool bound to one catalog version, with its signalling slots."""
+
+    def __init__(self, context, workers: int, catalog_path: str, catalog_version: str, events):
+        self.version = catalog_version
+        self.running = context.Array("q", workers, lock=False)
+        self.cancel_requests = context.Array("q", workers, lock=False)
+        self.pids = context.Array("q", workers, lock=False)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(
+                catalog_path, catalog_version, context.Value("i", 0), self.pids,
+                self.running, self.cancel_requests, events
+            ),
+        )
+
+    def signal_cancel(self, number: int) -> bool:
+        """Ask the worker running job ``number`` to stop; False if none is."""
+        if CANCEL_SIGNAL is None:
+            return False
+        for slot, running in enumerate(self.running):
+            if running == number:
+                self.cancel_requests[slot] = number
+                try:
+                    os.kill(self.pids[slot], CANCEL_SIGNAL)
+                except ProcessLookupError:
+                    return False
+                return True
+        return False
+
+
+class JobQueue:
+    """Priority queue of jobs feeding a worker process pool."""
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        catalog_source: Optional[Callable[[], Tuple[str, str]]] = None,
+        history: int = JOB_HISTORY
+    ):
+        """
+        Args:
+            workers: Worker processes, and so jobs running at once
+            catalog_source: Returns the (card file path, version) workers
+                load; defaults to the process-wide card catalog
+            history: Finished jobs kept for polling
+        """
+        self.workers = workers
+        self.catalog_source = catalog_source or _current_catalog
+        self.history = history
+        # Spawned workers start clean: no copies of the web worker's
+        # threads, sockets or event loop
+        self._context = multiprocessing.get_context("spawn")
+        self._events = self._context.Queue()
+        # Reentrant: a future that is already done runs _finish inside _dispatch
+        self._lock = threading.RLock()
+        self._jobs: Dict[str, Job] = {}
+        self._by_number: Dict[int, Job] = {}
+        self._pending: List[Tuple[int, int, Job]] = []
+        self._numbers = itertools.count(1)
+        self._running = 0
+        self._pool: Optional[_Pool] = None
+        self._closed = False
+        self._event_thread = threading.Thread(target=self._read_events, name="job-events", daemon=True)
+        self._event_thread.start()
+
+    def submit(
+        self,
+        kind: str,
+        params: Dict[str, Any],
+        priority: int = 0,
+        time_limit: Optional[float] = None,
+        memory_limit_mb: Optional[int] = None
+    ) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            kind: One of JOB_FUNCTIONS
+            params: Keyword arguments for the job function (picklable)
+            priority: Higher runs first
+            time_limit: Seconds the job may run (default JOB_TIME_LIMIT)
+            memory_limit_mb: Extra address space the job may use, 0 for no
+                limit (default JOB_MEMORY_LIMIT_MB)
+
+        Returns:
+            The queued job
+        """
+        if kind not in JOB_FUNCTIONS:
+            raise ValueError(f"Unknown job kind {kind!r}; expected one of {list(JOB_FUNCTIONS)}")
+        if memory_limit_mb is None:
+            memory_limit_mb = JOB_MEMORY_LIMIT_MB
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Job queue is shut down")
+            job = Job(
+                next(self._numbers), kind, params, priority,
+                JOB_TIME_LIMIT if time_limit is None else time_limit,
+                memory_limit_mb * 2**20 if memory_limit_mb else None
+            )
+            self._jobs[job.id] = job
+            self._by_number[job.number] = job
+            heapq.heappush(self._pending, (-priority, job.number, job))
+            self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        """All known jobs, most recently submitted first."""
+        return sorted(self._jobs.values(), key=lambda job: job.number, reverse=True)
+
+    def position(self, job: Job) -> Optional[int]:
+        """How many queued jobs run before ``job`` (None unless queued)."""
+        if job.status != QUEUED:
+            return None
+        with self._lock:
+            key = (-job.priority, job.number)
+            return sum(
+                1 for priority, number, other in self._pending
+                if (priority, number) < key and not other.finished
+            )
+
+    def cancel(self, job: Job) -> bool:
+        """
+        Cancel a queued or running job.
+
+        Returns:
+            True if the job was queued or running, False if it had finished
+        """
+        with self._lock:
+            if job.finished:
+                return False
+            if job.pool is None:
+                # Still in the heap; _dispatch skips it
+                return job._update(CANCELLED, error="Job was cancelled")
+            job.cancel_requested = True
+            pool, future = job.pool, job.future
+        if future.cancel():
+            return True
+        if CANCEL_SIGNAL is None:
+            # Running jobs cannot be interrupted here; stop waiting for the result
+            return job._update(CANCELLED, error="Job was cancelled")
+        # A job not marked running yet is signalled on its "started" event
+        pool.signal_cancel(job.number)
+        return True
+
+    def counts(self) -> Dict[str, int]:
+        """Number of known jobs by status."""
+        counts = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+        for job in list(self._jobs.values()):
+            counts[job.status] += 1
+        return counts
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Cancel queued and running jobs and stop the workers.
+
+        Running jobs are interrupted like cancelled ones rather than waited
+        for, so shutting down takes about as long as the longest single
+        NumPy call in flight.
+        """
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, []
+            pools = {self._pool} if self._pool is not None else set()
+            self._pool = None
+            dispatched = [
+                job for job in self._jobs.values() if job.future is not None and not job.finished
+            ]
+            for job in dispatched:
+                job.cancel_requested = True
+                pools.add(job.pool)
+        for _, _, job in pending:
+            job._update(CANCELLED, error="Job queue shut down")
+        for job in dispatched:
+            # Jobs not started yet are signalled on their "started" event,
+            # which keeps being read until the pools have stopped
+            if not job.future.cancel():
+                job.pool.signal_cancel(job.number)
+        for pool in pools:
+            pool.executor.shutdown(wait=wait, cancel_futures=True)
+        self._events.put(None)
+
+    def _dispatch(self) -> None:
+        # Called with self._lock held
+        while self._running < self.workers and self._pending and not self._closed:
+            _, _, job = heapq.heappop(self._pending)
+            if job.status != QUEUED:
+                continue
+            pool = self._current_pool()
+            job.pool = pool
+            job.catalog_version = pool.version
+            try:
+                future = pool.executor.submit(
+                    _run_job, job.number, job.kind, job.params, job.time_limit, job.memory_limit
+                )
+            except BrokenProcessPool:
+                self._pool = None
+                heapq.heappush(self._pending, (-job.priority, job.number, job))
+                continue
+            job.future = future
+            self._running += 1
+            future.add_done_callback(lambda future, job=job: self._finish(job, future))
+
+    def _current_pool(self) -> _Pool:
+        # Called with self._lock held
+        path, version = self.catalog_source()
+        if self._pool is not None and self._pool.version != version:
+            # Running jobs finish on the old pool; new ones get the new catalog
+            self._pool.executor.shutdown(wait=False)
+            self._pool = None
+        if self._pool is None:
+            self._pool = _Pool(self._context, self.workers, path, version, self._events)
+        return self._pool
+
+    def _finish(self, job: Job, future: Future) -> None:
+        try:
+            result = future.result()
+        except CancelledError:
+            job._update(CANCELLED, error="Job was cancelled")
+        except JobCancelled as e:
+            job._update(CANCELLED, error=str(e))
+        except BrokenProcessPool:
+            job._update(FAILED, error="Job worker process died")
+            with self._lock:
+                if self._pool is job.pool:
+                    self._pool = None
+        except Exception as e:
+            job._update(FAILED, error=str(e) or type(e).__name__)
+        else:
+            if isinstance(result, _Streamed):
+                job._finish_stream(result)
+            else:
+                job._update(SUCCEEDED, result=result)
+        with self._lock:
+            self._running -= 1
+            self._evict()
+            self._dispatch()
+
+    def _evict(self) -> None:
+        # Called with self._lock held; jobs are numbered in submission order
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda job: job.number)[:max(0, len(finished) - self.history)]:
+            del self._jobs[job.id]
+            del self._by_number[job.number]
+
+    def _read_events(self) -> None:
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            kind, number, payload = event
+            job = self._by_number.get(number)
+            if job is None:
+                continue
+            if kind == "started":
+                job._update(RUNNING, started_at=time.time())
+                if job.cancel_requested:
+                    job.pool.signal_cancel(number)
+            elif kind == "partial":
+                job._add_partial(payload)
+
+
+def _current_catalog() -> Tuple[str, str]:
+    from services.card_catalog import get_card_catalog
+
+    catalog = get_card_catalog()
+    return str(catalog.path), catalog.snapshot().version
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Get the process-wide job queue, creating it (and its workers) on first use."""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue()
+    return _job_queue
+
+
+def shutdown_job_queue() -> None:
+    """Shut down the process-wide job queue if one was created."""
+    global _job_queue
+    with _job_queue_lock:
+        queue, _job_queue = _job_queue, None
+    if queue is not None:
+        queue.shutdown()
+
+
+def _job_counts():
+    queue = _job_queue
+    if queue is not None:
+        for status, count in queue.counts().items():
+            yield (status,), count
+
+
+metrics.register_collector("optimizer_jobs", "Known optimizer jobs by status.", ("status",), _job_counts)
@@ -0,0 +1,291 @@
+"""
+Streaming transaction-ledger ingestion.
+
+Reads raw transaction files (date, merchant, category, amount and an
+optional user_id column, like data/user_spend_raw.csv) row by row and
+aggregates them into monthly per-category spend per user. Memory grows
+with users x months x categories, never with the number of rows, so
+multi-GB files stream in constant memory.
+
+Parquet and Arrow IPC ledgers (.parquet, .arrow, .arrows) are read
+column-wise instead (services.columnar).
+
+Usage:
+    python -m services.ledger_ingest data/user_spend_raw.csv --top-k 3
+    python -m services.ledger_ingest ledger.parquet --output ranked.parquet
+"""
+import csv
+import io
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+import numpy as np
+
+from services import metrics
+from services.merchant_resolver import resolve_merchant_to_category
+
+DEFAULT_USER = "default"
+READ_CHUNK_BYTES = 1 << 20
+
+
+@lru_cache(maxsize=65536)
+def resolve_category(merchant: str) -> Optional[str]:
+    """Resolve a merchant to a card category, or None if it is unknown."""
+    merchant_info = resolve_merchant_to_category(merchant)
+    if merchant_info.get("source") == "default":
+        return None
+    return merchant_info["category"]
+
+
+metrics.register_cache("merchant_category", lambda: tuple(resolve_category.cache_info()[:2]))
+
+
+def parse_month(value: str) -> Optional[str]:
+    """Extract the YYYY-MM month from a transaction date."""
+    value = value.strip()
+    if len(value) >= 7 and value[4] == '-' and value[:4].isdigit() and value[5:7].isdigit():
+        return value[:7]
+    for fmt in ("%m/%d/%Y", "%d/%m/%Y", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m")
+        except ValueError:
+            continue
+    return None
+
+
+class LedgerAggregator:
+    """Aggregates ledger rows into monthly per-category spend per user."""
+
+    def __init__(self, resolve_merchants: bool = True):
+        """
+        Args:
+            resolve_merchants: Categorize rows through merchant_resolver and
+                only fall back to the ledger's own category column when the
+                merchant is unknown
+        """
+        self.resolve_merchants = resolve_merchants
+        # user -> month -> category -> spend
+        self.totals: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self.rows = 0
+        self.skipped = 0
+
+    def add_row(self, row: Dict[str, Any]) -> None:
+        """Add one transaction row."""
+        try:
+            amount = float(row.get("amount") or "")
+        except ValueError:
+            self.skipped += 1
+            return
+        month = parse_month(row.get("date") or "")
+        if month is None:
+            self.skipped += 1
+            return
+
+        category = None
+        merchant = (row.get("merchant") or "").strip()
+        if self.resolve_merchants and merchant:
+            category = resolve_category(merchant)
+        if category is None:
+            category = (row.get("category") or "").strip() or "Other"
+
+        user = (row.get("user_id") or "").strip() or DEFAULT_USER
+        by_category = self.totals.setdefault(user, {}).setdefault(month, {})
+        by_category[category] = by_category.get(category, 0.0) + amount
+        self.rows += 1
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Add many transaction rows."""
+        for row in rows:
+            self.add_row(row)
+
+    def profiles(self) -> List[Dict[str, Any]]:
+        """
+        Build one spend profile per user.
+
+        Returns:
+            List of dictionaries with user_id, months (number of months
+            seen), monthly_spend (average per category across those months)
+            and by_month (per-month category totals)
+        """
+        profiles = []
+        for user, by_month in self.totals.items():
+            n_months = len(by_month)
+            category_totals: Dict[str, float] = {}
+            for by_category in by_month.values():
+                for category, amount in by_category.items():
+                    category_totals[category] = category_totals.get(category, 0.0) + amount
+            profiles.append({
+                "user_id": user,
+                "months": n_months,
+                "monthly_spend": {
+                    category: round(total / n_months, 2)
+                    for category, total in sorted(category_totals.items())
+                },
+                "by_month": {
+                    month: {category: round(amount, 2) for category, amount in sorted(by_category.items())}
+                    for month, by_category in sorted(by_month.items())
+                },
+            })
+        return profiles
+
+
+class LedgerStreamParser:
+    """
+    Incremental CSV parser for ledger bytes arriving in arbitrary chunks.
+
+    Lines are split on newlines, so quoted fields must not contain line
+    breaks (true of bank transaction exports).
+    """
+
+    def __init__(self, aggregator: LedgerAggregator):
+        self.aggregator = aggregator
+        self._buffer = b""
+        self._header: Optional[List[str]] = None
+
+    def feed(self, chunk: bytes) -> None:
+        """Parse every complete line in the chunk."""
+        data = self._buffer + chunk
+        end = data.rfind(b"\n")
+        if end < 0:
+            self._buffer = data
+            return
+        self._buffer = data[end + 1:]
+        self._parse_lines(data[:end + 1].decode("utf-8-sig" if self._header is None else "utf-8"))
+
+    def close(self) -> None:
+        """Parse any trailing line without a newline."""
+        if self._buffer:
+            remaining, self._buffer = self._buffer, b""
+            self._parse_lines(remaining.decode("utf-8") + "\n")
+
+    def _parse_lines(self, text: str) -> None:
+        reader = csv.reader(io.StringIO(text))
+        if self._header is None:
+            header = next(reader, None)
+            if header is None:
+                return
+            self._header = [column.strip().lower() for column in header]
+        header = self._header
+        self.aggregator.add_rows(dict(zip(header, values)) for values in reader if values)
+
+
+def iter_ledger_rows(f: TextIO) -> Iterator[Dict[str, Any]]:
+    """Stream rows from a ledger CSV file object with lowercased column names."""
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [column.strip().lower() for column in header]
+    for values in reader:
+        if values:
+            yield dict(zip(header, values))
+
+
+def aggregate_ledger_file(path: Path, resolve_merchants: bool = True) -> LedgerAggregator:
+    """
+    Aggregate a ledger file from disk in constant memory.
+
+    Args:
+        path: Path to the ledger CSV, or a Parquet or Arrow IPC file
+        resolve_merchants: Categorize rows through merchant_resolver
+
+    Returns:
+        The populated aggregator
+    """
+    from services.columnar import add_ledger, path_media_type
+
+    aggregator = LedgerAggregator(resolve_merchants=resolve_merchants)
+    media_type = path_media_type(path)
+    if media_type is not None:
+        return add_ledger(aggregator, path, media_type)
+    with open(path, "r", encoding="utf-8-sig", newline="", buffering=READ_CHUNK_BYTES) as f:
+        aggregator.add_rows(iter_ledger_rows(f))
+    return aggregator
+
+
+def profile_spend_matrix(profiles: Sequence[Dict[str, Any]]) -> Tuple[List[str], np.ndarray]:
+    """
+    Stack aggregated profiles' monthly spend into a matrix for the batch ranker.
+
+    Returns:
+        Tuple of (spend_keys, spend_matrix) with one row per profile
+    """
+    spend_keys = sorted({category for profile in profiles for category in profile["monthly_spend"]})
+    spend_matrix = np.zeros((len(profiles), len(spend_keys)))
+    column_index = {key: j for j, key in enumerate(spend_keys)}
+    for row, profile in enumerate(profiles):
+        for category, amount in profile["monthly_spend"].items():
+            spend_matrix[row, column_index[category]] = amount
+    return spend_keys, spend_matrix
+
+
+def rank_profiles(profiles: List[Dict[str, Any]], top_k: int = 3) -> List[Dict[str, Any]]:
+    """
+    Attach the top-k cards to each aggregated spend profile.
+
+    Args:
+        profiles: Output of LedgerAggregator.profiles()
+        top_k: Number of cards per profile
+
+    Returns:
+        The same profiles, each with a ``top_cards`` list
+    """
+    from services.reward_engine import get_compiled_catalog, iter_top_cards
+
+    spend_keys, spend_matrix = profile_spend_matrix(profiles)
+    compiled = get_compiled_catalog()
+    row = 0
+    for chunk in iter_top_cards(compiled, spend_matrix, spend_keys, top_k):
+        for top_cards in chunk:
+            profiles[row]["top_cards"] = top_cards
+            row += 1
+    return profiles
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Aggregate a transaction ledger into spend profiles")
+    parser.add_argument(
+        "path", type=Path,
+        help="Ledger CSV, Parquet or Arrow file (date, merchant, category, amount[, user_id])"
+    )
+    parser.add_argument("--top-k", type=int, default=3, help="Cards to recommend per user (0 to skip ranking)")
+    parser.add_argument("--no-resolve", action="store_true", help="Use the ledger's category column as-is")
+    parser.add_argument("--by-month", action="store_true", help="Include per-month totals in the output")
+    parser.add_argument(
+        "--output", type=Path,
+        help="Write each user's top cards to a .parquet, .arrow or .arrows file instead of printing JSON"
+    )
+    args = parser.parse_args()
+
+    aggregator = aggregate_ledger_file(args.path, resolve_merchants=not args.no_resolve)
+    profiles = aggregator.profiles()
+    if args.output is not None:
+        from services.columnar import iter_batch_record_batches, path_media_type, write_columnar
+        from services.reward_engine import get_compiled_catalog
+
+        media_type = path_media_type(args.output)
+        if media_type is None:
+            parser.error("--output must end in .parquet, .arrow, .feather or .arrows")
+        spend_keys, spend_matrix = profile_spend_matrix(profiles)
+        schema, batches = iter_batch_record_batches(
+            get_compiled_catalog(), [profile["user_id"] for profile in profiles],
+            spend_matrix, spend_keys, max(args.top_k, 1)
+        )
+        write_columnar(args.output, media_type, schema, batches)
+        print(f"Wrote {len(profiles)} users from {aggregator.rows} rows ({aggregator.skipped} skipped) to {args.output}")
+        raise SystemExit(0)
+    if args.top_k > 0:
+        rank_profiles(profiles, args.top_k)
+    if not args.by_month:
+        for profile in profiles:
+            profile.pop("by_month")
+    print(json.dumps({
+        "users": profiles,
+        "rows": aggregator.rows,
+        "skipped": aggregator.skipped,
+    }, indent=2))
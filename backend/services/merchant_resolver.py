@@ -1,65 +1,243 @@
 """
 Merchant name normalization and category resolution.
+
+Names are resolved in order of confidence: an exact entry in
+merchant_categories.csv, a fuzzy match against it (see
+services.fuzzy_matcher; reported as source "fuzzy:<score>"), the built-in
+substring mappings, and finally "Other".
 """
+import csv
+import io
+import os
 import re
-import pandas as pd
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
+from services import metrics
+from services.aho_corasick import AhoCorasick
+from services.file_cache import DEFAULT_CHECK_INTERVAL, ReloadableFile
+from services.fuzzy_matcher import TrigramIndex, clean_descriptor
+
 BACKEND_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BACKEND_DIR / "data"
+MERCHANT_CATEGORIES_PATH = DATA_DIR / "merchant_categories.csv"
+
+# Minimum fuzzy score (Dice coefficient of trigrams, 0-1) for a match
+FUZZY_THRESHOLD = float(os.getenv("MERCHANT_FUZZY_THRESHOLD", 0.7))
+
+_LEADING_ARTICLE_RE = re.compile(r'^(THE\s+|A\s+)', flags=re.IGNORECASE)
+_CORPORATE_SUFFIX_RE = re.compile(r'\s+(INC|LLC|CORP|LTD)\.?$', flags=re.IGNORECASE)
+# Other punctuation separates words ("TARGET.COM"); apostrophes, hyphens and
+# the "*" of processor prefixes ("SQ *SHOP") are left for clean_descriptor
+_PUNCTUATION_RE = re.compile(r"[^\w\s'’*-]")
+
+# Fallback mappings, matched as substrings in priority order
+COMMON_MERCHANTS = {
+    "chipotle": {"category": "Dining", "mcc_code": "5812"},
+    "walmart": {"category": "Groceries", "mcc_code": "5411"},
+    "amazon": {"category": "Online Shopping", "mcc_code": "5999"},
+    "costco": {"category": "Gas", "mcc_code": "5542"},
+    "target": {"category": "Groceries", "mcc_code": "5411"},
+    "walgreens": {"category": "Drugstores", "mcc_code": "5912"},
+}
+_COMMON_MERCHANT_MATCHER = AhoCorasick(COMMON_MERCHANTS)
 
 
 def normalize_merchant_name(merchant: str) -> str:
     """Normalize merchant name for better matching."""
     merchant = merchant.strip()
-    merchant = re.sub(r'^(THE\s+|A\s+)', '', merchant, flags=re.IGNORECASE)
-    merchant = re.sub(r'\s+(INC|LLC|CORP|LTD)\.?$', '', merchant, flags=re.IGNORECASE)
-    merchant = re.sub(r'[^\w\s-]', '', merchant)
+    merchant = _LEADING_ARTICLE_RE.sub('', merchant)
+    merchant = _CORPORATE_SUFFIX_RE.sub('', merchant)
+    merchant = _PUNCTUATION_RE.sub(' ', merchant)
     merchant = ' '.join(merchant.split())
     return merchant
 
 
+class MerchantTable:
+    """
+    One version of merchant_categories.csv: a hash index keyed by cleaned
+    name (see ``clean_descriptor``), plus a trigram index over the same
+    names that is built on the first fuzzy lookup.
+    """
+
+    def __init__(self, entries: Dict[str, Tuple[str, Optional[str]]]):
+        self.entries = entries
+        self._names: List[str] = []
+        self._trigrams: Optional[TrigramIndex] = None
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, Optional[str]]]:
+        return self.entries.get(key)
+
+    def trigrams(self) -> TrigramIndex:
+        """The trigram index over this table's names, built once."""
+        if self._trigrams is None:
+            with self._lock:
+                if self._trigrams is None:
+                    self._names = list(self.entries)
+                    self._trigrams = TrigramIndex(self._names)
+        return self._trigrams
+
+    def fuzzy_match(self, key: str, threshold: float) -> Optional[Tuple[str, Optional[str], float]]:
+        """
+        Best fuzzy match for a cleaned descriptor.
+
+        A leading run of tokens that is exactly a known name ("chipotle" in
+        "chipotle 1234 seattle wa") scores 1.0 without touching the trigram
+        index; the longest such run wins.
+
+        Returns:
+            (category, mcc_code, score), or None below ``threshold``
+        """
+        tokens = key.split()
+        for end in range(len(tokens) - 1, 0, -1):
+            match = self.entries.get(' '.join(tokens[:end]))
+            if match is not None:
+                return match + (1.0,)
+        matches = self.trigrams().search(key, threshold, limit=1)
+        if not matches:
+            return None
+        position, score = matches[0]
+        return self.entries[self._names[position]] + (score,)
+
+
+class MerchantIndex(ReloadableFile):
+    """
+    Index of merchant_categories.csv keyed by cleaned merchant name.
+
+    Built once and rebuilt only when the file changes, so exact lookups are
+    a single dictionary access.
+    """
+
+    def __init__(
+        self,
+        path: Path = MERCHANT_CATEGORIES_PATH,
+        check_interval: float = DEFAULT_CHECK_INTERVAL
+    ):
+        super().__init__(path, check_interval)
+        self.hits = 0
+        self.misses = 0
+        self.fuzzy_hits = 0
+        self.fuzzy_misses = 0
+
+    def build(self, raw: bytes, version: str) -> MerchantTable:
+        entries = {}
+        reader = csv.DictReader(io.StringIO(raw.decode('utf-8')))
+        for row in reader:
+            key = clean_descriptor(row.get("merchant") or "")
+            if not key:
+                continue
+            mcc_code = (row.get("mcc_code") or "").strip()
+            entries.setdefault(key, (
+                row.get("category") or "Other",
+                mcc_code.zfill(4) if mcc_code else None,
+            ))
+        return MerchantTable(entries)
+
+    def build_empty(self, version: str) -> MerchantTable:
+        return MerchantTable({})
+
+    def lookup(self, merchant_name: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Look up (category, mcc_code) for an exact merchant name."""
+        match = self.current().get(clean_descriptor(merchant_name))
+        if match is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return match
+
+    def fuzzy_lookup(
+        self,
+        merchant_name: str,
+        threshold: float = FUZZY_THRESHOLD
+    ) -> Optional[Tuple[str, Optional[str], float]]:
+        """
+        Look up (category, mcc_code, score) for the closest merchant name.
+
+        Args:
+            merchant_name: Merchant name or raw card descriptor
+            threshold: Minimum score, in (0, 1]
+        """
+        match = self.current().fuzzy_match(clean_descriptor(merchant_name), threshold)
+        if match is None:
+            self.fuzzy_misses += 1
+        else:
+            self.fuzzy_hits += 1
+        return match
+
+
+_merchant_index: Optional[MerchantIndex] = None
+_merchant_index_lock = threading.Lock()
+
+
+def get_merchant_index() -> MerchantIndex:
+    """Get the process-wide merchant index, creating it on first use."""
+    global _merchant_index
+    if _merchant_index is None:
+        with _merchant_index_lock:
+            if _merchant_index is None:
+                _merchant_index = MerchantIndex()
+    return _merchant_index
+
+
+def set_merchant_index(index: MerchantIndex) -> None:
+    """Replace the process-wide merchant index (used by tools and benchmarks)."""
+    global _merchant_index
+    with _merchant_index_lock:
+        _merchant_index = index
+
+
+def _merchant_index_stats() -> Tuple[int, int]:
+    index = _merchant_index
+    return (index.hits, index.misses) if index is not None else (0, 0)
+
+
+def _merchant_fuzzy_stats() -> Tuple[int, int]:
+    index = _merchant_index
+    return (index.fuzzy_hits, index.fuzzy_misses) if index is not None else (0, 0)
+
+
+metrics.register_cache("merchant_index", _merchant_index_stats)
+metrics.register_cache("merchant_fuzzy", _merchant_fuzzy_stats)
+
+
 def get_merchant_info_with_fallback(merchant_name: str) -> Dict[str, Any]:
     """Get merchant information with multiple fallback strategies."""
-    # Try local CSV first
-    merchant_categories_path = DATA_DIR / "merchant_categories.csv"
-    if merchant_categories_path.exists():
-        try:
-            df = pd.read_csv(merchant_categories_path)
-            merchant_lower = merchant_name.lower().strip()
-            match = df[df["merchant"].str.lower().str.strip() == merchant_lower]
-            if not match.empty:
-                row = match.iloc[0]
-                return {
-                    "merchant": merchant_name,
-                    "category": row.get("category", "Other"),
-                    "mcc_code": str(row.get("mcc_code", "")).zfill(4) if pd.notna(row.get("mcc_code")) else None,
-                    "source": "local_csv"
-                }
-        except Exception:
-            pass
-    
+    # Try local CSV index first
+    index = get_merchant_index()
+    match = index.lookup(merchant_name)
+    if match is not None:
+        category, mcc_code = match
+        return {
+            "merchant": merchant_name,
+            "category": category,
+            "mcc_code": mcc_code,
+            "source": "local_csv"
+        }
+
+    # Then the closest name in the CSV (store numbers, locations, typos)
+    fuzzy_match = index.fuzzy_lookup(merchant_name)
+    if fuzzy_match is not None:
+        category, mcc_code, score = fuzzy_match
+        return {
+            "merchant": merchant_name,
+            "category": category,
+            "mcc_code": mcc_code,
+            "source": f"fuzzy:{score:.2f}"
+        }
+
     # Fallback: Use common merchant mappings
-    common_merchants = {
-        "chipotle": {"category": "Dining", "mcc_code": "5812"},
-        "walmart": {"category": "Groceries", "mcc_code": "5411"},
-        "amazon": {"category": "Online Shopping", "mcc_code": "5999"},
-        "costco": {"category": "Gas", "mcc_code": "5542"},
-        "target": {"category": "Groceries", "mcc_code": "5411"},
-        "walgreens": {"category": "Drugstores", "mcc_code": "5912"},
-    }
-    
-    merchant_lower = merchant_name.lower()
-    for key, value in common_merchants.items():
-        if key in merchant_lower:
-            return {
-                "merchant": merchant_name,
-                "category": value["category"],
-                "mcc_code": value["mcc_code"],
-                "source": "fallback_mapping"
-            }
-    
+    key = _COMMON_MERCHANT_MATCHER.first_match(merchant_name.lower())
+    if key is not None:
+        value = COMMON_MERCHANTS[key]
+        return {
+            "merchant": merchant_name,
+            "category": value["category"],
+            "mcc_code": value["mcc_code"],
+            "source": "fallback_mapping"
+        }
+
     return {
         "merchant": merchant_name,
         "category": "Other",
@@ -73,3 +251,21 @@ def resolve_merchant_to_category(merchant_name: str) -> Dict[str, Any]:
     normalized = normalize_merchant_name(merchant_name)
     return get_merchant_info_with_fallback(normalized)
 
+
+def resolve_merchants(merchant_names: List[str]) -> List[Dict[str, Any]]:
+    """
+    Resolve many merchant names or card descriptors at once.
+
+    Repeated names (common in a statement) are resolved once.
+
+    Returns:
+        One result per input name, in input order
+    """
+    resolved: Dict[str, Dict[str, Any]] = {}
+    results = []
+    for merchant_name in merchant_names:
+        info = resolved.get(merchant_name)
+        if info is None:
+            info = resolved[merchant_name] = resolve_merchant_to_category(merchant_name)
+        results.append(info)
+    return results
@@ -0,0 +1,325 @@
+"""
+Lightweight request instrumentation: stage spans, counters, histograms.
+
+Code marks the stages of a request with ``span``:
+
+    with metrics.span("merchant_resolution"):
+        merchant_info = resolve_merchant_to_category(name)
+
+Each span is recorded in a per-stage latency histogram and, while a
+request is being served by MetricsMiddleware, in that request's
+Server-Timing header. ``render`` writes every metric in the Prometheus
+text format for the /metrics endpoint.
+
+Configuration (read once at import):
+    METRICS_ENABLED=0   disable metrics collection and /metrics
+    SERVER_TIMING=1     add a Server-Timing header to responses
+
+With both off, ``span`` returns a shared no-op object and main.py
+installs neither the middleware nor the /metrics route.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "0").lower() in ("1", "true", "yes")
+ENABLED = METRICS_ENABLED or SERVER_TIMING_ENABLED
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (stage, seconds) spans of the request being served, if any
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+LabelValues = Tuple[str, ...]
+# A collected sample: (metric suffix, label names, label values, value)
+Sample = Tuple[str, Sequence[str], LabelValues, float]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues) -> str:
+    if not names:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        for value in values
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """Base class for a labelled metric family."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, names, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count per label set."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, value in items:
+            yield "", self.labels, values, value
+
+
+class Histogram(Metric):
+    """Bucketed distribution of observed values per label set."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket (+Inf last), sum]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = sorted((values, (list(counts), total)) for values, (counts, total) in self._series.items())
+        names = self.labels + ("le",)
+        for values, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield "_bucket", names, values + (_format_value(bound),), cumulative
+            yield "_sum", self.labels, values, total
+            yield "_count", self.labels, values, cumulative
+
+
+class CollectedMetric(Metric):
+    """Metric whose samples are read from a callback at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str],
+        metric_type: str,
+        collect: Callable[[], Iterable[Tuple[LabelValues, float]]]
+    ):
+        super().__init__(name, documentation, labels)
+        self.type = metric_type
+        self._collect = collect
+
+    def samples(self) -> Iterable[Sample]:
+        for values, value in self._collect():
+            yield "", self.labels, tuple(values), value
+
+
+_registry: Dict[str, Metric] = {}
+
+
+def register(metric: Metric) -> Metric:
+    """Add a metric to the /metrics output (re-registering a name replaces it)."""
+    _registry[metric.name] = metric
+    return metric
+
+
+def register_collector(
+    name: str,
+    documentation: str,
+    labels: Sequence[str],
+    collect: Callable[[], Iterable[Tuple[LabelValues, float]]],
+    metric_type: str = "gauge"
+) -> None:
+    """
+    Expose values that are already tracked elsewhere (cache statistics,
+    catalog size) without touching the hot path: ``collect`` is only
+    called when /metrics is scraped.
+    """
+    register(CollectedMetric(name, documentation, labels, metric_type, collect))
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in list(_registry.values()):
+        try:
+            lines.extend(metric.render())
+        except Exception as e:
+            print(f"Warning: could not collect metric {metric.name}: {e}")
+    return "\n".join(lines) + "\n"
+
+
+http_requests = register(Counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+))
+http_request_duration = register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+))
+stage_duration = register(Histogram(
+    "stage_duration_seconds", "Time spent in each request stage.", ("stage",)
+))
+
+# cache name -> callback returning its (hits, misses) so far
+_caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
+
+def register_cache(name: str, stats: Callable[[], Tuple[int, int]]) -> None:
+    """
+    Report a cache's hit and miss counts as cache_requests_total.
+
+    Caches keep their own counts (e.g. TTLCache.hits, lru_cache's
+    cache_info()); they are only read when /metrics is scraped.
+    """
+    _caches[name] = stats
+
+
+def _collect_caches() -> Iterable[Tuple[LabelValues, float]]:
+    for name, stats in sorted(_caches.items()):
+        hits, misses = stats()
+        yield (name, "hit"), hits
+        yield (name, "miss"), misses
+
+
+register_collector(
+    "cache_requests_total", "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result"), _collect_caches, metric_type="counter"
+)
+
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record_stage(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(stage: str):
+    """Context manager timing one stage of the current request."""
+    if not ENABLED:
+        return _NOOP_SPAN
+    return _Span(stage)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Record a stage duration measured by the caller."""
+    if METRICS_ENABLED:
+        stage_duration.observe(seconds, stage)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+def format_server_timing(spans: Sequence[Tuple[str, float]], total: float) -> str:
+    """Server-Timing header value; repeated stages are summed, durations in ms."""
+    durations: Dict[str, float] = {}
+    for stage, seconds in spans:
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    entries = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in durations.items()]
+    entries.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route request counts and latency, and
+    adding the Server-Timing header when enabled.
+
+    Routes are labelled by their path template (e.g.
+    /merchant-info/{merchant_name}) so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        spans: List[Tuple[str, float]] = []
+        token = _request_spans.set(spans)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    header = format_server_timing(spans, time.perf_counter() - start)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_spans.reset(token)
+            if METRICS_ENABLED:
+                route = scope.get("route")
+                route_path = getattr(route, "path", None) or "unmatched"
+                method = scope.get("method", "")
+                http_request_duration.observe(time.perf_counter() - start, method, route_path)
+                http_requests.inc(method, route_path, str(status))
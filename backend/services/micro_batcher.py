@@ -0,0 +1,74 @@
+"""
+Async micro-batching of concurrent calls into one batched call.
+"""
+import asyncio
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+
+class MicroBatcher:
+    """
+    Collects concurrent ``submit`` calls for a few milliseconds and runs
+    them through ``batch_fn`` together.
+
+    A batch is flushed when it reaches ``max_batch_size`` items or when
+    ``max_wait`` seconds have passed since its first item, whichever comes
+    first. ``batch_fn`` runs in a worker thread so the event loop keeps
+    collecting the next batch meanwhile.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[Sequence[Any]], Sequence[Any]],
+        max_batch_size: int = 64,
+        max_wait: float = 0.005
+    ):
+        """
+        Args:
+            batch_fn: Maps a list of items to a same-length list of results
+            max_batch_size: Largest number of items per batch
+            max_wait: Longest time in seconds an item waits for its batch
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            # Keep a reference so the task is not garbage collected mid-run
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await asyncio.to_thread(self.batch_fn, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -1,15 +1,16 @@
 """
 ML service for model predictions.
+
+joblib (and scikit-learn, which unpickling the models imports) is only
+loaded when the model files exist, keeping it out of startup otherwise.
 """
-import joblib
 import numpy as np
-import pandas as pd
 from pathlib import Path
-from typing import Optional, Tuple
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from typing import List, Optional, Sequence
 
 BACKEND_DIR = Path(__file__).resolve().parent.parent
 MODELS_DIR = BACKEND_DIR / "data" / "models"
+MODEL_FILES = ("reward_model.pkl", "encoder.pkl", "scaler.pkl")
 
 
 class MLService:
@@ -22,11 +23,21 @@ class MLService:
         self.load_models()
     
     def load_models(self):
-        """Load trained models."""
+        """
+        Load trained models.
+
+        Numpy arrays in the model files are memory-mapped read-only rather
+        than copied, so pre-forked workers (serve.py) share their pages.
+        """
+        if not all((MODELS_DIR / name).exists() for name in MODEL_FILES):
+            print("Warning: Model files not found")
+            return
+        
+        import joblib
         try:
-            self.model = joblib.load(MODELS_DIR / "reward_model.pkl")
-            self.encoder = joblib.load(MODELS_DIR / "encoder.pkl")
-            self.scaler = joblib.load(MODELS_DIR / "scaler.pkl")
+            self.model = joblib.load(MODELS_DIR / "reward_model.pkl", mmap_mode="r")
+            self.encoder = joblib.load(MODELS_DIR / "encoder.pkl", mmap_mode="r")
+            self.scaler = joblib.load(MODELS_DIR / "scaler.pkl", mmap_mode="r")
         except FileNotFoundError:
             print("Warning: Model files not found")
     
@@ -41,19 +52,37 @@ class MLService:
         Returns:
             Predicted card name or None if model not loaded
         """
+        return self.predict_batch([category], [amount])[0]
+    
+    def predict_batch(
+        self,
+        categories: Sequence[str],
+        amounts: Sequence[float]
+    ) -> List[Optional[str]]:
+        """
+        Predict best cards for many transactions in one model call.
+        
+        Args:
+            categories: Purchase category per transaction
+            amounts: Transaction amount per transaction
+        
+        Returns:
+            Predicted card name per transaction (all None if the model is
+            not loaded or prediction fails)
+        """
         if not self.model or not self.encoder or not self.scaler:
-            return None
+            return [None] * len(categories)
         
         try:
-            df = pd.DataFrame({"category": [category], "amount": [amount]})
-            X_cat = self.encoder.transform([[category]])
-            X_amt = self.scaler.transform([[amount]])
+            X_cat = self.encoder.transform(np.asarray(categories, dtype=object).reshape(-1, 1))
+            if hasattr(X_cat, "toarray"):
+                X_cat = X_cat.toarray()
+            X_amt = self.scaler.transform(np.asarray(amounts, dtype=np.float64).reshape(-1, 1))
             X = np.hstack([X_cat, X_amt])
-            prediction = self.model.predict(X)[0]
-            return prediction
+            return self.model.predict(X).tolist()
         except Exception as e:
             print(f"ML prediction error: {e}")
-            return None
+            return [None] * len(categories)
     
     def is_loaded(self) -> bool:
         """Check if models are loaded."""
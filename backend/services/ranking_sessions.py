@@ -0,0 +1,203 @@
+"""
+Ranking sessions for interactive spend editing.
+
+A session holds every card's reward contribution from each spend
+category of one spend profile (services.reward_engine.spend_column).
+When one category changes, only that category's column is recomputed;
+the few columns are re-summed and the top k picked with a partial sort.
+A slider move then costs one category's worth of reward work instead of
+all of them, and the ranking is identical to a full /recommend.
+
+Sessions live in the process that created them. They are evicted least
+recently used first once there are too many, or once their arrays exceed
+a memory budget, and they expire after a period without use. A session
+created under an older catalog version is rebuilt from its spend the
+next time it is used.
+
+Configuration:
+    RANKING_SESSIONS           sessions kept per process (default 10000)
+    RANKING_SESSION_MEMORY_MB  memory for all sessions' arrays (default 64)
+    RANKING_SESSION_TTL        seconds an unused session lives (default 1800)
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from services import metrics
+from services.card_schema import CompiledCatalog
+from services.reward_engine import SpendColumn, rank_spend_columns, spend_column
+
+RANKING_SESSIONS = int(os.getenv("RANKING_SESSIONS", 10_000))
+RANKING_SESSION_MEMORY_MB = float(os.getenv("RANKING_SESSION_MEMORY_MB", 64))
+RANKING_SESSION_TTL = float(os.getenv("RANKING_SESSION_TTL", 1800))
+
+
+class RankingSession:
+    """One spend profile with its per-category reward columns."""
+
+    def __init__(self, compiled: CompiledCatalog, version: str, spend: Dict[str, float]):
+        """
+        Args:
+            compiled: Compiled card catalog
+            version: Catalog version ``compiled`` belongs to
+            spend: Dictionary of category -> monthly spend
+        """
+        self.spend = dict(spend)
+        self.updates = 0
+        self.rebuild(compiled, version)
+
+    def rebuild(self, compiled: CompiledCatalog, version: str) -> None:
+        """Recompute every column, for a new catalog version."""
+        self.compiled = compiled
+        self.version = version
+        self.columns: Dict[str, Optional[SpendColumn]] = {
+            category: spend_column(compiled, category, amount) for category, amount in self.spend.items()
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            column[2].nbytes + column[3].nbytes for column in self.columns.values() if column is not None
+        )
+
+    @property
+    def total_monthly_spend(self) -> float:
+        return sum(self.spend.values())
+
+    def update(self, category: str, amount: float) -> None:
+        """Change the spend in one category, recomputing only its column."""
+        self.spend[category] = amount
+        self.columns[category] = spend_column(self.compiled, category, amount)
+        self.updates += 1
+
+    def rank(self, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rank cards for the current spend, as rank_cards_compiled would."""
+        return rank_spend_columns(
+            self.compiled, [self.columns[category] for category in self.spend], self.total_monthly_spend, top_k
+        )
+
+
+class SessionStore:
+    """LRU store of ranking sessions bounded by count, memory and idle time."""
+
+    def __init__(
+        self,
+        max_sessions: int = RANKING_SESSIONS,
+        max_bytes: int = int(RANKING_SESSION_MEMORY_MB * 2**20),
+        ttl: float = RANKING_SESSION_TTL
+    ):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # session id -> (last used, session), least recently used first
+        self._sessions: "OrderedDict[str, Tuple[float, RankingSession]]" = OrderedDict()
+        # Array bytes each session was last counted with
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def create(
+        self,
+        compiled: CompiledCatalog,
+        version: str,
+        spend: Dict[str, float],
+        session_id: Optional[str] = None
+    ) -> Tuple[str, RankingSession]:
+        """
+        Start a session for a spend profile.
+
+        Args:
+            compiled: Compiled card catalog
+            version: Catalog version ``compiled`` belongs to
+            spend: Dictionary of category -> monthly spend
+            session_id: Id to store it under (default a new random id)
+
+        Returns:
+            Tuple of (session id, session)
+        """
+        session = RankingSession(compiled, version, spend)
+        session_id = session_id or uuid.uuid4().hex
+        with self._lock:
+            self._drop(session_id)
+            self._sessions[session_id] = (time.monotonic(), session)
+            self._sizes[session_id] = session.nbytes
+            self.nbytes += session.nbytes
+            self._evict()
+        return session_id, session
+
+    def get(self, session_id: str) -> Optional[RankingSession]:
+        """Look up a session, marking it used; None if unknown, evicted or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or entry[0] + self.ttl <= now:
+                self._drop(session_id)
+                self.misses += 1
+                return None
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return entry[1]
+
+    def resized(self, session_id: str) -> None:
+        """Recount a session's memory after it was updated or rebuilt."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                size = entry[1].nbytes
+                self.nbytes += size - self._sizes[session_id]
+                self._sizes[session_id] = size
+                self._evict()
+
+    def delete(self, session_id: str) -> bool:
+        """Drop a session; returns whether it existed."""
+        with self._lock:
+            return self._drop(session_id)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _drop(self, session_id: str) -> bool:
+        # Called with self._lock held
+        if self._sessions.pop(session_id, None) is None:
+            return False
+        self.nbytes -= self._sizes.pop(session_id)
+        return True
+
+    def _evict(self) -> None:
+        # Called with self._lock held; the most recent session always stays
+        expired_before = time.monotonic() - self.ttl
+        while len(self._sessions) > 1:
+            session_id, (last_used, _) = next(iter(self._sessions.items()))
+            if last_used > expired_before and len(self._sessions) <= self.max_sessions \
+                    and self.nbytes <= self.max_bytes:
+                break
+            self._drop(session_id)
+            self.evictions += 1
+
+
+_session_store: Optional[SessionStore] = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Get the process-wide session store."""
+    global _session_store
+    if _session_store is None:
+        with _session_store_lock:
+            if _session_store is None:
+                _session_store = SessionStore()
+    return _session_store
+
+
+metrics.register_cache("ranking_sessions", lambda: (get_session_store().hits, get_session_store().misses))
+metrics.register_collector(
+    "ranking_sessions_bytes", "Memory held by ranking session arrays.",
+    (), lambda: [((), get_session_store().nbytes)]
+)
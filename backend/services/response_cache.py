@@ -0,0 +1,134 @@
+"""
+In-process cache of rendered recommendation responses.
+
+Requests are canonicalized (amounts rounded to cents, keys sorted) before
+they are computed, so equivalent requests share one entry and the cached
+body is exactly what the canonical request produces. Bodies are stored
+already serialized, so a hit skips ranking, explanation text and JSON
+encoding alike.
+
+Entries belong to one catalog version: the first lookup after a catalog
+reload empties the cache. Every response carries an ETag (a hash of its
+body); requests whose If-None-Match matches get an empty 304.
+
+Bodies are encoded with orjson when it is installed (several times faster
+than json and pydantic for large responses), otherwise with json.
+
+Configuration:
+    RESPONSE_CACHE_SIZE  entries per cache, 0 disables caching (default 4096)
+    RESPONSE_CACHE_TTL   seconds an entry lives (default 300)
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from services import metrics
+from services.api_clients import TTLCache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 4096))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 300))
+
+
+def round_amount(amount: float) -> float:
+    """Canonical form of a money amount: rounded to cents."""
+    return round(float(amount), 2) + 0.0  # + 0.0 folds -0.0 into 0.0
+
+
+def canonical_key(request: Dict[str, Any]) -> str:
+    """Stable cache key for a canonicalized request."""
+    return json.dumps(request, sort_keys=True, separators=(",", ":"))
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode a JSON-ready value (dicts, lists, str, numbers, None) as compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, separators=(",", ":")).encode()
+
+
+def json_response(content: Any, status_code: int = 200) -> Response:
+    """A JSON response encoded with encode_json, bypassing response model validation."""
+    return Response(content=encode_json(content), status_code=status_code, media_type="application/json")
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check a request's If-None-Match header against an ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(
+        (candidate[2:] if candidate.startswith("W/") else candidate) == etag
+        for candidate in candidates
+    )
+
+
+class ResponseCache:
+    """LRU + TTL cache of serialized response bodies for one endpoint."""
+
+    def __init__(self, name: str, maxsize: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        """
+        Args:
+            name: Cache name in metrics (cache_requests_total{cache="response:<name>"})
+            maxsize: Maximum number of entries; 0 disables caching
+            ttl: Seconds an entry stays valid
+        """
+        self.name = name
+        self.ttl = ttl
+        self.enabled = maxsize > 0
+        self._entries = TTLCache(max(maxsize, 1))
+        self._version: Optional[str] = None
+        metrics.register_cache(f"response:{name}", lambda: (self._entries.hits, self._entries.misses))
+
+    def get(self, key: str, version: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Look up a cached (body, etag) for a request under a catalog version.
+
+        A new catalog version invalidates every existing entry.
+        """
+        if not self.enabled:
+            return None
+        if version != self._version:
+            self.clear()
+            self._version = version
+        found, entry = self._entries.get(key)
+        return entry if found else None
+
+    def put(self, key: str, version: str, body: bytes) -> Tuple[bytes, str]:
+        """Store a serialized body and return it with its ETag."""
+        entry = (body, etag_for(body))
+        if self.enabled and version == self._version:
+            self._entries.set(key, entry, self.ttl)
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def cached_response(request: Request, entry: Tuple[bytes, str], hit: bool) -> Response:
+    """
+    Build the HTTP response for a cache entry.
+
+    Returns 304 Not Modified without a body when the client already holds
+    this ETag.
+    """
+    body, etag = entry
+    headers = {"ETag": etag, "X-Cache": "HIT" if hit else "MISS"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
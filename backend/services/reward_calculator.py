@@ -1,13 +1,50 @@
 """
 Reward calculation engine for credit cards.
+
+Category caps have a period (card_schema.CAP_PERIOD_MONTHS): spend counts
+toward a cap from the start of its period, so a 6000 annual grocery cap
+is reached in the sixth month of 1000/month, not never. Annual figures
+step through the year month by month instead of multiplying one month
+by 12. These functions are the reference the vectorized engine
+(services.reward_engine) is checked against.
 """
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Sequence, Tuple
+
+from services.card_schema import CAP_PERIOD_MONTHS, DEFAULT_CAP_PERIOD
+
+# Map frontend categories to backend categories
+CATEGORY_MAP = {
+    'groceries': 'Groceries',
+    'travel': 'Travel',
+    'gas': 'Gas',
+    'dining': 'Dining',
+    'online_shopping': 'Online Shopping',
+}
+
+# Months in an annual projection
+PROJECTION_MONTHS = 12
+
+
+def to_backend_category(category: str) -> str:
+    """Map a frontend spend key (e.g. 'online_shopping') to a card category."""
+    return CATEGORY_MAP.get(category, category.title())
+
+
+def is_capped(card: Dict[str, Any], category: str) -> bool:
+    """Whether a card's rate for a category is capped."""
+    return category in card.get('category_rewards', {}) and category in card.get('category_caps', {})
+
+
+def cap_period_months(card: Dict[str, Any], category: str) -> float:
+    """Months per cap period of a card's cap on a category."""
+    return CAP_PERIOD_MONTHS[card.get('cap_periods', {}).get(category, DEFAULT_CAP_PERIOD)]
 
 
 def calculate_reward(
     card: Dict[str, Any],
     category: str,
-    amount: float
+    amount: float,
+    spent: float = 0.0
 ) -> Tuple[float, float]:
     """
     Calculate reward for a specific category and amount.
@@ -17,6 +54,8 @@ def calculate_reward(
         card: Card dictionary
         category: Purchase category
         amount: Transaction amount
+        spent: Spend already counted toward the category's cap in the
+            current cap period
     
     Returns:
         Tuple of (reward_amount, effective_rate)
@@ -29,10 +68,11 @@ def calculate_reward(
         rate = category_rewards[category]
         # Apply category cap if exists
         if category in category_caps:
-            capped_amount = min(amount, category_caps[category])
+            room = max(category_caps[category] - spent, 0.0)
+            capped_amount = min(amount, room)
             capped_reward = capped_amount * rate
             # Remaining amount uses base rate
-            remaining_amount = max(0, amount - category_caps[category])
+            remaining_amount = max(0, amount - room)
             base_reward = remaining_amount * card.get('base_reward', 0.01)
             total_reward = capped_reward + base_reward
             effective_rate = total_reward / amount if amount > 0 else 0
@@ -45,6 +85,36 @@ def calculate_reward(
     return amount * base_reward, base_reward
 
 
+def calculate_period_rewards(
+    card: Dict[str, Any],
+    category: str,
+    amounts: Sequence[float]
+) -> List[float]:
+    """
+    Calculate rewards for consecutive months of spend in one category.
+
+    Spend counted toward the category's cap accumulates month by month and
+    resets at the start of each cap period.
+
+    Args:
+        card: Card dictionary
+        category: Purchase category
+        amounts: Spend in each month
+
+    Returns:
+        Reward in each month
+    """
+    period = cap_period_months(card, category)
+    spent = 0.0
+    rewards = []
+    for month, amount in enumerate(amounts):
+        if month % period == 0:
+            spent = 0.0
+        rewards.append(calculate_reward(card, category, amount, spent)[0])
+        spent += amount
+    return rewards
+
+
 def calculate_total_rewards(
     card: Dict[str, Any],
     spend: Dict[str, float]
@@ -52,6 +122,9 @@ def calculate_total_rewards(
     """
     Calculate total rewards for a card given spending across categories.
     
+    The same spend is assumed every month of the year. Capped categories
+    are stepped month by month; monthly figures are the average month.
+
     Args:
         card: Card dictionary
         spend: Dictionary of category -> monthly spend
@@ -59,32 +132,31 @@ def calculate_total_rewards(
     Returns:
         Dictionary with reward breakdown
     """
-    monthly_rewards = 0
+    annual_rewards = 0
     category_breakdown = []
     
-    # Map frontend categories to backend categories
-    category_map = {
-        'groceries': 'Groceries',
-        'travel': 'Travel',
-        'gas': 'Gas',
-        'dining': 'Dining',
-        'online_shopping': 'Online Shopping',
-    }
-    
     for frontend_category, amount in spend.items():
         if amount > 0:
-            backend_category = category_map.get(frontend_category, frontend_category.title())
-            reward, effective_rate = calculate_reward(card, backend_category, amount)
-            monthly_rewards += reward
+            backend_category = to_backend_category(frontend_category)
+            if is_capped(card, backend_category):
+                reward = 0.0
+                for month_reward in calculate_period_rewards(card, backend_category, [amount] * PROJECTION_MONTHS):
+                    reward += month_reward
+                effective_rate = reward / (amount * PROJECTION_MONTHS)
+            else:
+                # No cap to track: every month earns the same
+                monthly_reward, effective_rate = calculate_reward(card, backend_category, amount)
+                reward = monthly_reward * PROJECTION_MONTHS
+            annual_rewards += reward
             
             category_breakdown.append({
                 'category': backend_category,
-                'amount': round(reward, 2),
+                'amount': round(reward / PROJECTION_MONTHS, 2),
                 'rate': effective_rate,
                 'spend': amount
             })
     
-    annual_rewards = monthly_rewards * 12
+    monthly_rewards = annual_rewards / PROJECTION_MONTHS
     effective_annual_fee = card.get('annual_fee', 0)
     net_annual_rewards = annual_rewards - effective_annual_fee
     
@@ -0,0 +1,430 @@
+"""
+Vectorized reward engine over a compiled card catalog.
+
+Every catalog snapshot carries its compiled form (services.card_schema):
+dense card x category matrices (reward rates, caps and cap periods) plus
+per-card vectors (base rate, annual fee, signup bonus). Ranking a spend profile is then a few array operations
+per spend category instead of a Python loop per card per category.
+Capped categories are stepped through the year month by month
+(CompiledCatalog.horizon_rewards), with the spend counted toward every
+cap of every profile held in one array.
+
+Results are numerically identical to services.card_ranker.rank_cards;
+``verify_parity`` (also ``python -m services.reward_engine``) checks this.
+"""
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.card_catalog import CatalogSnapshot, get_card_catalog
+from services.card_schema import CompiledCatalog
+from services.reward_calculator import PROJECTION_MONTHS, to_backend_category
+
+# Cells (profiles x cards) scored per chunk in batch ranking, ~32MB per array
+BATCH_CELL_BUDGET = 4_000_000
+
+
+def compile_snapshot(snapshot: CatalogSnapshot) -> CompiledCatalog:
+    """Get the compiled form of a catalog snapshot."""
+    return snapshot.compiled
+
+
+def get_compiled_catalog() -> CompiledCatalog:
+    """Get the compiled form of the current process-wide catalog."""
+    return compile_snapshot(get_card_catalog().snapshot())
+
+
+def round_cents(values: np.ndarray) -> np.ndarray:
+    """
+    Round to 2 decimals exactly like Python's round(x, 2).
+
+    np.round scales by 100 first, which can land on the other side of a
+    half-cent boundary; those few entries are re-rounded in Python.
+    """
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    flat_values = values.reshape(-1)
+    flat_rounded = rounded.reshape(-1)
+    for i in np.flatnonzero(near_half):
+        flat_rounded[i] = round(float(flat_values[i]), 2)
+    return rounded
+
+
+SpendColumn = Tuple[str, float, np.ndarray, np.ndarray]
+
+
+def spend_column(compiled: CompiledCatalog, category: str, amount: float) -> Optional[SpendColumn]:
+    """
+    One spend category's contribution to every card.
+
+    Args:
+        compiled: Compiled card catalog
+        category: Spend category (frontend or backend name)
+        amount: Monthly spend in the category
+
+    Returns:
+        Tuple of (backend category, amount, annual rewards, effective
+        rates) with one entry per card, or None without spend
+    """
+    if amount <= 0:
+        return None
+    backend_category = to_backend_category(category)
+    rewards, effective_rates = compiled.category_rewards(backend_category, amount, PROJECTION_MONTHS)
+    return backend_category, amount, rewards, effective_rates
+
+
+def rank_spend_columns(
+    compiled: CompiledCatalog,
+    columns: Sequence[Optional[SpendColumn]],
+    total_monthly_spend: float,
+    top_k: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Rank cards from per-category contributions (see spend_column).
+
+    Contributions are summed in ``columns`` order, so the same columns
+    always give bit-identical values however they were computed.
+
+    Args:
+        compiled: Compiled card catalog
+        columns: One spend_column result per spend category, in spend order
+        total_monthly_spend: Total monthly spend across categories
+        top_k: Only rank and build the best ``top_k`` cards (default all)
+
+    Returns:
+        List of ranked cards, identical to (a prefix of) card_ranker.rank_cards
+    """
+    n_cards = len(compiled)
+    columns = [column for column in columns if column is not None]
+    annual = np.zeros(n_cards)
+    for _, _, rewards, _ in columns:
+        annual += rewards
+
+    monthly = annual / PROJECTION_MONTHS
+    net_annual = annual - compiled.annual_fees
+    monthly_spend_requirement = compiled.signup_requirements / 3  # Typically 3 months
+    eligible = (monthly_spend_requirement > 0) & (total_monthly_spend >= monthly_spend_requirement)
+    net_annual_rounded = round_cents(net_annual)
+    first_year = round_cents(np.where(eligible, net_annual_rounded + compiled.signup_bonuses, net_annual_rounded))
+
+    if top_k is None:
+        # Stable descending sort, matching list.sort(reverse=True)
+        order = np.argsort(-first_year, kind='stable')
+    else:
+        # Same order, but only the top k are ever sorted
+        order = top_k_indices(first_year[None, :], top_k)[0]
+
+    monthly_list = monthly[order].tolist()
+    annual_list = annual[order].tolist()
+    net_list = net_annual_rounded[order].tolist()
+    first_year_list = first_year[order].tolist()
+    eligible_list = eligible[order].tolist()
+    column_lists = [
+        (category, amount, (rewards[order] / PROJECTION_MONTHS).tolist(), rates[order].tolist())
+        for category, amount, rewards, rates in columns
+    ]
+
+    ranked_cards = []
+    for n, i in enumerate(order.tolist()):
+        card = compiled.card(i)
+        monthly_rewards = monthly_list[n]
+        ranked_cards.append({
+            'card_name': card['name'],
+            'issuer': compiled.issuers[i],
+            'reward_value_monthly': round(monthly_rewards, 2),
+            'reward_value_yearly': round(annual_list[n], 2),
+            'net_annual_rewards': net_list[n],
+            'category_strengths': compiled.category_strengths(i),
+            'signup_bonus_value': card.get('signup_bonus', 0) if eligible_list[n] else 0,
+            'effective_annual_fee': card.get('annual_fee', 0),
+            'overall_rate': monthly_rewards / total_monthly_spend if total_monthly_spend > 0 else 0,
+            'first_year_value': first_year_list[n],
+            'category_breakdown': [
+                {
+                    'category': category,
+                    'amount': round(rewards[n], 2),
+                    'rate': rates[n],
+                    'spend': amount
+                }
+                for category, amount, rewards, rates in column_lists
+            ],
+            'signup_bonus_eligible': eligible_list[n],
+            'card_data': card,
+        })
+
+    return ranked_cards
+
+
+def rank_cards_compiled(
+    compiled: CompiledCatalog,
+    spend: Dict[str, float],
+    top_k: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Rank cards based on total reward value using the compiled catalog.
+
+    Args:
+        compiled: Compiled card catalog
+        spend: Dictionary of category -> monthly spend
+        top_k: Only rank and build the best ``top_k`` cards (default all)
+
+    Returns:
+        List of ranked cards, identical to card_ranker.rank_cards
+    """
+    columns = [spend_column(compiled, category, amount) for category, amount in spend.items()]
+    return rank_spend_columns(compiled, columns, sum(spend.values()), top_k)
+
+
+def top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Select the k best columns per row, highest value first.
+
+    Ties are broken by column index, matching a stable descending sort, but
+    only k candidates per row are ever sorted.
+
+    Args:
+        values: Array of shape (rows, columns)
+        k: Number of columns to keep per row
+
+    Returns:
+        Integer array of shape (rows, min(k, columns))
+    """
+    n_rows, n_columns = values.shape
+    k = min(k, n_columns)
+    if k == 0:
+        return np.empty((n_rows, 0), dtype=np.intp)
+    if k < n_columns:
+        kth = -np.partition(-values, k - 1, axis=1)[:, k - 1:k]
+        above = values > kth
+        # Fill the remaining slots with the lowest-indexed ties at the kth value
+        ties = values == kth
+        needed = k - above.sum(axis=1, keepdims=True)
+        selected = above | (ties & (np.cumsum(ties, axis=1) <= needed))
+        candidates = np.nonzero(selected)[1].reshape(n_rows, k)
+    else:
+        candidates = np.broadcast_to(np.arange(n_columns), (n_rows, n_columns))
+    candidate_values = np.take_along_axis(values, candidates, axis=1)
+    order = np.lexsort((candidates, -candidate_values), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def score_profiles(
+    compiled: CompiledCatalog,
+    spend_matrix: np.ndarray,
+    spend_keys: Sequence[str]
+) -> Dict[str, np.ndarray]:
+    """
+    Score many spend profiles against every card at once.
+
+    Args:
+        compiled: Compiled card catalog
+        spend_matrix: Array of shape (profiles, len(spend_keys)) of monthly spend
+        spend_keys: Spend category keys (frontend or backend names) per column
+
+    Returns:
+        Dictionary of (profiles, cards) arrays: monthly_rewards,
+        annual_rewards, net_annual_rewards, first_year_value and
+        signup_bonus_eligible, plus total_monthly_spend per profile
+    """
+    n_profiles = spend_matrix.shape[0]
+    total_monthly_spend = spend_matrix.sum(axis=1)
+    annual = np.zeros((n_profiles, len(compiled)))
+    for k, key in enumerate(spend_keys):
+        amounts = np.maximum(spend_matrix[:, k:k + 1], 0)
+        annual += compiled.horizon_rewards(to_backend_category(key), amounts, PROJECTION_MONTHS)
+
+    monthly = annual / PROJECTION_MONTHS
+    net_annual = round_cents(annual - compiled.annual_fees)
+    monthly_spend_requirement = compiled.signup_requirements / 3  # Typically 3 months
+    eligible = (monthly_spend_requirement > 0) & (total_monthly_spend[:, None] >= monthly_spend_requirement)
+    first_year = round_cents(np.where(eligible, net_annual + compiled.signup_bonuses, net_annual))
+    return {
+        'total_monthly_spend': total_monthly_spend,
+        'monthly_rewards': monthly,
+        'annual_rewards': annual,
+        'net_annual_rewards': net_annual,
+        'first_year_value': first_year,
+        'signup_bonus_eligible': eligible,
+    }
+
+
+def iter_top_card_arrays(
+    compiled: CompiledCatalog,
+    spend_matrix: np.ndarray,
+    spend_keys: Sequence[str],
+    top_k: int = 3,
+    chunk_size: Optional[int] = None
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Rank many spend profiles in chunks, yielding the top-k cards as arrays.
+
+    Each chunk is scored as one profiles x cards matrix computation, so
+    memory stays bounded by ``chunk_size * len(compiled)`` regardless of
+    batch size. Ordering matches rank_cards' first_year_value ranking.
+
+    Args:
+        compiled: Compiled card catalog
+        spend_matrix: Array of shape (profiles, len(spend_keys)) of monthly spend
+        spend_keys: Spend category keys per column
+        top_k: Number of cards to return per profile
+        chunk_size: Profiles per chunk (defaults to a ~4M-cell budget)
+
+    Yields:
+        For each chunk, a dictionary of (chunk profiles, top_k) arrays:
+        card (catalog index), first_year_value, net_annual_rewards,
+        estimated_monthly_rewards, estimated_annual_rewards and
+        signup_bonus_eligible, plus total_monthly_spend per profile
+    """
+    if chunk_size is None:
+        chunk_size = max(1, BATCH_CELL_BUDGET // max(1, len(compiled)))
+    for start in range(0, spend_matrix.shape[0], chunk_size):
+        scores = score_profiles(compiled, spend_matrix[start:start + chunk_size], spend_keys)
+        top = top_k_indices(scores['first_year_value'], top_k)
+        rows = np.arange(top.shape[0])[:, None]
+        yield {
+            'card': top,
+            'first_year_value': scores['first_year_value'][rows, top],
+            'net_annual_rewards': scores['net_annual_rewards'][rows, top],
+            'estimated_monthly_rewards': round_cents(scores['monthly_rewards'][rows, top]),
+            'estimated_annual_rewards': round_cents(scores['annual_rewards'][rows, top]),
+            'signup_bonus_eligible': scores['signup_bonus_eligible'][rows, top],
+            'total_monthly_spend': scores['total_monthly_spend'],
+        }
+
+
+def iter_top_cards(
+    compiled: CompiledCatalog,
+    spend_matrix: np.ndarray,
+    spend_keys: Sequence[str],
+    top_k: int = 3,
+    chunk_size: Optional[int] = None
+) -> Iterator[List[List[Dict[str, Any]]]]:
+    """
+    Rank many spend profiles in chunks, yielding the top-k cards of each.
+
+    Same chunking and arguments as iter_top_card_arrays.
+
+    Yields:
+        For each chunk, one list of top card dictionaries per profile
+    """
+    for arrays in iter_top_card_arrays(compiled, spend_matrix, spend_keys, top_k, chunk_size):
+        first_year = arrays['first_year_value'].tolist()
+        net_annual = arrays['net_annual_rewards'].tolist()
+        monthly = arrays['estimated_monthly_rewards'].tolist()
+        annual = arrays['estimated_annual_rewards'].tolist()
+        eligible = arrays['signup_bonus_eligible'].tolist()
+        chunk = []
+        for r, card_indices in enumerate(arrays['card'].tolist()):
+            chunk.append([
+                {
+                    'card_name': compiled.names[i],
+                    'issuer': compiled.issuers[i],
+                    'first_year_value': first_year[r][c],
+                    'net_annual_rewards': net_annual[r][c],
+                    'estimated_monthly_rewards': monthly[r][c],
+                    'estimated_annual_rewards': annual[r][c],
+                    'signup_bonus_eligible': eligible[r][c],
+                }
+                for c, i in enumerate(card_indices)
+            ])
+        yield chunk
+
+
+def iter_batch_results(
+    compiled: CompiledCatalog,
+    ids: Sequence[Any],
+    spend_matrix: np.ndarray,
+    spend_keys: Sequence[str],
+    top_k: int = 3,
+    chunk_size: Optional[int] = None
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Batch ranking results chunk by chunk, as served by /recommend/batch.
+
+    Each result carries the profile's id and total monthly spend; profiles
+    with no spend get an error instead of cards.
+
+    Yields:
+        For each chunk of profiles, one result dictionary per profile
+    """
+    totals = spend_matrix.sum(axis=1).tolist()
+    row = 0
+    for chunk in iter_top_cards(compiled, spend_matrix, spend_keys, top_k, chunk_size):
+        results = []
+        for top_cards in chunk:
+            result = {"id": ids[row], "total_monthly_spend": totals[row], "top_cards": top_cards}
+            if totals[row] <= 0:
+                result["top_cards"] = []
+                result["error"] = "Total spend must be greater than 0"
+            results.append(result)
+            row += 1
+        yield results
+
+
+def verify_parity(
+    cards: Sequence[Dict[str, Any]],
+    spend_profiles: Iterable[Dict[str, float]]
+) -> List[str]:
+    """
+    Compare the compiled engine against card_ranker.rank_cards, in full
+    and with top_k.
+
+    Args:
+        cards: Card dictionaries to rank
+        spend_profiles: Spend profiles to rank them against
+
+    Returns:
+        Descriptions of every mismatch (empty when the engines agree)
+    """
+    from services.card_ranker import rank_cards
+
+    compiled = CompiledCatalog.from_cards(cards)
+    mismatches = []
+    for spend in spend_profiles:
+        expected = rank_cards(list(cards), spend)
+        actual = rank_cards_compiled(compiled, spend)
+        if expected != actual:
+            for position, (want, got) in enumerate(zip(expected, actual)):
+                if want != got:
+                    mismatches.append(f"{spend}: rank {position}: expected {want} got {got}")
+                    break
+            else:
+                mismatches.append(f"{spend}: expected {len(expected)} cards got {len(actual)}")
+        # Top-k selection must give a prefix of the full ranking in both engines
+        for top_k in (1, 3):
+            if not (rank_cards(list(cards), spend, top_k) == rank_cards_compiled(compiled, spend, top_k)
+                    == expected[:top_k]):
+                mismatches.append(f"{spend}: top {top_k} differs from the full ranking")
+    return mismatches
+
+
+def random_spend_profiles(count: int, seed: int = 0) -> List[Dict[str, float]]:
+    """Generate spend profiles exercising caps, zeros and odd cents."""
+    rng = random.Random(seed)
+    keys = ['groceries', 'travel', 'gas', 'dining', 'online_shopping', 'drugstores', 'entertainment']
+    profiles = []
+    for _ in range(count):
+        profile = {}
+        for key in keys:
+            roll = rng.random()
+            if roll < 0.3:
+                profile[key] = 0.0
+            elif roll < 0.5:
+                profile[key] = float(rng.choice([500, 1500, 2000, 2500, 6000]))
+            else:
+                profile[key] = round(rng.uniform(0, 8000), rng.choice([0, 2, 3]))
+        profiles.append(profile)
+    return profiles
+
+
+if __name__ == "__main__":
+    import sys
+
+    catalog_cards = get_card_catalog().snapshot().cards
+    problems = verify_parity(catalog_cards, random_spend_profiles(2000))
+    for problem in problems[:20]:
+        print(problem)
+    print(f"{len(problems)} mismatches across 2000 profiles, {len(catalog_cards)} cards")
+    sys.exit(1 if problems else 0)
@@ -1,7 +1,7 @@
 """
 Reward optimization service for credit card recommendations.
 """
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from pathlib import Path
 import sys
 
@@ -9,22 +9,26 @@ import sys
 BACKEND_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BACKEND_DIR))
 
-from services.card_loader import load_cards_from_csv
+from services import metrics
+from services.card_catalog import get_card_catalog
 from services.merchant_resolver import resolve_merchant_to_category
+from services.rule_engine import evaluate_all_cards, get_rule_tables
 
 
 class RewardOptimizer:
     """Service for optimizing credit card rewards."""
     
     def __init__(self):
-        self.cards = load_cards_from_csv()
+        self.catalog = get_card_catalog()
     
     def optimize(
         self,
         merchant: str,
         amount: float,
         ml_prediction: Optional[str] = None,
-        confidence: float = 0.85
+        confidence: float = 0.85,
+        merchant_info: Optional[Dict[str, Any]] = None,
+        top_k: Optional[int] = None
     ) -> Dict:
         """
         Optimize reward by finding the best credit card.
@@ -34,17 +38,29 @@ class RewardOptimizer:
             amount: Transaction amount
             ml_prediction: Optional ML model prediction
             confidence: Confidence score
+            merchant_info: Already-resolved merchant info, to avoid resolving twice
+            top_k: Only return the best ``top_k`` alternatives (all when None)
         
         Returns:
             Dictionary with optimization results
+
+        Raises:
+            ValueError: If top_k is less than 1, or there are no cards
         """
-        # Resolve merchant to category
-        merchant_info = resolve_merchant_to_category(merchant)
+        if top_k is not None and top_k < 1:
+            raise ValueError(f"top_k must be at least 1, got {top_k}")
+
+        # Resolve merchant to category unless the caller already did
+        if merchant_info is None:
+            merchant_info = resolve_merchant_to_category(merchant)
         category = merchant_info["category"]
         mcc_code = merchant_info.get("mcc_code")
         
-        # Evaluate all cards
-        all_results = evaluate_all_cards(category, amount)
+        # Rank cards via the precomputed per-category tables; one extra
+        # result covers the best card itself
+        with metrics.span("evaluate_all_cards"):
+            tables = get_rule_tables()
+            all_results = tables.evaluate(category, amount, None if top_k is None else top_k + 1)
         
         if not all_results:
             raise ValueError("No cards available")
@@ -58,6 +74,11 @@ class RewardOptimizer:
                 (r for r in all_results if r["card_name"] == ml_prediction),
                 None
             )
+            if ml_result is None and top_k is not None:
+                # The prediction may rank below the returned top-k
+                ml_result = tables.evaluate_card(ml_prediction, category, amount)
+                if ml_result is not None:
+                    all_results = [ml_result] + all_results
             if ml_result:
                 best_card = ml_prediction
                 if ml_prediction == rule_best:
@@ -91,6 +112,8 @@ class RewardOptimizer:
             for result in all_results
             if result["card_name"] != best_card
         ]
+        if top_k is not None:
+            alternatives = alternatives[:top_k]
         
         return {
             "best_card": best_card,
@@ -104,7 +127,7 @@ class RewardOptimizer:
     
     def get_all_cards(self) -> List[Dict]:
         """Get all available credit cards."""
-        return self.cards
+        return self.catalog.snapshot().cards
     
     def compare_cards(self, category: str, amount: float) -> List[Dict]:
         """Compare all cards for a given transaction."""
@@ -1,37 +1,41 @@
 """
 Rule engine for computing credit card rewards based on card rules.
+
+Card rules come from the canonical card catalog. Per category they are
+compiled into a lookup table: the card order by reward rate plus the
+sorted cap breakpoints. Without caps the ranking for a category is the
+same at every amount; caps only move the cards whose cap the amount
+exceeds. Answering "best card for category X at amount Y" is therefore a
+dictionary lookup, a binary search over the breakpoints and a merge of
+the few over-cap cards into the precomputed order.
 """
-import json
-from typing import Dict, List
-from pathlib import Path
+import heapq
+from bisect import bisect_left
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 
-BACKEND_DIR = Path(__file__).resolve().parent.parent
-DATA_DIR = BACKEND_DIR / "data"
+from services.card_catalog import CatalogSnapshot, get_card_catalog
+from services.card_schema import CompiledCatalog
 
 
 def load_card_rules() -> List[Dict]:
-    """Load credit card reward rules from JSON (fallback)."""
-    cards_path = DATA_DIR / "cards.json"
-    try:
-        with open(cards_path, 'r') as f:
-            data = json.load(f)
-        return data.get("cards", [])
-    except FileNotFoundError:
-        # Fallback to CSV loader
-        from services.card_loader import load_cards_from_csv
-        return load_cards_from_csv()
-    except json.JSONDecodeError as e:
-        print(f"Error parsing cards.json: {e}")
-        from services.card_loader import load_cards_from_csv
-        return load_cards_from_csv()
+    """Load credit card reward rules from the canonical card catalog."""
+    return get_card_catalog().snapshot().cards
 
 
 def compute_reward(card: Dict, category: str, amount: float) -> float:
     """Compute reward for a card given category and amount."""
     category_rewards = card.get("category_rewards", {})
-    if category in category_rewards:
-        return amount * category_rewards[category]
     base_reward = card.get("base_reward", 0.01)
+    if category in category_rewards:
+        rate = category_rewards[category]
+        cap = card.get("category_caps", {}).get(category)
+        if cap is not None and amount > cap:
+            # Spend above the cap earns the base rate
+            return cap * rate + (amount - cap) * base_reward
+        return amount * rate
     return amount * base_reward
 
 
@@ -43,19 +47,119 @@ def get_reward_rate(card: Dict, category: str) -> float:
     return card.get("base_reward", 0.01)
 
 
-def evaluate_all_cards(category: str, amount: float) -> List[Dict]:
-    """Evaluate all cards for a given transaction."""
-    cards = load_card_rules()
-    results = []
-    for card in cards:
-        reward = compute_reward(card, category, amount)
-        rate = get_reward_rate(card, category)
-        results.append({
-            "card_name": card["name"],
+class CategoryTable:
+    """Precomputed ranking structure for one category."""
+
+    def __init__(self, compiled: CompiledCatalog, column: Optional[int]):
+        if column is None:
+            rates = compiled.base_rates
+            caps = np.full(len(compiled), np.inf)
+        else:
+            rates = compiled.rates[:, column]
+            caps = compiled.caps[:, column]
+        self.rates: List[float] = rates.tolist()
+        self.base_rates: List[float] = compiled.base_rates.tolist()
+        # Order while every card earns its category rate on the full amount
+        self.order: List[int] = np.lexsort((np.arange(len(compiled)), -rates)).tolist()
+
+        capped = np.flatnonzero(np.isfinite(caps))
+        by_cap = capped[np.argsort(caps[capped], kind='stable')]
+        # Amounts above breakpoints[j] push capped_cards[j] past its cap
+        self.breakpoints: List[float] = caps[by_cap].tolist()
+        self.capped_cards: List[int] = by_cap.tolist()
+        self.caps: Dict[int, float] = dict(zip(self.capped_cards, self.breakpoints))
+
+    def reward(self, i: int, amount: float) -> float:
+        """Reward for card i, matching compute_reward."""
+        cap = self.caps.get(i)
+        if cap is not None and amount > cap:
+            return cap * self.rates[i] + (amount - cap) * self.base_rates[i]
+        return amount * self.rates[i]
+
+
+class RuleTables:
+    """Per-category lookup tables for a catalog snapshot."""
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.snapshot = snapshot
+        self.compiled = snapshot.compiled
+        self.tables = {
+            category: CategoryTable(self.compiled, j)
+            for category, j in self.compiled.category_index.items()
+        }
+        # Categories no card rewards specially rank by base rate
+        self.default_table = CategoryTable(self.compiled, None)
+
+    def _result(self, i: int, table: CategoryTable, reward: float) -> Dict:
+        return {
+            "card_name": self.compiled.names[i],
             "reward_amount": round(reward, 2),
-            "reward_rate": rate,
-            "card_data": card
-        })
-    results.sort(key=lambda x: x["reward_amount"], reverse=True)
-    return results
+            "reward_rate": table.rates[i],
+            "card_data": self.compiled.card(i)
+        }
+
+    def _iter_by_reward(self, table: CategoryTable, amount: float) -> Iterator[Tuple[float, int]]:
+        """Yield (reward, card index) in descending reward order, ties by index."""
+        over_cap = table.capped_cards[:bisect_left(table.breakpoints, amount)]
+        if not over_cap:
+            for i in table.order:
+                yield amount * table.rates[i], i
+            return
+
+        skip = set(over_cap)
+        linear = ((-(amount * table.rates[i]), i) for i in table.order if i not in skip)
+        capped = sorted((-table.reward(i, amount), i) for i in over_cap)
+        for negative_reward, i in heapq.merge(linear, capped):
+            yield -negative_reward, i
+
+    def evaluate(self, category: str, amount: float, top_k: Optional[int] = None) -> List[Dict]:
+        """
+        Rank cards for one transaction.
+
+        Ordering matches sorting every card by rounded reward (descending,
+        stable), but only the first ``top_k`` results are materialized.
+        """
+        table = self.tables.get(category, self.default_table)
+        if amount <= 0:
+            # Rewards are not increasing in rate here; rank the slow way
+            results = [self._result(i, table, table.reward(i, amount)) for i in range(len(self.compiled))]
+            results.sort(key=lambda x: x["reward_amount"], reverse=True)
+            return results if top_k is None else results[:top_k]
+
+        results = []
+        ranked = ((round(reward, 2), reward, i) for reward, i in self._iter_by_reward(table, amount))
+        # Cards whose rewards round to the same cents keep catalog order
+        for _, tied in groupby(ranked, key=lambda x: x[0]):
+            for _, reward, i in sorted(tied, key=lambda x: x[2]):
+                results.append(self._result(i, table, reward))
+            if top_k is not None and len(results) >= top_k:
+                return results[:top_k]
+        return results
+
+    def evaluate_card(self, card_name: str, category: str, amount: float) -> Optional[Dict]:
+        """Evaluate a single card by name for one transaction."""
+        i = self.snapshot.index_of(card_name)
+        if i is None:
+            return None
+        table = self.tables.get(category, self.default_table)
+        return self._result(i, table, table.reward(i, amount))
+
+
+def get_rule_tables() -> RuleTables:
+    """Get lookup tables for the current catalog, built once per snapshot."""
+    return get_card_catalog().snapshot().derived("rule_tables", RuleTables)
+
+
+def evaluate_all_cards(category: str, amount: float, top_k: Optional[int] = None) -> List[Dict]:
+    """
+    Evaluate all cards for a given transaction.
+
+    Args:
+        category: Purchase category
+        amount: Transaction amount
+        top_k: Only return the best ``top_k`` cards (all cards when None)
 
+    Returns:
+        Cards ranked by reward amount
+    """
+    return get_rule_tables().evaluate(category, amount, top_k)
@@ -0,0 +1,395 @@
+"""
+Monte Carlo simulation of a card's net value over the coming months.
+
+A single monthly projection (calculate_total_rewards x 12) hides how much
+the outcome depends on which months a user actually has. The simulator
+bootstraps spend trajectories from the user's monthly history (e.g. the
+``by_month`` totals of a ledger, services.ledger_ingest): each simulated
+month is a month drawn at random from the history, optionally scaled by a
+random spend level (``volatility``). Every card is then evaluated month
+by month:
+
+- spend counts toward category caps from the start of each cap period,
+  with the overflow earning the card's base rate (as in reward_calculator)
+- the annual fee is charged at the start of every card year
+- the signup bonus is paid in the month cumulative spend reaches its
+  requirement, if that happens within the bonus window (3 months)
+
+Apart from caps spanning several months, a month's reward depends only
+on that month's spend, and a path can only draw from a few hundred
+distinct months (history months x spend levels). Each of those is priced
+once for every card; a path's horizon reward is then its draw counts
+times those rewards, one (cards x states) @ (states x paths) product.
+Multi-month caps are stepped along every path, with the spend counted
+toward each held in one (paths x caps) array. Per-month bands are only
+built for the top cards.
+
+Usage:
+    python -m services.savings_simulator data/user_spend_raw.csv --months 24
+"""
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.card_schema import CompiledCatalog
+from services.reward_calculator import to_backend_category
+from services.reward_engine import BATCH_CELL_BUDGET
+
+SIGNUP_WINDOW_MONTHS = 3  # Typically 3 months, as in calculate_signup_bonus_value
+PERCENTILES = (5, 25, 50, 75, 95)
+# Discrete spend levels per history month when volatility is set
+NOISE_LEVELS = 15
+
+
+class MonthlyRewardModel:
+    """
+    Monthly reward of every card for many spend rows at once.
+
+    Monthly caps only depend on the month's own spend (``rewards``). Caps
+    with longer periods are "buckets" that fill up over a path's months
+    (``bucket_rewards``); a path's reward in a month is the sum of both.
+    """
+
+    def __init__(self, compiled: CompiledCatalog, categories: Sequence[str], cards: Optional[np.ndarray] = None):
+        """
+        Args:
+            compiled: Compiled card catalog
+            categories: Spend category keys (frontend or backend names), one
+                per spend column
+            cards: Card indices to model (default: all, in catalog order)
+        """
+        if cards is None:
+            cards = np.arange(len(compiled))
+        self.cards = cards
+        base_rates = compiled.base_rates[cards]
+        backend = [to_backend_category(key) for key in categories]
+        columns = [compiled.category_columns(category) for category in backend]
+        shape = (len(columns), len(cards))
+        rates = np.array([column[0][cards] for column in columns]).reshape(shape)
+        caps = np.array([column[1][cards] for column in columns]).reshape(shape)
+        periods = np.array([compiled.category_periods(category)[cards] for category in backend]).reshape(shape)
+        capped = np.isfinite(caps)
+        monthly = capped & (periods == 1)
+
+        # Capped categories are priced at the base rate here and topped up
+        # per cap slot or bucket below
+        self.linear = np.where(capped, base_rates, rates)
+
+        # Slot s holds each card's s-th monthly-capped category (cap inf,
+        # bonus 0 if none)
+        n_slots = int(monthly.sum(axis=0).max(initial=0))
+        self.slot_columns = np.zeros((n_slots, len(cards)), dtype=np.intp)
+        self.slot_caps = np.full((n_slots, len(cards)), np.inf)
+        self.slot_bonus = np.zeros((n_slots, len(cards)))
+        used = np.zeros(len(cards), dtype=np.intp)
+        for card, column in zip(*np.nonzero(monthly.T)):
+            slot = used[card]
+            used[card] += 1
+            self.slot_columns[slot, card] = column
+            self.slot_caps[slot, card] = caps[column, card]
+            self.slot_bonus[slot, card] = rates[column, card] - base_rates[card]
+
+        # One bucket per (card, category) cap spanning several months,
+        # ordered by card
+        self.bucket_cards, self.bucket_columns = np.nonzero((capped & ~monthly).T)
+        self.bucket_caps = caps[self.bucket_columns, self.bucket_cards]
+        self.bucket_bonus = rates[self.bucket_columns, self.bucket_cards] - base_rates[self.bucket_cards]
+        self.bucket_months = periods[self.bucket_columns, self.bucket_cards]
+        # Cards with buckets and where each one's buckets start
+        self.bucket_owners, self.bucket_starts = np.unique(self.bucket_cards, return_index=True)
+
+    def rewards(self, spend: np.ndarray) -> np.ndarray:
+        """
+        Rewards that depend only on the month's own spend.
+
+        Args:
+            spend: Array of shape (rows, categories), negative spend counts as 0
+
+        Returns:
+            Array of shape (rows, cards)
+        """
+        spend = np.maximum(spend, 0)
+        rewards = spend @ self.linear
+        for columns, caps, bonus in zip(self.slot_columns, self.slot_caps, self.slot_bonus):
+            rewards += np.minimum(spend[:, columns], caps) * bonus
+        return rewards
+
+    def bucket_rewards(self, states: np.ndarray, path_states: np.ndarray) -> np.ndarray:
+        """
+        Step multi-month caps through every path, month by month.
+
+        The spend counted toward each bucket is tracked as one (paths x
+        buckets) array and resets at the start of the bucket's period.
+
+        Args:
+            states: Spend states, shape (states, categories)
+            path_states: State drawn for each path and month, shape (paths, months)
+
+        Returns:
+            Array of shape (paths, months, cards) of bonus rewards on top
+            of the base rate
+        """
+        n_paths, n_months = path_states.shape
+        state_amounts = states[:, self.bucket_columns]
+        spent = np.zeros((n_paths, len(self.bucket_caps)))
+        rewards = np.zeros((n_paths, n_months, len(self.cards)))
+        if len(self.bucket_caps) == 0:
+            return rewards
+        for month in range(n_months):
+            amounts = state_amounts[path_states[:, month]]
+            spent[:, month % self.bucket_months == 0] = 0
+            bonus = np.minimum(amounts, np.maximum(self.bucket_caps - spent, 0)) * self.bucket_bonus
+            rewards[:, month, self.bucket_owners] = np.add.reduceat(bonus, self.bucket_starts, axis=1)
+            spent += amounts
+        return rewards
+
+    def bucket_totals(self, states: np.ndarray, path_states: np.ndarray) -> np.ndarray:
+        """
+        Total bonus from multi-month caps over each whole path.
+
+        Within one period the spend earning the bonus rate is
+        min(period spend, cap) however it falls across the period's
+        months, so only per-period category totals are needed.
+
+        Args:
+            states: Spend states, shape (states, categories)
+            path_states: State drawn for each path and month, shape (paths, months)
+
+        Returns:
+            Array of shape (len(bucket_owners), paths)
+        """
+        n_paths, n_months = path_states.shape
+        # Cumulative spend per category after each month, (categories, months + 1, paths)
+        cumulative = np.zeros((states.shape[1], n_months + 1, n_paths))
+        np.cumsum(states.T[:, path_states.T], axis=1, out=cumulative[:, 1:])
+        totals = np.zeros((len(self.bucket_caps), n_paths))
+        for period in np.unique(self.bucket_months):
+            buckets = np.flatnonzero(self.bucket_months == period)
+            columns = self.bucket_columns[buckets]
+            caps = self.bucket_caps[buckets, None]
+            bonus = self.bucket_bonus[buckets, None]
+            step = n_months if np.isinf(period) else int(period)
+            bounds = list(range(0, n_months, step)) + [n_months]
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                period_spend = (cumulative[:, stop] - cumulative[:, start])[columns]
+                totals[buckets] += np.minimum(period_spend, caps) * bonus
+        return np.add.reduceat(totals, self.bucket_starts, axis=0) if len(self.bucket_caps) else totals
+
+
+def history_matrix(history: Sequence[Dict[str, float]]) -> Tuple[List[str], np.ndarray]:
+    """
+    Stack monthly spend dictionaries into a (months, categories) matrix.
+
+    Keys are mapped to card categories first, so keys sharing a category
+    (and so its cap) share a column.
+
+    Returns:
+        Tuple of (card categories, matrix); categories missing from a month are 0
+    """
+    categories = sorted({to_backend_category(key) for month in history for key in month})
+    column_index = {category: j for j, category in enumerate(categories)}
+    matrix = np.zeros((len(history), len(categories)))
+    for row, month in enumerate(history):
+        for key, amount in month.items():
+            matrix[row, column_index[to_backend_category(key)]] += amount
+    return categories, np.maximum(matrix, 0)
+
+
+def spend_states(history: np.ndarray, volatility: float = 0.0) -> np.ndarray:
+    """
+    Every month a trajectory can draw, all equally likely.
+
+    Each history month is combined with each of NOISE_LEVELS spend levels:
+    equiprobable quantiles of a mean-one lognormal multiplier with sigma
+    ``volatility``. Keeping the states discrete means each one is priced
+    once, however many paths draw it.
+
+    Args:
+        history: Array of shape (history months, categories)
+        volatility: Sigma of the month-level spend multiplier (0 for a
+            plain bootstrap)
+
+    Returns:
+        Array of shape (states, categories)
+    """
+    if volatility <= 0:
+        return history
+    normal = NormalDist()
+    levels = np.exp([volatility * normal.inv_cdf((i + 0.5) / NOISE_LEVELS) for i in range(NOISE_LEVELS)])
+    levels /= levels.mean()
+    return (history[:, None, :] * levels[None, :, None]).reshape(-1, history.shape[1])
+
+
+def _bonus_months(compiled: CompiledCatalog, cards: np.ndarray, path_spend: np.ndarray) -> np.ndarray:
+    """
+    Month (0-based) each path earns each card's signup bonus, or -1 if it
+    misses the window. ``path_spend`` is total spend per month, shape
+    (paths, months).
+    """
+    window = min(SIGNUP_WINDOW_MONTHS, path_spend.shape[1])
+    requirements = compiled.signup_requirements[cards]
+    met = np.cumsum(path_spend[:, :window], axis=1)[:, :, None] >= requirements
+    earned = met[:, -1] & (requirements > 0)
+    return np.where(earned, met.argmax(axis=1), -1)
+
+
+def net_value_bands(
+    compiled: CompiledCatalog,
+    categories: Sequence[str],
+    states: np.ndarray,
+    path_states: np.ndarray,
+    cards: np.ndarray
+) -> np.ndarray:
+    """
+    Cumulative net value of some cards after every month of every path.
+
+    Args:
+        compiled: Compiled card catalog
+        categories: Card category of each state column
+        states: Spend states, shape (states, categories)
+        path_states: State drawn for each path and month, shape (paths, months)
+        cards: Card indices
+
+    Returns:
+        Array of shape (paths, months, cards)
+    """
+    n_months = path_states.shape[1]
+    model = MonthlyRewardModel(compiled, categories, cards)
+    rewards = model.rewards(states)[path_states] + model.bucket_rewards(states, path_states)
+    values = np.cumsum(rewards, axis=1)
+    months = np.arange(n_months)
+    values -= (months // 12 + 1)[:, None] * compiled.annual_fees[cards]
+    bonus_months = _bonus_months(compiled, cards, states.sum(axis=1)[path_states])
+    paid_from = np.where(bonus_months < 0, n_months, bonus_months)
+    values += np.where(months[None, :, None] >= paid_from[:, None, :], compiled.signup_bonuses[cards], 0)
+    return values
+
+
+def simulate_savings(
+    compiled: CompiledCatalog,
+    history: Sequence[Dict[str, float]],
+    months: int = 12,
+    paths: int = 2000,
+    volatility: float = 0.0,
+    top_k: int = 5,
+    seed: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Simulate every card over bootstrapped spend trajectories.
+
+    Args:
+        compiled: Compiled card catalog
+        history: Monthly spend dictionaries (category -> amount), one per
+            observed month
+        months: Months per trajectory
+        paths: Number of trajectories
+        volatility: Sigma of the month-level spend multiplier
+        top_k: Number of cards returned, by median net value
+        seed: Random seed for reproducible results
+
+    Returns:
+        Dictionary with the top cards' net value percentiles over the
+        horizon, their percentile bands of cumulative net value per
+        month, and the probability of earning each signup bonus
+    """
+    categories, history_array = history_matrix(history)
+    states = spend_states(history_array, volatility)
+    rng = np.random.default_rng(seed)
+    path_states = rng.integers(0, len(states), size=(paths, months))
+
+    # Paths only differ in how often they draw each state, so the horizon
+    # rewards are (cards x states) state rewards @ (states x paths) counts;
+    # cards are rows so the percentiles below run along contiguous memory
+    counts = np.bincount(
+        (path_states * paths + np.arange(paths)[:, None]).ravel(), minlength=len(states) * paths
+    ).reshape(len(states), paths).astype(float)
+    model = MonthlyRewardModel(compiled, categories)
+    state_rewards = model.rewards(states).T
+    # Multi-month caps depend on the path's earlier months, not just the state
+    bucket_totals = model.bucket_totals(states, path_states)
+    bucket_rows = np.full(len(compiled), -1)
+    bucket_rows[model.bucket_owners] = np.arange(len(model.bucket_owners))
+    window_spend = states.sum(axis=1)[path_states[:, :SIGNUP_WINDOW_MONTHS]].sum(axis=1)
+    fees = ((months - 1) // 12 + 1) * compiled.annual_fees
+
+    # Percentiles per chunk of cards, so only (chunk x paths) values exist at once
+    n_cards = len(compiled)
+    summary = np.empty((n_cards, len(PERCENTILES) + 1))
+    bonus_probability = np.empty(n_cards)
+    chunk = max(1, BATCH_CELL_BUDGET // max(1, paths))
+    for start in range(0, n_cards, chunk):
+        block = slice(start, start + chunk)
+        requirements = compiled.signup_requirements[block, None]
+        earned = (window_spend >= requirements) & (requirements > 0)
+        values = state_rewards[block] @ counts
+        rows = bucket_rows[block]
+        values[rows >= 0] += bucket_totals[rows[rows >= 0]]
+        values += earned * compiled.signup_bonuses[block, None] - fees[block, None]
+        summary[block, :-1] = np.percentile(values, PERCENTILES, axis=1).T
+        summary[block, -1] = values.mean(axis=1)
+        bonus_probability[block] = earned.mean(axis=1)
+
+    medians = summary[:, PERCENTILES.index(50)]
+    top = np.lexsort((np.arange(n_cards), -medians))[:top_k]
+    bands = np.percentile(net_value_bands(compiled, categories, states, path_states, top), PERCENTILES, axis=0)
+
+    results = []
+    for rank, i in enumerate(top.tolist()):
+        results.append({
+            'card_name': compiled.names[i],
+            'issuer': compiled.issuers[i],
+            'annual_fee': float(compiled.annual_fees[i]),
+            'net_value': {
+                **{f'p{q}': round(float(value), 2) for q, value in zip(PERCENTILES, summary[i, :-1])},
+                'mean': round(float(summary[i, -1]), 2),
+            },
+            'signup_bonus_probability': round(float(bonus_probability[i]), 4),
+            'bands': {
+                f'p{q}': np.round(bands[position, :, rank], 2).tolist()
+                for position, q in enumerate(PERCENTILES)
+            },
+        })
+    return {
+        'months': months,
+        'paths': paths,
+        'history_months': len(history),
+        'categories': categories,
+        'cards': results,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+    from pathlib import Path
+
+    from services.ledger_ingest import aggregate_ledger_file
+    from services.reward_engine import get_compiled_catalog
+
+    parser = argparse.ArgumentParser(description="Simulate card net value from a transaction ledger")
+    parser.add_argument("path", type=Path, help="Ledger CSV (date, merchant, category, amount[, user_id])")
+    parser.add_argument("--user", help="User to simulate (default: the first in the ledger)")
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--paths", type=int, default=10_000)
+    parser.add_argument("--volatility", type=float, default=0.0)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    profiles = aggregate_ledger_file(args.path).profiles()
+    profile = next((p for p in profiles if args.user in (None, p["user_id"])), None)
+    if profile is None:
+        parser.error(f"no transactions for user {args.user}")
+
+    start = time.perf_counter()
+    result = simulate_savings(
+        get_compiled_catalog(), list(profile["by_month"].values()),
+        args.months, args.paths, args.volatility, args.top_k, args.seed
+    )
+    elapsed = time.perf_counter() - start
+    for card in result['cards']:
+        card.pop('bands')
+    print(json.dumps(result, indent=2))
+    print(f"Simulated {args.paths} paths x {args.months} months in {elapsed * 1000:.1f} ms")
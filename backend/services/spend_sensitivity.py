@@ -0,0 +1,285 @@
+"""
+What-if sensitivity: the spend levels in one category where the best card changes.
+
+With every other category held fixed, a card's annual value is a
+piecewise linear function of monthly spend x in one category: its bonus
+rate up to the cap's average monthly capacity (cap / min(period, 12),
+as in services.wallet_optimizer), its base rate beyond, and a jump by
+the signup bonus once total spend meets the bonus requirement. The
+annual reward is exactly what stepping the year month by month
+(CompiledCatalog.horizon_rewards) gives for constant spend.
+
+The best card as a function of x is the upper envelope of these
+functions, traced with a kinetic sweep from x = 0: for the current
+leader, the first point where each card overtakes it is found in one
+vectorized pass over its few linear pieces, the earliest one becomes the
+next leader, and so on. Each change of leader costs one pass over the
+catalog, so the cost is linear in catalog size times the number of
+breakpoints, with no probing.
+
+Values are compared unrounded; the ranker compares values rounded to
+cents, so within a cent of a breakpoint the two can disagree.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from services.card_schema import CompiledCatalog
+from services.reward_calculator import PROJECTION_MONTHS, to_backend_category
+from services.wallet_optimizer import OBJECTIVES
+
+# Value differences (dollars a year) below this count as ties
+VALUE_TOLERANCE = 1e-7
+DEFAULT_MAX_SPEND = 10_000.0
+
+
+class CategoryValueCurves:
+    """Every card's annual value as a function of monthly spend in one category."""
+
+    def __init__(
+        self,
+        compiled: CompiledCatalog,
+        spend: Dict[str, float],
+        key: str,
+        objective: str = "first_year"
+    ):
+        """
+        Args:
+            compiled: Compiled card catalog
+            spend: Dictionary of category -> monthly spend
+            key: Spend category to vary
+            objective: "first_year" counts eligible signup bonuses,
+                "ongoing" only rewards minus annual fees
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(f"objective must be one of {OBJECTIVES}")
+        category = to_backend_category(key)
+        self.offsets = -compiled.annual_fees.astype(float)
+        for other, amount in spend.items():
+            if other != key and amount > 0:
+                amounts = np.array([[float(amount)]])
+                self.offsets = self.offsets + compiled.horizon_rewards(
+                    to_backend_category(other), amounts, PROJECTION_MONTHS
+                )[0]
+
+        rates, caps, has_cap = compiled.category_columns(category)
+        periods = compiled.category_periods(category)
+        self.rates = rates * PROJECTION_MONTHS
+        self.base_rates = compiled.base_rates * PROJECTION_MONTHS
+        self.knees = np.where(has_cap, caps / np.minimum(periods, PROJECTION_MONTHS), np.inf)
+
+        other_spend = sum(amount for other, amount in spend.items() if other != key)
+        monthly_requirement = compiled.signup_requirements / 3  # Typically 3 months
+        if objective == "first_year":
+            self.bonuses = compiled.signup_bonuses.astype(float)
+            self.thresholds = np.where(monthly_requirement > 0, monthly_requirement - other_spend, np.inf)
+        else:
+            self.bonuses = np.zeros(len(compiled))
+            self.thresholds = np.full(len(compiled), np.inf)
+
+    def values(self, x, cards=slice(None)) -> np.ndarray:
+        """
+        Annual value at monthly spend ``x``.
+
+        ``x`` broadcasts against the selected ``cards`` (all by default).
+        """
+        under = np.minimum(x, self.knees[cards])
+        return (
+            self.offsets[cards] + self.rates[cards] * under + self.base_rates[cards] * (x - under)
+            + np.where(x >= self.thresholds[cards], self.bonuses[cards], 0.0)
+        )
+
+    def slopes(self, x, cards=slice(None)) -> np.ndarray:
+        """Annual value per extra dollar of monthly spend just above ``x``."""
+        return np.where(x < self.knees[cards], self.rates[cards], self.base_rates[cards])
+
+    def best(self, x: float, candidates: Optional[np.ndarray] = None) -> int:
+        """
+        The best card at ``x`` and just above it.
+
+        Ties go to the steeper card, then to catalog order like the ranker.
+        """
+        if candidates is None:
+            candidates = np.arange(len(self.offsets))
+        values = self.values(x, candidates)
+        slopes = self.slopes(x, candidates)
+        return int(candidates[np.lexsort((candidates, -slopes, -values))[0]])
+
+    def overtakes(self, leader: int, start: float, end: float) -> np.ndarray:
+        """
+        Where each card first beats ``leader`` in [start, end).
+
+        Between the two cards' knees and bonus thresholds both values are
+        linear, so each card has at most five pieces to check.
+
+        Returns:
+            Per-card spend level, inf where the card never beats the leader
+        """
+        n_cards = len(self.offsets)
+        bounds = np.column_stack([
+            self.knees,
+            self.thresholds,
+            np.full(n_cards, self.knees[leader]),
+            np.full(n_cards, self.thresholds[leader]),
+            np.full(n_cards, end),
+        ])
+        bounds = np.sort(np.where((bounds > start) & (bounds < end), bounds, end), axis=1)
+        starts = np.column_stack([np.full(n_cards, start), bounds[:, :-1]])
+
+        cards = np.arange(n_cards)[:, None]
+        gaps = self.values(starts, cards) - self.values(starts, leader)
+        gains = self.slopes(starts, cards) - self.slopes(starts, leader)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossings = np.where(
+                gaps > VALUE_TOLERANCE, starts,
+                np.where(gains > 0, starts - gaps / gains, np.inf)
+            )
+        crossings = np.where(crossings < bounds, np.maximum(crossings, starts), np.inf)
+        first = crossings.min(axis=1)
+        first[leader] = np.inf
+        return first
+
+    def envelope(self, end: float) -> List[Dict[str, Any]]:
+        """
+        The best card over monthly spend [0, end].
+
+        Returns:
+            Consecutive segments as dictionaries with ``start``, ``end``
+            and the ``card`` index best over [start, end)
+        """
+        x = 0.0
+        leader = self.best(x)
+        segments = [{'start': x, 'end': end, 'card': leader}]
+        # Every change of leader passes one knee or threshold or crosses
+        # a line; the bound only guards against float cycling
+        for _ in range(4 * len(self.offsets) + 8):
+            crossings = self.overtakes(leader, x, end)
+            x = float(crossings.min())
+            if x >= end:
+                break
+            contenders = np.flatnonzero(crossings <= x + VALUE_TOLERANCE)
+            leader = self.best(x, contenders)
+            if segments[-1]['start'] >= x:
+                # The previous leader never led over a positive length
+                segments.pop()
+            if segments and segments[-1]['card'] == leader:
+                segments[-1]['end'] = end
+                continue
+            if segments:
+                segments[-1]['end'] = x
+            segments.append({'start': x, 'end': end, 'card': leader})
+        return segments
+
+
+def category_breakpoints(
+    compiled: CompiledCatalog,
+    spend: Dict[str, float],
+    key: str,
+    objective: str = "first_year",
+    max_spend: float = DEFAULT_MAX_SPEND
+) -> Dict[str, Any]:
+    """
+    Find where the best card changes as spend in one category varies.
+
+    Args:
+        compiled: Compiled card catalog
+        spend: Dictionary of category -> monthly spend
+        key: Spend category to vary, other categories stay fixed
+        objective: "first_year" or "ongoing", as in optimize_wallet
+        max_spend: Highest monthly spend in the category to consider
+            (never below the current spend)
+
+    Returns:
+        Dictionary with the current best card, the segments of monthly
+        spend over which each card is best, and the nearest breakpoints
+        above and below the current spend
+    """
+    current = float(spend.get(key, 0.0))
+    curves = CategoryValueCurves(compiled, spend, key, objective)
+    end = max(float(max_spend), current)
+    segments = curves.envelope(end)
+
+    def describe(i: int) -> Dict[str, Any]:
+        return {'card_name': compiled.names[i], 'issuer': compiled.issuers[i]}
+
+    position = next(
+        (n for n, segment in enumerate(segments) if segment['start'] <= current < segment['end']),
+        len(segments) - 1
+    )
+    next_increase = next_decrease = None
+    if position + 1 < len(segments):
+        following = segments[position + 1]
+        next_increase = {
+            'spend': round(following['start'], 2),
+            'additional_spend': round(following['start'] - current, 2),
+            **describe(following['card']),
+        }
+    if position > 0:
+        previous = segments[position - 1]
+        next_decrease = {
+            'spend': round(previous['end'], 2),
+            'reduction': round(current - previous['end'], 2),
+            **describe(previous['card']),
+        }
+    return {
+        'category': key,
+        'current_spend': current,
+        'best_card': describe(segments[position]['card']),
+        'segments': [
+            {'from': round(segment['start'], 2), 'to': round(segment['end'], 2), **describe(segment['card'])}
+            for segment in segments
+        ],
+        'next_increase': next_increase,
+        'next_decrease': next_decrease,
+    }
+
+
+def spend_breakpoints(
+    compiled: CompiledCatalog,
+    spend: Dict[str, float],
+    keys: Optional[Sequence[str]] = None,
+    objective: str = "first_year",
+    max_spend: float = DEFAULT_MAX_SPEND
+) -> Dict[str, Any]:
+    """
+    Run category_breakpoints for several spend categories (default all in ``spend``).
+    """
+    keys = list(spend) if keys is None else list(keys)
+    return {
+        'objective': objective,
+        'total_monthly_spend': sum(spend.values()),
+        'categories': [category_breakpoints(compiled, spend, key, objective, max_spend) for key in keys],
+    }
+
+
+def probe_mismatches(
+    compiled: CompiledCatalog,
+    spend: Dict[str, float],
+    key: str,
+    probes: int = 200,
+    max_spend: float = DEFAULT_MAX_SPEND
+) -> List[str]:
+    """
+    Check the envelope against score_profiles at evenly spaced spend levels.
+
+    Probes where the ranker's best two cards are within a cent of each
+    other are skipped, since cent rounding decides those.
+    """
+    from services.reward_engine import score_profiles
+
+    curves = CategoryValueCurves(compiled, spend, key)
+    segments = curves.envelope(max_spend)
+    keys = list(dict.fromkeys(list(spend) + [key]))
+    levels = np.linspace(0, max_spend, probes, endpoint=False)
+    matrix = np.array([[level if k == key else spend[k] for k in keys] for level in levels])
+    first_year = score_profiles(compiled, matrix, keys)['first_year_value']
+    problems = []
+    for level, values in zip(levels.tolist(), first_year):
+        expected = int(np.argmax(values))
+        runner_up = np.partition(values, -2)[-2] if len(values) > 1 else -np.inf
+        if values[expected] - runner_up < 0.011:
+            continue
+        found = next(segment['card'] for segment in segments if segment['start'] <= level < segment['end'])
+        if found != expected:
+            problems.append(f"{key}={level:.2f}: expected {compiled.names[expected]} got {compiled.names[found]}")
+    return problems
@@ -0,0 +1,129 @@
+"""
+Startup timing: where the API process spends its time before serving.
+
+main.py and serve.py wrap their initialization steps in ``phase``.
+``python serve.py --startup-report`` prints those phases, the heaviest
+imports (as measured by ``python -X importtime``) and the time from
+process start to the first served requests, then exits.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# (name, start, seconds, nesting depth) per finished phase
+_phases: List[Tuple[str, float, float, int]] = []
+_depth = 0
+
+# Requests timed by the report: (method, path, JSON body)
+FIRST_REQUESTS = (
+    ("GET", "/health", None),
+    ("POST", "/recommend", {"merchant": "Chipotle", "amount": 25.0}),
+    ("POST", "/api/optimizer/recommend", {"groceries": 500, "dining": 200, "gas": 100}),
+)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time one startup step; phases may nest."""
+    global _depth
+    start = time.perf_counter()
+    _depth += 1
+    try:
+        yield
+    finally:
+        _depth -= 1
+        _phases.append((name, start, time.perf_counter() - start, _depth))
+
+
+def process_uptime() -> Optional[float]:
+    """Seconds since this process was started (Linux only, 10 ms resolution)."""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def import_times(module: str = "main") -> List[Tuple[str, int, int]]:
+    """
+    Import a module in a fresh interpreter under ``-X importtime``.
+
+    Returns:
+        (module, self microseconds, cumulative microseconds) per import,
+        in the order the interpreter reports them
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def import_time_by_package(times: List[Tuple[str, int, int]]) -> List[Tuple[str, float]]:
+    """Total self time in seconds per top-level package, slowest first."""
+    totals: Dict[str, int] = {}
+    for name, self_us, _ in times:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(((package, us / 1e6) for package, us in totals.items()), key=lambda item: -item[1])
+
+
+async def _time_first_requests(app: Any) -> List[Tuple[str, int, float]]:
+    import httpx
+
+    timings = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+        for method, path, body in FIRST_REQUESTS:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            timings.append((f"{method} {path}", response.status_code, time.perf_counter() - start))
+    return timings
+
+
+def print_report(app: Any, top: int = 12) -> None:
+    """
+    Serve the first requests in-process and print the startup breakdown.
+
+    Args:
+        app: The preloaded ASGI app
+        top: Number of packages listed in the import breakdown
+    """
+    ready = process_uptime()
+    requests = asyncio.run(_time_first_requests(app))
+    first_response = process_uptime()
+
+    print("Startup phases:")
+    for name, _, seconds, depth in sorted(_phases, key=lambda item: item[1]):
+        print(f"  {'  ' * depth}{name:<{32 - 2 * depth}} {seconds * 1000:8.1f} ms")
+
+    print("First requests:")
+    for name, status, seconds in requests:
+        print(f"  {name:<32} {seconds * 1000:8.1f} ms  ({status})")
+
+    times = import_times()
+    if times:
+        total = sum(self_us for _, self_us, _ in times) / 1e6
+        print(f"Imports of main (python -X importtime, fresh interpreter): {total * 1000:.1f} ms")
+        for package, seconds in import_time_by_package(times)[:top]:
+            print(f"  {package:<32} {seconds * 1000:8.1f} ms")
+
+    if ready is not None and first_response is not None:
+        print(f"Process start to ready: {ready:.2f} s; to first responses served: {first_response:.2f} s")
@@ -0,0 +1,430 @@
+"""
+Wallet optimizer: the best combination of up to N cards for a spend profile.
+
+A wallet routes each spend category to the best card it holds. A card's
+category cap is modelled as a bonus-rate segment of limited capacity
+followed by its base rate, so spend above one card's cap overflows to
+the next best segment in the wallet (possibly another card's bonus rate).
+Filling a category's spend into the wallet's segments from the highest
+rate down is optimal, and the resulting wallet value is submodular in
+the set of cards: a card adds less to a larger wallet.
+
+That makes a branch-and-bound search effective. At each node the
+marginal gain of every remaining candidate is computed in one vectorized
+pass; candidates with no gain are dropped for the whole subtree (their
+gain can only shrink), and the sum of the best remaining gains bounds
+what the subtree can reach. Catalogs of thousands of cards resolve in a
+few hundred nodes for N <= 4.
+
+A cap with a longer period (card_schema.CAP_PERIOD_MONTHS) is modelled by
+its average monthly capacity over the year: the cap divided by the
+months in its period, or by 12 for a lifetime cap. For the same spend
+every month that routes exactly as much spend under the cap in a year as
+stepping through the months does (reward_calculator), so annual rewards
+are 12x the monthly routing.
+
+Values follow card_ranker: annual rewards, minus annual fees, plus
+signup bonuses whose spend requirement the profile's total monthly spend
+meets (first-year objective).
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.card_schema import CAP_PERIOD_MONTHS, CompiledCatalog
+from services.reward_calculator import PROJECTION_MONTHS, to_backend_category
+
+OBJECTIVES = ("first_year", "ongoing")
+DEFAULT_MAX_NODES = 50_000
+GAIN_EPSILON = 1e-9
+
+
+class WalletSearch:
+    """Branch-and-bound search over card combinations for one spend profile."""
+
+    def __init__(
+        self,
+        compiled: CompiledCatalog,
+        spend: Dict[str, float],
+        objective: str = "first_year"
+    ):
+        """
+        Args:
+            compiled: Compiled card catalog
+            spend: Dictionary of category -> monthly spend
+            objective: "first_year" counts eligible signup bonuses,
+                "ongoing" only rewards minus annual fees
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(f"objective must be one of {OBJECTIVES}")
+        self.compiled = compiled
+        self.objective = objective
+        self.keys = [key for key, amount in spend.items() if amount > 0]
+        self.amounts = [float(spend[key]) for key in self.keys]
+        self.total_monthly_spend = sum(spend.values())
+
+        columns = [compiled.category_columns(to_backend_category(key)) for key in self.keys]
+        n_cards = len(compiled)
+        self.rates = np.array([rates for rates, _, _ in columns]).reshape(len(columns), n_cards)
+        periods = np.array([
+            compiled.category_periods(to_backend_category(key)) for key in self.keys
+        ]).reshape(len(columns), n_cards)
+        # Average monthly capacity of each cap over the year
+        self.caps = np.array([caps for _, caps, _ in columns]).reshape(len(columns), n_cards)
+        self.caps = self.caps / np.minimum(periods, PROJECTION_MONTHS)
+
+        # Spend-limited view of each card for dominance checks: the cap
+        # clipped to the category's spend and the rate past it
+        amounts = np.array(self.amounts).reshape(-1, 1)
+        self.effective_caps = np.minimum(self.caps, amounts)
+        self.effective_overflow = np.where(self.caps < amounts, compiled.base_rates, self.rates)
+
+        monthly_spend_requirement = compiled.signup_requirements / 3  # Typically 3 months
+        self.bonus_eligible = (
+            (monthly_spend_requirement > 0) & (self.total_monthly_spend >= monthly_spend_requirement)
+        )
+        # Per-card value that does not depend on the rest of the wallet
+        self.fixed_value = -compiled.annual_fees
+        if objective == "first_year":
+            self.fixed_value = self.fixed_value + np.where(self.bonus_eligible, compiled.signup_bonuses, 0.0)
+        self.max_monthly_rewards = self._max_monthly_rewards()
+
+        self.nodes = 0
+        self.truncated = False
+
+    def _max_monthly_rewards(self) -> float:
+        """Monthly rewards if the wallet could hold every card (a bound for any wallet)."""
+        total = 0.0
+        capped = np.isfinite(self.caps)
+        for k, amount in enumerate(self.amounts):
+            rates = np.concatenate([self.rates[k], self.compiled.base_rates[capped[k]]])
+            capacities = np.concatenate([self.caps[k], np.full(capped[k].sum(), np.inf)])
+            order = np.argsort(-rates, kind='stable')
+            filled_before = np.concatenate([[0.0], np.cumsum(capacities[order])[:-1]])
+            routed = np.clip(amount - filled_before, 0, capacities[order])
+            total += float((routed * rates[order]).sum())
+        return total
+
+    def segments(self, wallet: Sequence[int], k: int) -> List[Tuple[float, float, int]]:
+        """
+        Reward segments the wallet offers category k, best first.
+
+        Returns:
+            List of (rate, capacity, card index); ties keep wallet order
+        """
+        segments = []
+        for position, i in enumerate(wallet):
+            cap = self.caps[k, i]
+            if np.isfinite(cap):
+                segments.append((self.rates[k, i], cap, position, i))
+                segments.append((self.compiled.base_rates[i], np.inf, position, i))
+            else:
+                segments.append((self.rates[k, i], np.inf, position, i))
+        segments.sort(key=lambda s: (-s[0], s[2]))
+        return [(rate, capacity, i) for rate, capacity, _, i in segments]
+
+    def curve(self, wallet: Sequence[int], k: int) -> Tuple[np.ndarray, np.ndarray, float]:
+        """
+        Best monthly reward of the wallet as a function of category k spend.
+
+        Returns:
+            Tuple of (breakpoints, rewards at breakpoints, slope after the
+            last breakpoint); the curve starts at (0, 0)
+        """
+        xs, ys = [0.0], [0.0]
+        for rate, capacity, _ in self.segments(wallet, k):
+            if not np.isfinite(capacity):
+                return np.array(xs), np.array(ys), rate
+            xs.append(xs[-1] + capacity)
+            ys.append(ys[-1] + capacity * rate)
+        return np.array(xs), np.array(ys), 0.0
+
+    @staticmethod
+    def _evaluate_curve(curve: Tuple[np.ndarray, np.ndarray, float], x):
+        xs, ys, tail = curve
+        return np.interp(x, xs, ys) + np.maximum(np.subtract(x, xs[-1]), 0) * tail
+
+    def monthly_rewards(self, wallet: Sequence[int]) -> float:
+        """Best monthly rewards for a wallet across every spend category."""
+        return float(sum(
+            self._evaluate_curve(self.curve(wallet, k), amount)
+            for k, amount in enumerate(self.amounts)
+        ))
+
+    def value(self, wallet: Sequence[int]) -> float:
+        """Objective value of a wallet."""
+        return PROJECTION_MONTHS * self.monthly_rewards(wallet) + float(sum(self.fixed_value[i] for i in wallet))
+
+    def marginal_gains(self, wallet: Sequence[int], candidates: np.ndarray) -> np.ndarray:
+        """
+        Objective gain of adding each candidate card to the wallet.
+
+        The spend split between a new card and the existing wallet is a
+        sum of piecewise-linear rewards, so its optimum lies at a
+        breakpoint of either side: the card taking nothing, everything,
+        exactly its cap, or leaving the wallet exactly one of its own
+        breakpoints. All of them are evaluated for every candidate at once.
+        """
+        base_rates = self.compiled.base_rates[candidates]
+        gains = np.zeros(len(candidates))
+        for k, amount in enumerate(self.amounts):
+            rates = self.rates[k, candidates]
+            caps = self.caps[k, candidates]
+            curve = self.curve(wallet, k) if wallet else (np.zeros(1), np.zeros(1), 0.0)
+            current = float(self._evaluate_curve(curve, amount))
+
+            def card_rewards(y):
+                return np.minimum(y, caps) * rates + np.maximum(y - caps, 0) * base_rates
+
+            best = np.maximum(card_rewards(amount), current)
+            splits = np.minimum(caps, amount)
+            best = np.maximum(best, card_rewards(splits) + self._evaluate_curve(curve, amount - splits))
+            for breakpoint, wallet_rewards in zip(*curve[:2]):
+                if 0 < breakpoint < amount:
+                    best = np.maximum(best, card_rewards(amount - breakpoint) + wallet_rewards)
+            gains += best - current
+        return 12 * gains + self.fixed_value[candidates]
+
+    def dominated(self, card: int, candidates: np.ndarray) -> np.ndarray:
+        """
+        Which candidates the card dominates.
+
+        A card dominates another when, in every spend category, it earns at
+        least the other's rate at every spend level, and its fixed value
+        (fees and bonus) is at least as high. Swapping the dominated card
+        for it never makes a wallet worse.
+        """
+        result = self.fixed_value[card] >= self.fixed_value[candidates]
+        for k in range(len(self.amounts)):
+            rates = self.rates[k, candidates]
+            overflow = self.effective_overflow[k, candidates]
+            card_overflow = self.effective_overflow[k, card]
+            result &= (
+                (self.rates[k, card] >= rates)
+                & (card_overflow >= overflow)
+                & ((self.effective_caps[k, card] >= self.effective_caps[k, candidates]) | (card_overflow >= rates))
+            )
+        return result
+
+    def solve(self, max_cards: int, max_nodes: int = DEFAULT_MAX_NODES) -> Tuple[List[int], float]:
+        """
+        Find the best wallet of 1 to ``max_cards`` cards.
+
+        Args:
+            max_cards: Maximum wallet size
+            max_nodes: Search node budget; when exhausted the best wallet
+                found so far is returned and ``truncated`` is set
+
+        Returns:
+            Tuple of (card indices in the order they were chosen, value)
+        """
+        self.nodes = 0
+        self.truncated = False
+        if not len(self.compiled) or max_cards < 1:
+            return [], 0.0
+
+        candidates = np.arange(len(self.compiled))
+        gains = self.marginal_gains([], candidates)
+        # A wallet holds at least one card, even if every card loses money
+        first = int(np.argmax(gains))
+        self._best: Tuple[List[int], float] = ([first], float(gains[first]))
+        self._max_nodes = max_nodes
+        self._branch([], 0.0, candidates, gains, max_cards)
+        return self._best
+
+    def _branch(
+        self,
+        wallet: List[int],
+        value: float,
+        candidates: np.ndarray,
+        gains: np.ndarray,
+        remaining: int
+    ) -> None:
+        self.nodes += 1
+        if wallet and value > self._best[1] + GAIN_EPSILON:
+            self._best = (list(wallet), value)
+        if remaining == 0:
+            return
+
+        # Submodularity: a card that adds nothing now adds nothing deeper
+        keep = gains > GAIN_EPSILON
+        candidates, gains = candidates[keep], gains[keep]
+        order = np.lexsort((candidates, -gains))
+        candidates, gains = candidates[order], gains[order]
+
+        # Rewards can grow at most to the every-card bound, so no subtree
+        # beats the wallet plus that headroom plus its best fixed values
+        fixed = np.sort(np.maximum(self.fixed_value[candidates], 0))[::-1][:remaining].sum()
+        headroom = PROJECTION_MONTHS * self.max_monthly_rewards - (value - self.fixed_value[wallet].sum())
+        if value + fixed + headroom <= self._best[1] + GAIN_EPSILON:
+            return
+
+        # Once a card's branch is done, every wallet holding a card it
+        # dominates (and not the card itself) has a no-worse swap there
+        active = np.ones(len(candidates), dtype=bool)
+        for position in range(len(candidates)):
+            if not active[position]:
+                continue
+            # Best case for this branch: the next `remaining` gains, unshrunk
+            later = slice(position + 1, None)
+            bound = value + gains[position] + gains[later][active[later]][:remaining - 1].sum()
+            if bound <= self._best[1] + GAIN_EPSILON:
+                break
+            if self.nodes >= self._max_nodes:
+                self.truncated = True
+                return
+            card = int(candidates[position])
+            child = wallet + [card]
+            rest = candidates[later][active[later]]
+            child_gains = self.marginal_gains(child, rest) if remaining > 1 and len(rest) else gains[:0]
+            self._branch(child, value + float(gains[position]), rest, child_gains, remaining - 1)
+            active[later] &= ~self.dominated(card, candidates[later])
+
+    def allocation(self, wallet: Sequence[int]) -> List[Dict[str, Any]]:
+        """Route each spend category through the wallet's segments, best rate first."""
+        allocation = []
+        for k, (key, amount) in enumerate(zip(self.keys, self.amounts)):
+            left = amount
+            splits: Dict[int, Dict[str, Any]] = {}
+            for rate, capacity, i in self.segments(wallet, k):
+                if left <= 0:
+                    break
+                routed = min(left, capacity)
+                left -= routed
+                split = splits.setdefault(i, {
+                    "card_name": self.compiled.names[i],
+                    "spend": 0.0,
+                    "monthly_rewards": 0.0,
+                })
+                split["spend"] += routed
+                split["monthly_rewards"] += routed * rate
+            allocation.append({
+                "category": key,
+                "spend": amount,
+                "splits": [
+                    {
+                        "card_name": split["card_name"],
+                        "spend": round(split["spend"], 2),
+                        "rate": split["monthly_rewards"] / split["spend"] if split["spend"] else 0,
+                        "monthly_rewards": round(split["monthly_rewards"], 2),
+                    }
+                    for split in splits.values()
+                ],
+            })
+        return allocation
+
+
+def optimize_wallet(
+    compiled: CompiledCatalog,
+    spend: Dict[str, float],
+    max_cards: int = 3,
+    objective: str = "first_year",
+    max_nodes: int = DEFAULT_MAX_NODES
+) -> Dict[str, Any]:
+    """
+    Pick the best set of up to ``max_cards`` cards and route spend across them.
+
+    Args:
+        compiled: Compiled card catalog
+        spend: Dictionary of category -> monthly spend
+        max_cards: Maximum number of cards in the wallet
+        objective: "first_year" (rewards - fees + eligible signup bonuses)
+            or "ongoing" (rewards - fees)
+        max_nodes: Search node budget
+
+    Returns:
+        Dictionary with the chosen cards, per-category allocation, wallet
+        totals and search statistics (``optimal`` is False only when the
+        node budget ran out)
+    """
+    search = WalletSearch(compiled, spend, objective)
+    wallet, value = search.solve(max_cards, max_nodes)
+    # Present cards in catalog order
+    wallet = sorted(wallet)
+    allocation = search.allocation(wallet)
+
+    per_card = {compiled.names[i]: {"monthly_rewards": 0.0, "categories": []} for i in wallet}
+    for category in allocation:
+        for split in category["splits"]:
+            card = per_card[split["card_name"]]
+            card["monthly_rewards"] += split["monthly_rewards"]
+            card["categories"].append(category["category"])
+
+    cards = []
+    for i in wallet:
+        signup_bonus = float(compiled.signup_bonuses[i]) if search.bonus_eligible[i] else 0
+        cards.append({
+            "card_name": compiled.names[i],
+            "issuer": compiled.issuers[i],
+            "annual_fee": float(compiled.annual_fees[i]),
+            "signup_bonus_value": signup_bonus,
+            "signup_bonus_eligible": bool(search.bonus_eligible[i]),
+            "categories": per_card[compiled.names[i]]["categories"],
+            "estimated_monthly_rewards": round(per_card[compiled.names[i]]["monthly_rewards"], 2),
+        })
+
+    monthly = search.monthly_rewards(wallet)
+    annual_fees = float(compiled.annual_fees[wallet].sum()) if wallet else 0.0
+    signup_bonuses = sum(card["signup_bonus_value"] for card in cards)
+    net_annual = round(monthly * PROJECTION_MONTHS - annual_fees, 2)
+    return {
+        "cards": cards,
+        "allocation": allocation,
+        "total_monthly_spend": search.total_monthly_spend,
+        "estimated_monthly_rewards": round(monthly, 2),
+        "estimated_annual_rewards": round(monthly * PROJECTION_MONTHS, 2),
+        "annual_fees": annual_fees,
+        "net_annual_rewards": net_annual,
+        "first_year_value": round(net_annual + signup_bonuses, 2),
+        "objective": objective,
+        "objective_value": round(value, 2),
+        "optimal": not search.truncated,
+        "nodes_explored": search.nodes,
+    }
+
+
+def brute_force_wallet(
+    compiled: CompiledCatalog,
+    spend: Dict[str, float],
+    max_cards: int = 3,
+    objective: str = "first_year"
+) -> Tuple[List[int], float]:
+    """Exhaustively score every wallet (for checking the solver on small catalogs)."""
+    from itertools import combinations
+
+    search = WalletSearch(compiled, spend, objective)
+    best: Tuple[List[int], float] = ([], -np.inf)
+    for size in range(1, max_cards + 1):
+        for wallet in combinations(range(len(compiled)), size):
+            value = search.value(wallet)
+            if value > best[1] + GAIN_EPSILON:
+                best = (list(wallet), value)
+    return best
+
+
+def random_catalog(n_cards: int, seed: int = 0, categories: Optional[Sequence[str]] = None) -> CompiledCatalog:
+    """Generate a synthetic catalog with caps, fees and bonuses."""
+    rng = np.random.default_rng(seed)
+    categories = list(categories or ['Groceries', 'Travel', 'Gas', 'Dining', 'Online Shopping'])
+    cards = []
+    for i in range(n_cards):
+        base = float(rng.choice([0.01, 0.015, 0.02]))
+        chosen = rng.choice(len(categories), size=rng.integers(0, 4), replace=False)
+        category_rewards = {categories[j]: float(rng.choice([0.02, 0.03, 0.04, 0.05, 0.06])) for j in chosen}
+        category_caps = {
+            category: float(rng.choice([500, 1500, 2000, 6000]))
+            for category in category_rewards if rng.random() < 0.4
+        }
+        cap_periods = {category: str(rng.choice(list(CAP_PERIOD_MONTHS))) for category in category_caps}
+        cards.append({
+            'name': f"Card {i}",
+            'issuer': f"Issuer {i % 17}",
+            'base_reward': base,
+            'category_rewards': category_rewards,
+            'annual_fee': float(rng.choice([0, 0, 0, 95, 250, 550])),
+            'signup_bonus': float(rng.choice([0, 150, 200, 750])),
+            'signup_bonus_spend_requirement': float(rng.choice([0, 500, 1000, 4000])),
+            'category_caps': category_caps,
+            'cap_periods': cap_periods,
+        })
+    return CompiledCatalog.from_cards(cards)
@@ -0,0 +1,9 @@
+"""
+Shared pytest setup: the backend modules import each other as top-level
+packages (``services``, ``api``), as they do when served from backend/.
+"""
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
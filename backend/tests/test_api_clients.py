@@ -0,0 +1,81 @@
+"""
+MCCClient request sharing between concurrent lookups.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from services.api_clients import MCCClient
+
+
+class SlowUpstream:
+    """Mock MCC API that answers once ``release`` is set."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await self.release.wait()
+        code = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, json={"mcc": code, "description": "Grocery Stores"})
+
+
+def mock_client(upstream: SlowUpstream) -> MCCClient:
+    client = MCCClient(base_url="http://mcc.test")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+    return client
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def scenario():
+        upstream = SlowUpstream()
+        client = mock_client(upstream)
+        leader = asyncio.create_task(client.fetch("5411"))
+        follower = asyncio.create_task(client.fetch("5411"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        await asyncio.sleep(0.01)
+        upstream.release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await follower == {"mcc": "5411", "description": "Grocery Stores"}
+        assert upstream.calls == 1
+        assert client._in_flight == {}
+        await client.aclose()
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+
+
+def test_request_completes_after_every_caller_cancels():
+    async def scenario():
+        upstream = SlowUpstream()
+        client = mock_client(upstream)
+        caller = asyncio.create_task(client.fetch("5812"))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        upstream.release.set()
+        await asyncio.sleep(0.01)
+
+        # The finished request was cached, so this makes no upstream call
+        assert await client.fetch("5812") == {"mcc": "5812", "description": "Grocery Stores"}
+        assert upstream.calls == 1
+        await client.aclose()
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+
+
+def test_aclose_cancels_in_flight_requests():
+    async def scenario():
+        client = mock_client(SlowUpstream())
+        caller = asyncio.create_task(client.fetch("5542"))
+        await asyncio.sleep(0.01)
+        await client.aclose()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        assert client._in_flight == {}
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
@@ -0,0 +1,35 @@
+"""
+Batch ranking endpoint limits.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from api.optimizer import MAX_BATCH_TOP_K
+from main import app
+
+PROFILE = {"groceries": 500, "dining": 300, "gas": 150, "travel": 200, "online_shopping": 100, "other": 250}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("top_k", [0, -1, MAX_BATCH_TOP_K + 1, 10**6, "3", True])
+def test_body_top_k_is_bounded_like_the_query(client, top_k):
+    response = client.post("/api/optimizer/recommend/batch", json={"profiles": [PROFILE], "top_k": top_k})
+    assert response.status_code == 422
+
+
+def test_query_top_k_is_bounded(client):
+    response = client.post(f"/api/optimizer/recommend/batch?top_k={MAX_BATCH_TOP_K + 1}", json=[PROFILE])
+    assert response.status_code == 422
+
+
+def test_body_top_k_within_bounds(client):
+    response = client.post("/api/optimizer/recommend/batch", json={"profiles": [PROFILE, PROFILE], "top_k": 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 2 and body["top_k"] == 2
+    assert all(len(result["top_cards"]) == 2 for result in body["results"])
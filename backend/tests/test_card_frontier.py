@@ -0,0 +1,23 @@
+"""
+Block skyline against the pairwise reference.
+"""
+import numpy as np
+import pytest
+
+from services.card_frontier import brute_force_skyline, skyline
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_skyline_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(50):
+        n_rows = int(rng.integers(1, 1500))
+        # Few distinct values, so ties and duplicate rows are common
+        points = rng.integers(0, 8, size=(n_rows, int(rng.integers(1, 5)))).astype(float)
+        block = int(rng.integers(1, 300))
+        assert skyline(points, block=block).tolist() == brute_force_skyline(points).tolist(), (n_rows, block)
+
+
+def test_skyline_of_continuous_points():
+    points = np.random.default_rng(0).normal(size=(3000, 3))
+    assert skyline(points).tolist() == brute_force_skyline(points).tolist()
@@ -0,0 +1,61 @@
+"""
+Binary catalog snapshots: round trips, and falling back to the CSV when a
+snapshot is damaged.
+"""
+import os
+import stat
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import write_cards_csv
+from services.card_catalog import CardCatalog
+from services.card_schema import read_snapshot, snapshot_path_for
+
+
+@pytest.fixture
+def catalog_csv(tmp_path):
+    return write_cards_csv(tmp_path / "cards.csv", 25)
+
+
+def test_snapshot_round_trip(catalog_csv):
+    snapshot = CardCatalog(catalog_csv).snapshot()
+    path = snapshot_path_for(catalog_csv)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+    mapped = read_snapshot(path, snapshot.version)
+    assert mapped.names == snapshot.compiled.names
+    for name, array in snapshot.compiled.arrays().items():
+        assert np.array_equal(mapped.arrays()[name], array)
+    assert read_snapshot(path, "other version") is None
+
+
+def test_damaged_snapshot_is_a_cache_miss(catalog_csv):
+    snapshot = CardCatalog(catalog_csv).snapshot()
+    path = snapshot_path_for(catalog_csv)
+    good = path.read_bytes()
+
+    for end in range(0, len(good), 37):
+        path.write_bytes(good[:end])
+        mapped = read_snapshot(path, snapshot.version)
+        # Cutting only trailing alignment padding leaves a valid snapshot
+        assert mapped is None or mapped.names == snapshot.compiled.names
+
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        damaged = bytearray(good)
+        damaged[rng.integers(8, 512)] ^= int(rng.integers(1, 256))
+        path.write_bytes(bytes(damaged))
+        read_snapshot(path, snapshot.version)
+
+
+def test_catalog_rebuilds_from_csv_after_truncation(catalog_csv):
+    expected = CardCatalog(catalog_csv).snapshot()
+    path = snapshot_path_for(catalog_csv)
+    path.write_bytes(path.read_bytes()[:200])
+
+    rebuilt = CardCatalog(catalog_csv).snapshot()
+    assert rebuilt.version == expected.version
+    assert rebuilt.compiled.names == expected.compiled.names
+    # The rebuild rewrote a good snapshot
+    assert read_snapshot(path, expected.version) is not None
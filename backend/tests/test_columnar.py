@@ -0,0 +1,113 @@
+"""
+Arrow and Parquet readers and writers against the JSON and CSV paths.
+"""
+import io
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from api.optimizer import SPEND_KEYS  # noqa: E402
+from benchmarks.synthetic import generate_cards  # noqa: E402
+from main import app  # noqa: E402
+from services.card_schema import CompiledCatalog  # noqa: E402
+from services.columnar import (  # noqa: E402
+    ARROW_FILE_MEDIA_TYPE,
+    ARROW_STREAM_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    InvalidColumnarData,
+    add_ledger,
+    iter_batch_record_batches,
+    read_spend_profiles,
+    to_parquet_bytes,
+)
+from services.ledger_ingest import LedgerAggregator, aggregate_ledger_file  # noqa: E402
+from services.reward_engine import iter_batch_results  # noqa: E402
+
+LEDGER_CSV = Path(__file__).resolve().parent.parent / "data" / "user_spend_raw.csv"
+
+
+def encode(table, media_type: str) -> bytes:
+    sink = io.BytesIO()
+    if media_type == PARQUET_MEDIA_TYPE:
+        pq.write_table(table, sink)
+    else:
+        open_writer = pa.ipc.new_file if media_type == ARROW_FILE_MEDIA_TYPE else pa.ipc.new_stream
+        with open_writer(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
+
+
+@pytest.mark.parametrize("media_type", [PARQUET_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE, ARROW_FILE_MEDIA_TYPE])
+def test_read_spend_profiles(media_type):
+    table = pa.table({
+        "id": ["a", "b", "c"],
+        "Groceries": pa.array([500, None, 20], pa.int32()),
+        "dining": [100.5, 0.0, 7.25],
+        "notes": ["x", "y", "z"],
+    })
+    ids, spend_matrix = read_spend_profiles(encode(table, media_type), media_type, ["groceries", "dining", "gas"])
+    assert ids == ["a", "b", "c"]
+    assert spend_matrix.tolist() == [[500.0, 100.5, 0.0], [0.0, 0.0, 0.0], [20.0, 7.25, 0.0]]
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+def test_non_finite_spend_is_rejected(value):
+    body = encode(pa.table({"groceries": [100.0, value]}), PARQUET_MEDIA_TYPE)
+    with pytest.raises(ValueError, match="finite"):
+        read_spend_profiles(body, PARQUET_MEDIA_TYPE, ["groceries"])
+
+
+def test_bad_input_is_rejected():
+    with pytest.raises(InvalidColumnarData):
+        read_spend_profiles(b"not parquet", PARQUET_MEDIA_TYPE, ["groceries"])
+    body = encode(pa.table({"groceries": ["lots"]}), PARQUET_MEDIA_TYPE)
+    with pytest.raises(ValueError, match="numeric"):
+        read_spend_profiles(body, PARQUET_MEDIA_TYPE, ["groceries"])
+
+
+def test_arrow_results_match_json_results():
+    compiled = CompiledCatalog.from_cards(generate_cards(30))
+    spend_matrix = np.random.default_rng(0).uniform(0, 900, size=(50, len(SPEND_KEYS))).round(2)
+    spend_matrix[3] = 0
+    ids = [f"user-{i}" for i in range(50)]
+    expected = [result for chunk in iter_batch_results(compiled, ids, spend_matrix, SPEND_KEYS, 3, 16)
+                for result in chunk]
+
+    schema, batches = iter_batch_record_batches(compiled, ids, spend_matrix, SPEND_KEYS, 3, 16)
+    rows = pq.read_table(io.BytesIO(to_parquet_bytes(schema, batches))).to_pylist()
+    assert [row["id"] for row in rows] == ids
+    for row, result in zip(rows, expected):
+        assert row["total_monthly_spend"] == pytest.approx(result["total_monthly_spend"])
+        if "error" in result:
+            assert row["error"] == result["error"] and row["top_cards"] == []
+            continue
+        assert row["error"] is None
+        assert [card["card_name"] for card in row["top_cards"]] == [card["card_name"] for card in result["top_cards"]]
+        assert [card["first_year_value"] for card in row["top_cards"]] == pytest.approx(
+            [card["first_year_value"] for card in result["top_cards"]]
+        )
+
+
+def test_parquet_ledger_matches_csv():
+    import pyarrow.csv
+
+    table = pyarrow.csv.read_csv(LEDGER_CSV)
+    aggregator = add_ledger(LedgerAggregator(), encode(table, PARQUET_MEDIA_TYPE), PARQUET_MEDIA_TYPE)
+    expected = aggregate_ledger_file(LEDGER_CSV)
+    assert (aggregator.rows, aggregator.skipped) == (expected.rows, expected.skipped)
+    assert aggregator.profiles() == expected.profiles()
+
+
+def test_batch_endpoint_rejects_nan_parquet():
+    body = encode(pa.table({"groceries": [100.0, float("nan")]}), PARQUET_MEDIA_TYPE)
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/optimizer/recommend/batch", content=body, headers={"content-type": PARQUET_MEDIA_TYPE}
+        )
+    assert response.status_code == 422
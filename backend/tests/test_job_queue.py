@@ -0,0 +1,57 @@
+"""
+Job queue lifecycle in real worker processes.
+"""
+import time
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from api.jobs import JobRequest
+from api.optimizer import SPEND_KEYS
+from services.job_queue import CANCELLED, JOB_MEMORY_LIMIT_MB, JOB_TIME_LIMIT, RUNNING, SUCCEEDED, JobQueue
+
+
+def wait_for(condition, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def batch_params(profiles: int, chunk_size: int):
+    return {
+        "ids": list(range(profiles)), "spend_matrix": np.full((profiles, len(SPEND_KEYS)), 250.0),
+        "spend_keys": SPEND_KEYS, "top_k": 3, "chunk_size": chunk_size,
+    }
+
+
+def test_shutdown_cancels_running_jobs():
+    queue = JobQueue(workers=1)
+    try:
+        quick = queue.submit("batch", batch_params(20, 10))
+        wait_for(lambda: quick.finished)
+        assert quick.status == SUCCEEDED
+
+        # Tens of seconds of small chunks if it were left to finish
+        running = queue.submit("batch", batch_params(200_000, 20), time_limit=600, memory_limit_mb=0)
+        queued = queue.submit("batch", batch_params(20, 10))
+        wait_for(lambda: running.status == RUNNING)
+    finally:
+        start = time.monotonic()
+        queue.shutdown()
+    assert time.monotonic() - start < 10
+    assert running.status == CANCELLED
+    assert queued.status == CANCELLED
+
+
+@pytest.mark.parametrize("limits", [
+    {"memory_limit_mb": 0},
+    {"memory_limit_mb": JOB_MEMORY_LIMIT_MB + 1},
+    {"time_limit": 0},
+    {"time_limit": JOB_TIME_LIMIT + 1},
+])
+def test_clients_cannot_raise_or_remove_limits(limits):
+    with pytest.raises(ValidationError):
+        JobRequest(kind="batch", params={}, **limits)
+    assert JobRequest(kind="batch", params={}, time_limit=1, memory_limit_mb=1).memory_limit_mb == 1
@@ -0,0 +1,55 @@
+"""
+Merchant resolution: fuzzy matches against merchant_categories.csv must
+find store numbers, locations and typos without mistaking different
+merchants for short names.
+"""
+import pytest
+
+from services.aho_corasick import AhoCorasick
+from services.fuzzy_matcher import MIN_FUZZY_GRAMS, TrigramIndex, clean_descriptor
+from services.merchant_resolver import resolve_merchant_to_category
+
+
+@pytest.mark.parametrize("merchant, category", [
+    ("Shell", "Gas"),
+    ("SHELL OIL 12345", "Gas"),
+    ("Costco Whse #0113", "Gas"),
+    ("SQ *STARBUCKS 123", "Dining"),
+    ("Starbuck 123", "Dining"),
+    ("Walgreen 1234", "Drugstores"),
+    ("Whole Food Market", "Groceries"),
+    ("AMZN Mktp US", "Online Shopping"),
+    ("MCDONALDS F1234", "Dining"),
+])
+def test_resolves_known_merchants(merchant, category):
+    assert resolve_merchant_to_category(merchant)["category"] == category
+
+
+@pytest.mark.parametrize("merchant", [
+    "Shells Seafood",
+    "Shellfish Shack",
+    "Shelly's Bakery",
+])
+def test_short_names_do_not_match_other_words(merchant):
+    info = resolve_merchant_to_category(merchant)
+    assert info["category"] == "Other", info
+    assert info["source"] == "default"
+
+
+def test_trigram_index_skips_short_names():
+    names = [clean_descriptor(name) for name in ["Shell", "Target", "Starbucks", "Whole Foods"]]
+    index = TrigramIndex(names)
+    assert index.search("shells seafood") == []
+    assert index.search("targeted ads") == []
+    assert index.search("starbuck 123") == [(2, 0.8235)]
+    assert index.search("whole food market", limit=1)[0][0] == 3
+    # Only names of at least MIN_FUZZY_GRAMS trigrams are fuzzy candidates
+    assert all(len(names[position]) >= MIN_FUZZY_GRAMS for position, _ in index.search("shell target", 0.1))
+
+
+def test_aho_corasick_first_match_priority():
+    matcher = AhoCorasick(["chipotle", "walmart", "mart", "amazon"])
+    assert matcher.first_match("walmart supercenter") == "walmart"
+    assert matcher.first_match("kmart 123") == "mart"
+    assert matcher.first_match("amazon chipotle") == "chipotle"
+    assert matcher.first_match("shell") is None
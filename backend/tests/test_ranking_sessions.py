@@ -0,0 +1,46 @@
+"""
+Ranking session endpoints: request validation happens before the session
+store is touched.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services.ranking_sessions import get_session_store
+
+SPEND = {"groceries": 500, "dining": 300, "gas": 150, "travel": 200, "online_shopping": 100, "other": 250}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_invalid_fields_do_not_create_a_session(client):
+    store = get_session_store()
+    sessions = len(store)
+    assert client.post("/api/optimizer/sessions?fields=bogus", json=SPEND).status_code == 422
+    assert len(store) == sessions
+
+    response = client.patch(
+        "/api/optimizer/sessions/rebuilt?fields=bogus",
+        json={"category": "dining", "amount": 900, "spend": SPEND}
+    )
+    assert response.status_code == 422
+    assert store.get("rebuilt") is None
+
+
+def test_invalid_fields_do_not_change_a_session(client):
+    session_id = client.post("/api/optimizer/sessions", json=SPEND).json()["session_id"]
+    response = client.patch(
+        f"/api/optimizer/sessions/{session_id}?fields=bogus", json={"category": "dining", "amount": 900}
+    )
+    assert response.status_code == 422
+    session = get_session_store().get(session_id)
+    assert session.spend["dining"] == 300
+    assert session.updates == 0
+
+    body = client.get(f"/api/optimizer/sessions/{session_id}?fields=card_name&top_k=2").json()
+    assert body["session_id"] == session_id
+    assert [set(card) for card in body["recommendations"]] == [{"card_name"}] * 2
@@ -0,0 +1,32 @@
+"""
+Merchant /recommend endpoint validation.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services.reward_optimizer import RewardOptimizer
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("top_k", [0, -1])
+def test_top_k_below_one_is_rejected(client, top_k):
+    response = client.post("/recommend", json={"merchant": "Chipotle", "amount": 25, "top_k": top_k})
+    assert response.status_code == 422
+
+
+def test_top_k_limits_alternatives(client):
+    response = client.post("/recommend", json={"merchant": "Chipotle", "amount": 25, "top_k": 2})
+    assert response.status_code == 200
+    assert len(response.json()["alternatives_ranked"]) == 2
+
+
+@pytest.mark.parametrize("top_k", [0, -1])
+def test_optimizer_rejects_top_k_below_one(top_k):
+    with pytest.raises(ValueError, match="top_k"):
+        RewardOptimizer().optimize("Chipotle", 25.0, top_k=top_k)
@@ -0,0 +1,68 @@
+"""
+Parity of the compiled reward engine with card_ranker, and its array helpers.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate_cards
+from services.card_schema import CAP_PERIOD_MONTHS
+from services.reward_engine import random_spend_profiles, round_cents, top_k_indices, verify_parity
+
+
+def capped_cards(count: int, seed: int = 0):
+    """Cards whose every bonus category is capped, across all cap periods."""
+    rng = random.Random(seed)
+    cards = generate_cards(count, seed)
+    for card in cards:
+        if not card['category_rewards']:
+            card['category_rewards'] = {'Groceries': 0.05}
+        card['category_caps'] = {
+            category: float(rng.choice([250, 500, 1500, 2000, 6000])) for category in card['category_rewards']
+        }
+        card['cap_periods'] = {category: rng.choice(list(CAP_PERIOD_MONTHS)) for category in card['category_caps']}
+    return cards
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_parity_random_catalog(seed):
+    assert verify_parity(generate_cards(40, seed), random_spend_profiles(150, seed)) == []
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_parity_capped_catalog(seed):
+    assert verify_parity(capped_cards(40, seed), random_spend_profiles(150, seed)) == []
+
+
+def test_parity_empty_spend():
+    assert verify_parity(generate_cards(10), [{'groceries': 0.0, 'dining': 0.0}]) == []
+
+
+def test_round_cents_matches_python_round():
+    rng = np.random.default_rng(0)
+    half_cents = np.arange(0, 100_000, 5) / 1000
+    values = np.concatenate([
+        half_cents, -half_cents, rng.uniform(-1e5, 1e5, 10_000), [0.125, 1.005, 2.675, 1e-9, 0.0]
+    ])
+    assert round_cents(values).tolist() == [round(value, 2) for value in values.tolist()]
+    # Shape is preserved for 2-d input
+    grid = values[:1000].reshape(10, 100)
+    assert round_cents(grid).tolist() == [[round(value, 2) for value in row] for row in grid.tolist()]
+
+
+def test_top_k_indices_breaks_ties_by_column():
+    values = np.array([
+        [1.0, 3.0, 3.0, 2.0, 3.0],
+        [5.0, 5.0, 5.0, 5.0, 5.0],
+        [0.0, 1.0, 0.0, 1.0, 0.0],
+    ])
+    assert top_k_indices(values, 2).tolist() == [[1, 2], [0, 1], [1, 3]]
+    assert top_k_indices(values, 4).tolist() == [[1, 2, 4, 3], [0, 1, 2, 3], [1, 3, 0, 2]]
+
+
+@pytest.mark.parametrize("k", [0, 1, 3, 7, 20])
+def test_top_k_indices_matches_stable_sort(k):
+    values = np.random.default_rng(k).integers(0, 4, size=(200, 7)).astype(float)
+    expected = np.argsort(-values, axis=1, kind='stable')[:, :k]
+    assert top_k_indices(values, k).tolist() == expected.tolist()
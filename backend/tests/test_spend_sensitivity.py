@@ -0,0 +1,25 @@
+"""
+Spend breakpoint envelopes against the batch ranker at probed spend levels.
+"""
+import pytest
+
+from services.reward_engine import get_compiled_catalog, random_spend_profiles
+from services.spend_sensitivity import probe_mismatches
+from services.wallet_optimizer import random_catalog
+
+PROFILES = [
+    {key: min(amount, 3000.0) for key, amount in profile.items()}
+    for profile in random_spend_profiles(12, seed=3)
+]
+
+
+@pytest.mark.parametrize("catalog", ["bundled", 50, 400])
+def test_breakpoints_match_ranker(catalog):
+    compiled = get_compiled_catalog() if catalog == "bundled" else random_catalog(catalog, seed=catalog)
+    problems = [
+        problem
+        for profile in PROFILES
+        for key in profile
+        for problem in probe_mismatches(compiled, profile, key, max_spend=5000.0)
+    ]
+    assert problems == []
@@ -0,0 +1,19 @@
+"""
+Wallet branch-and-bound search against exhaustive search on small catalogs.
+"""
+import pytest
+
+from services.reward_engine import random_spend_profiles
+from services.wallet_optimizer import OBJECTIVES, WalletSearch, brute_force_wallet, random_catalog
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_search_matches_brute_force(seed):
+    catalog = random_catalog(4 + seed % 8, seed)
+    for spend in random_spend_profiles(4, seed):
+        for max_cards in (1, 2, 3):
+            for objective in OBJECTIVES:
+                wallet, value = WalletSearch(catalog, spend, objective).solve(max_cards)
+                expected_wallet, expected = brute_force_wallet(catalog, spend, max_cards, objective)
+                assert value == pytest.approx(expected, abs=1e-6), (spend, max_cards, objective, wallet, expected_wallet)
+                assert len(wallet) <= max_cards
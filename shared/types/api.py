@@ -10,6 +10,12 @@ class RecommendationRequest(BaseModel):
     """Request model for credit card recommendation."""
     merchant: str = Field(..., description="Merchant name")
     amount: float = Field(..., gt=0, description="Transaction amount in dollars")
+    top_k: Optional[int] = Field(None, ge=1, description="Number of alternative cards to return (all if omitted)")
+
+
+class MerchantBulkRequest(BaseModel):
+    """Request model for resolving many merchant names or card descriptors."""
+    merchants: List[str] = Field(..., max_length=10000, description="Merchant names or raw statement descriptors")
 
 
 # Response Models
@@ -40,11 +46,23 @@ class MerchantInfoResponse(BaseModel):
     mcc_details: Optional[Dict[str, Any]] = None
 
 
+class MerchantBulkResponse(BaseModel):
+    """Response model for bulk merchant resolution (no MCC details)."""
+    results: List[MerchantInfoResponse]
+    count: int
+
+
 class Card(BaseModel):
-    """Credit card model."""
+    """Credit card model (mirrors services.card_schema.CompiledCatalog.card)."""
     name: str
+    issuer: str = "Unknown"
     base_reward: float
     category_rewards: Dict[str, float] = Field(default_factory=dict)
+    annual_fee: float = 0
+    signup_bonus: float = 0
+    signup_bonus_spend_requirement: float = 0
+    category_caps: Dict[str, float] = Field(default_factory=dict)
+    cap_periods: Dict[str, str] = Field(default_factory=dict)
 
 
 # Type aliases for TypeScript compatibility